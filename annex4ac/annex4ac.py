@@ -31,44 +31,82 @@ exception handling as required.
 import os
 import sys
 import json
-import tempfile
+import time
 import re
 from pathlib import Path
-from typing import Dict, Literal, List, Optional
+from functools import lru_cache
+from typing import Dict, Literal, List, Optional, Tuple
 from enum import Enum
 from datetime import datetime, timedelta, date
-from dateutil.relativedelta import relativedelta
-from dateutil.parser import parse as parse_dt
 
-import requests
-from bs4 import BeautifulSoup
-import yaml
 import typer
 from pydantic import BaseModel, ValidationError, Field, field_validator
 from importlib.resources import files
-from jinja2 import Template
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, KeepTogether
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from .policy.annex4ac_validate import validate_payload
-import unicodedata
-from .docx_generator import render_docx
-from ftfy import fix_text
-from markupsafe import escape, Markup
-from platformdirs import user_cache_dir
-from .constants import DOC_CTRL_FIELDS, SECTION_MAPPING, SCHEMA_VERSION, AI_ACT_ANNEX_IV_HTML, AI_ACT_ANNEX_IV_PDF
-from .config import Settings
-from .db import (
-    get_session,
-    load_annex_iv_from_db,
-    get_schema_version_from_db,
-    get_expected_top_counts,
-)
+from .constants import DOC_CTRL_FIELDS, SECTION_MAPPING, SCHEMA_VERSION, AI_ACT_ANNEX_IV_HTML
+from .patterns import BULLET_RE, SUBPOINT_RE, TOP_BULLET_RE, ROMAN_RE  # noqa: F401  (old import location)
+from .structure import get_index, normalize_lines, parse_section
 from .tags import fetch_annex3_tags
 
+# -----------------------------------------------------------------------------
+# Lazy imports
+# -----------------------------------------------------------------------------
+# Heavy dependencies (SQLAlchemy, ReportLab, python-docx, Jinja2, bs4, requests,
+# pikepdf) are only imported by the command that needs them, so `validate` and
+# `--help` start fast. See benchmarks/bench_startup.py.
+
+def _lazy(module: str, name: str):
+    """Return a stand-in for ``module.name`` that imports ``module`` on first call."""
+    def proxy(*args, **kwargs):
+        from importlib import import_module
+        return getattr(import_module(module, __package__), name)(*args, **kwargs)
+    proxy.__name__ = name
+    proxy.__doc__ = f"Lazy proxy for ``annex4ac{module}.{name}``."
+    return proxy
+
+
+get_session = _lazy(".db", "get_session")
+load_annex_iv_from_db = _lazy(".db", "load_annex_iv_from_db")
+get_schema_version_from_db = _lazy(".db", "get_schema_version_from_db")
+get_expected_top_counts = _lazy(".db", "get_expected_top_counts")
+load_annex_snapshot = _lazy(".db", "load_annex_snapshot")
+
+# Names that used to live in this module, now resolved on attribute access.
+_MOVED = {
+    "listify": ".html_generator",
+    "_default_tpl": ".html_generator",
+    "_render_html": ".html_generator",
+    "render_docx": ".docx_generator",
+    "PIKEPDF_AVAILABLE": ".pdf_generator",
+    "_register_fonts": ".pdf_generator",
+    "_punctuate": ".pdf_generator",
+    "_make_ul": ".pdf_generator",
+    "_make_ol": ".pdf_generator",
+    "_text_to_flowables": ".pdf_generator",
+    "_get_body_style": ".pdf_generator",
+    "_get_heading_style": ".pdf_generator",
+    "_doc_control_pdf": ".pdf_generator",
+    "_header": ".pdf_generator",
+    "_footer": ".pdf_generator",
+    "_header_and_footer": ".pdf_generator",
+    "_render_pdf": ".pdf_generator",
+    "_embed_output_intent": ".pdf_generator",
+    "_load_icc_bytes": ".pdf_generator",
+    "_to_pdfa": ".pdf_generator",
+}
+
+
+def __getattr__(name):
+    if name in _MOVED:
+        from importlib import import_module
+        return getattr(import_module(_MOVED[name], __package__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _settings():
+    from .config import Settings
+    return Settings()
+
 
 class SourcePref(str, Enum):
     db_only = "db_only"
@@ -84,6 +122,7 @@ def _parse_iso_date(val):
         return datetime.combine(val, datetime.min.time())
     if isinstance(val, str) and val.strip():
         # allow without "T"
+        from dateutil.parser import parse as parse_dt
         return parse_dt(val if 'T' in val else val + "T00:00:00")
     return datetime.now()
 
@@ -103,6 +142,7 @@ def _build_doc_meta(payload: dict) -> dict:
             # Calculate retention period according to Art. 18(1): 10 years after placing on market/put into service
             placed_on_market = payload.get("placed_on_market") or payload.get("put_into_service")
             if placed_on_market:
+                from dateutil.relativedelta import relativedelta
                 pom = _parse_iso_date(placed_on_market)
                 retention = (pom + relativedelta(years=10)).date().isoformat()
                 meta[key] = retention
@@ -114,259 +154,25 @@ def _build_doc_meta(payload: dict) -> dict:
             meta[key] = value if value else "—"
     return meta
 
-# Attempt to import pikepdf for PDF/A support
-try:
-    import pikepdf
-    PIKEPDF_AVAILABLE = True
-except ImportError:
-    PIKEPDF_AVAILABLE = False
-
-# Regular expressions for parsing lists
-"""Regular expressions for parsing list structures in Annex IV text."""
-BULLET_RE = re.compile(r'^\s*(?:[\u2022\u25CF\u25AA\u00B7\u2013\u2014\-\*])\s+')
-# allow any letter a-z; roman numerals filtered separately via ROMAN_RE
-SUBPOINT_RE = re.compile(r'^\s*\(([a-z])\)\s+', re.I)
-TOP_BULLET_RE = re.compile(r'^\s{0,3}(?:[-*\u2022\u25AA\u00B7\u2013\u2014]|\d+[\.)])\s+')
-# Roman numerals in Annex IV use only i/v/x combinations like (i), (ii), …
-# Limit the pattern to those letters so that (c), (d) etc. are treated as
-# regular alphabetic subpoints rather than filtered as roman numerals.
-ROMAN_RE = re.compile(r'^\s*\(([ivx]+)\)\s+', re.I)
-
-
 def _normalize_lines(text: str) -> list[str]:
-    if not text:
-        return []
-    text = fix_text(text)
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    return [ln.rstrip() for ln in text.splitlines()]
+    return normalize_lines(text)
 
 
 def _extract_letters(text: str) -> list[str]:
     """Extract lettered subpoints like (a), (b) from text."""
-    letters = []
-    for ln in _normalize_lines(text):
-        m = SUBPOINT_RE.match(ln)
-        if m and not ROMAN_RE.match(ln):
-            letters.append(m.group(1).lower())
-    return letters
+    return list(parse_section(text).letters)
 
 
 def _count_subpoints_db(db_text: str) -> tuple[int, int]:
     """Return (N_top, N_sub_of_first) for canonical Annex IV text from DB."""
-    lines = _normalize_lines(db_text)
-    letters_idx = [
-        i
-        for i, ln in enumerate(lines)
-        if SUBPOINT_RE.match(ln) and not ROMAN_RE.match(ln)
-    ]
-    if letters_idx:
-        n_top = len(letters_idx)
-        start = letters_idx[0]
-        end = letters_idx[1] if len(letters_idx) > 1 else len(lines)
-        block = lines[start + 1 : end]
-    else:
-        candidates = [(i, len(re.match(r"^\s*", ln).group(0)))
-                      for i, ln in enumerate(lines) if TOP_BULLET_RE.match(ln)]
-        if candidates:
-            min_indent = min(ind for _, ind in candidates)
-            top_idxs = [i for i, ind in candidates if ind == min_indent]
-            n_top = len(top_idxs)
-        else:
-            n_top = 0
-        if n_top:
-            first_idx = top_idxs[0]
-            indent_top = min_indent
-            j = first_idx + 1
-            block = []
-            while j < len(lines):
-                ln = lines[j]
-                if ln.strip() == "":
-                    j += 1
-                    continue
-                indent = len(re.match(r"^\s*", ln).group(0))
-                if TOP_BULLET_RE.match(ln) and indent <= indent_top:
-                    break
-                block.append(ln)
-                j += 1
-        else:
-            return (0, 0)
-    n_sub = 0
-    for ln in block:
-        if TOP_BULLET_RE.match(ln) or ROMAN_RE.match(ln) or SUBPOINT_RE.match(ln):
-            n_sub += 1
-    return (n_top, n_sub)
+    sec = parse_section(db_text)
+    return (sec.n_top, sec.n_sub_first)
 
 
 def _count_subpoints_user(user_text: str) -> tuple[int, int]:
     """Return (N_top, N_sub_of_first) for user-provided section text."""
-    lines = _normalize_lines(user_text)
-    letters = [
-        i
-        for i, ln in enumerate(lines)
-        if SUBPOINT_RE.match(ln) and not ROMAN_RE.match(ln)
-    ]
-    if letters:
-        n_top = len(letters)
-        start = letters[0]
-        end = letters[1] if len(letters) > 1 else len(lines)
-        block = lines[start + 1 : end]
-    else:
-        candidates = [(i, len(re.match(r"^\s*", ln).group(0)))
-                      for i, ln in enumerate(lines) if TOP_BULLET_RE.match(ln)]
-        if candidates:
-            min_indent = min(ind for _, ind in candidates)
-            top_idx = [i for i, ind in candidates if ind == min_indent]
-            n_top = len(top_idx)
-        else:
-            return (0, 0)
-        start = top_idx[0]
-        indent_top = min_indent
-        j = start + 1
-        block = []
-        while j < len(lines):
-            ln = lines[j]
-            if ln.strip() == "":
-                j += 1
-                continue
-            indent = len(re.match(r"^\s*", ln).group(0))
-            if TOP_BULLET_RE.match(ln) and indent <= indent_top:
-                break
-            block.append(ln)
-            j += 1
-    n_sub = 0
-    for ln in block:
-        if TOP_BULLET_RE.match(ln) or ROMAN_RE.match(ln) or SUBPOINT_RE.match(ln):
-            n_sub += 1
-    return (n_top, n_sub)
-
-def listify(text: str) -> Markup:
-    """
-    Creates HIERARCHICAL structure:
-      (a) Item heading
-          - subitem
-          - subitem
-      (b) ...
-    One <ol class="alpha"> per group; each <li> can contain <ul>.
-    Also processes regular bulleted lists.
-    """
-    if not text:
-        return Markup("")
-    text = fix_text(text)
-
-    out: list[str] = []
-    lines = text.splitlines()
-
-    # Current top-level "block"
-    ol_items: list[dict] = []   # [{'head': str, 'bullets': [str,...]}]
-    current: Optional[dict] = None
-
-    def punctuate(arr: list[str]) -> list[str]:
-        arr = [s.rstrip(" ;.") for s in arr]
-        result = []
-        for i, s in enumerate(arr):
-            # Don't add period/semicolon if string ends with colon
-            if s.endswith(':'):
-                result.append(s)
-            else:
-                result.append(s + ("." if i == len(arr)-1 else ";"))
-        return result
-
-    def flush_ol():
-        nonlocal ol_items, current
-        if current:
-            ol_items.append(current)
-            current = None
-        if not ol_items:
-            return
-        # render one common <ol>
-        li_html = []
-        for item in ol_items:
-            head = escape(item['head'])
-            if item['bullets']:
-                bullets = ''.join(f"<li>{escape(b)}</li>" for b in punctuate(item['bullets']))
-                li_html.append(f"<li>{head}<ul>{bullets}</ul></li>")
-            else:
-                li_html.append(f"<li>{head}</li>")
-        out.append(f"<ol class=\"alpha\">{''.join(li_html)}</ol>")
-        ol_items = []
-
-    def flush_ul(ul_items: list[str]):
-        if not ul_items:
-            return
-        bullets = ''.join(f"<li>{escape(b)}</li>" for b in punctuate(ul_items))
-        out.append(f"<ul>{bullets}</ul>")
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line:
-            i += 1
-            continue
-
-        m_alpha = SUBPOINT_RE.match(line)
-        m_bullet = BULLET_RE.match(line)
-
-        if m_alpha:
-            # New item (a)/(b)...
-            cleaned = SUBPOINT_RE.sub('', line, 1).strip()
-            # Close previous item and add to array
-            if current:
-                ol_items.append(current)
-            current = {'head': cleaned, 'bullets': []}
-            i += 1
-            continue
-
-        if m_bullet and current:
-            # Bullet inside (a)/(b) structure
-            cleaned = BULLET_RE.sub('', line, 1).strip()
-            current['bullets'].append(cleaned)
-            i += 1
-            continue
-
-        if m_bullet and not current:
-            # Regular bulleted list without (a)/(b)...
-            flush_ol()
-            ul_items = [BULLET_RE.sub('', line, 1).strip()]
-            i += 1
-            # Collect all subsequent bullets
-            while i < len(lines):
-                next_line = lines[i].strip()
-                if not next_line:
-                    break
-                if BULLET_RE.match(next_line):
-                    ul_items.append(BULLET_RE.sub('', next_line, 1).strip())
-                    i += 1
-                else:
-                    break
-            flush_ul(ul_items)
-            continue
-
-        # Regular text — need to close current ol-block (if any)
-        flush_ol()
-        out.append(f"<p>{escape(line)}</p>")
-        i += 1
-
-    # Final flush
-    flush_ol()
-
-    return Markup('\n'.join(out))
-
-
-
-# -----------------------------------------------------------------------------
-# Constants
-# -----------------------------------------------------------------------------
-# Register Liberation Sans (expects LiberationSans-Regular.ttf and LiberationSans-Bold.ttf to be available)
-try:
-    regular_font_path = files("annex4ac").joinpath("fonts/LiberationSans-Regular.ttf")
-    bold_font_path = files("annex4ac").joinpath("fonts/LiberationSans-Bold.ttf")
-    pdfmetrics.registerFont(TTFont("LiberationSans", str(regular_font_path)))
-    pdfmetrics.registerFont(TTFont("LiberationSans-Bold", str(bold_font_path)))
-except Exception:
-    # Fallback to direct file access
-    FONTS_DIR = Path(__file__).parent / "fonts"
-    pdfmetrics.registerFont(TTFont("LiberationSans", str(FONTS_DIR / "LiberationSans-Regular.ttf")))
-    pdfmetrics.registerFont(TTFont("LiberationSans-Bold", str(FONTS_DIR / "LiberationSans-Bold.ttf")))
+    sec = parse_section(user_text)
+    return (sec.n_top, sec.n_sub_first)
 
 # -----------------------------------------------------------------------------
 # Pydantic schema mirrors Annex IV – update automatically during fetch.
@@ -438,6 +244,7 @@ def slugify(text):
 
 def _fetch_html(url: str) -> str:
     """Return HTML string, raise on non-200."""
+    import requests
     r = requests.get(url, timeout=20)
     if r.status_code != 200:
         typer.secho(f"ERROR: {url} returned {r.status_code}", fg=typer.colors.RED, err=True)
@@ -489,6 +296,7 @@ def _parse_annex_iv(html: str) -> Dict[str, str]:
 
 
 def _write_yaml(data: Dict[str, str], path: Path):
+    import yaml
     # Dump YAML with an empty line before each key (except the first)
     with path.open("w", encoding="utf-8") as f:
         first = True
@@ -543,431 +351,313 @@ def _write_yaml(data: Dict[str, str], path: Path):
         yaml.dump({"_schema_version": data.get("_schema_version", SCHEMA_VERSION)}, f, allow_unicode=True, default_flow_style=False)
 
 
-def _punctuate(items: list[str]) -> list[str]:
-    """Adds ';' after each list item and '.' after the last one, but not after colon."""
-    if not items:
-        return items
-    out = []
-    for i, t in enumerate(items):
-        t = t.rstrip(" ;.")
-        # Don't add period/semicolon if string ends with colon
-        if t.endswith(':'):
-            out.append(t)
+def _freshness_message(dt, max_days=None) -> Optional[str]:
+    """Return the staleness message for ``dt`` or ``None`` if it is fresh enough."""
+    if not max_days or max_days <= 0:
+        return None
+    if datetime.now() - dt > timedelta(days=max_days):
+        return f"Technical doc is older than {max_days} days — consider updating (Art. 11 'techdoc must be kept up-to-date')."
+    return None
+
+def _check_freshness(dt, max_days=None, strict=False):
+    """Heuristic staleness check. max_days=None/<=0 disables it."""
+    msg = _freshness_message(dt, max_days)
+    if msg:
+        if strict:
+            typer.secho(f"[ERROR] {msg}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(1)
         else:
-            out.append(t + ("." if i == len(items)-1 else ";"))
-    return out
-
-def _make_ul(items):
-    items = _punctuate(items)
-    return ListFlowable(
-        [Paragraph(t, _get_body_style()) for t in items],
-        bulletType='bullet',
-        leftIndent=18,
-        bulletIndent=0,
-    )
+            typer.secho(f"[WARNING] {msg}", fg=typer.colors.YELLOW)
 
-def _make_ol(items, start=1):
-    """Alphabetical list ((a),(b)…). Pass value=…, otherwise ReportLab repeats (a)."""
-    items = _punctuate(items)
-    flow_items = [
-        ListItem(Paragraph(t, _get_body_style()), value=i)
-        for i, t in enumerate(items, start)
-    ]
-    return ListFlowable(
-        flow_items,
-        bulletType='a',
-        bulletFormat='(%s)',
-        leftIndent=18,
-        bulletIndent=0,
-        start=start,
-    )
+def _parse_yaml_rt(text: str) -> dict:
+    """Parse a YAML spec with the ruamel round-trip loader (keeps line/col info)."""
+    from ruamel.yaml import YAML
+    return YAML(typ="rt").load(text)
 
-def _text_to_flowables(text: str):
-    """
-    Splits block into Paragraph / ListFlowable using the same regex as DOCX.
-    Supports simple UL and OL lists (a)(b)(c).
+def _load_yaml_rt(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return _parse_yaml_rt(f.read())
+
+def _db_violations(payload, db_schema: dict, exp_top_counts: dict, explain: bool = True,
+                   index=None, store=None) -> list:
+    """Cross-check section structure of ``payload`` against the DB snapshot.
+
+    ``index`` is the prebuilt structural index of ``db_schema``; it is looked
+    up (and memoised) from the text when not given. With a ``store`` the
+    outcome for each section is cached by its text, so an edited spec only
+    re-checks the sections that changed.
     """
-    if not text:
-        return [Paragraph('—', _get_body_style())]
+    if index is None:
+        index = get_index(db_schema)
+    if store is None:
+        return [v for _, key in SECTION_MAPPING
+                for v in _section_violations(key, payload, index, exp_top_counts, explain)]
+
+    from .cache import digest
+    from .policy.annex4ac_validate import RULE_ENGINE_VERSION
+    from .structure import INDEX_FORMAT
+    salt = digest("section", RULE_ENGINE_VERSION, str(INDEX_FORMAT), index.digest,
+                  "explain" if explain else "")
+    violations = []
+    for _, key in SECTION_MAPPING:
+        skey = digest(salt, key, str(payload.get(key) or ""), str(exp_top_counts.get(key, 0)))
+        found = store.get_json(skey)
+        if found is None:
+            found = _section_violations(key, payload, index, exp_top_counts, explain)
+            store.put_json(skey, found)
+        violations.extend(found)
+    return violations
+
+def _section_violations(key, payload, index, exp_top_counts: dict, explain: bool) -> list:
+    violations = []
+    db_sec = index.get(key)
+    user_text = str(payload.get(key) or "").strip()
+    if db_sec is None or not db_sec.present:
+        return violations
+    if not user_text:
+        violations.append({
+            "rule": f"{key}_required",
+            "msg": f"Annex IV requires content for '{key}' (per DB snapshot).",
+        })
+        return violations
+    exp_top = exp_top_counts.get(key, 0)
+    exp_sub = db_sec.n_sub_first
+    user_sec = parse_section(user_text)
+    got_top, got_sub = user_sec.n_top, user_sec.n_sub_first
+    missing_letters = sorted(set(db_sec.letters) - set(user_sec.letters))
+    if exp_top >= 2 and got_top < exp_top:
+        msg = f"{key}: expected ≥{exp_top} top-level subpoints, got {got_top}."
+        if explain and missing_letters:
+            msg += "\nMissing: " + ", ".join(f"({l})" for l in missing_letters) + "."
+        violation = {
+            "rule": f"{key}_subpoints_insufficient",
+            "msg": msg,
+        }
+        if missing_letters:
+            violation["help"] = "Missing subpoints: " + ", ".join(
+                f"({l})" for l in missing_letters
+            )
+        violations.append(violation)
+    if exp_sub >= 2 and got_sub < exp_sub:
+        violations.append({
+            "rule": f"{key}_subsub_insufficient",
+            "msg": f"{key}: first subpoint expected ≥{exp_sub} nested items, got {got_sub}.",
+        })
+    return violations
+
+def _warn_if_stale(snap):
+    if snap.stale:
+        typer.secho(
+            f"[WARNING] Database unreachable; using cached Annex IV snapshot {snap.regulation_id}.",
+            fg=typer.colors.YELLOW,
+            err=True,
+        )
 
-    lines = text.splitlines()
-    flows, mode, buf = [], None, []
-    alpha_cursor = 1
+def _env_int(name: str, default: int) -> int:
+    """Integer environment setting; an unparsable value warns once and gives ``default``."""
+    value = os.getenv(name, "").strip()
+    return _parse_env_int(name, value, default) if value else default
 
-    def flush():
-        nonlocal mode, buf, alpha_cursor
-        if not buf:
-            return
-        if mode == 'ol':
-            flows.append(_make_ol(buf, start=alpha_cursor))
-            alpha_cursor += len(buf)
-        elif mode == 'ul':
-            flows.append(_make_ul(buf))
-        mode, buf = None, []
-
-    for raw in lines:
-        line = raw.strip()
-        if not line:
-            # empty line ends current list
-            flush()
-            continue
-        if SUBPOINT_RE.match(line):
-            cleaned = SUBPOINT_RE.sub('', line, 1).strip()
-            if mode != 'ol':
-                flush(); mode = 'ol'
-            buf.append(cleaned)
-        elif BULLET_RE.match(line):
-            cleaned = BULLET_RE.sub('', line, 1).strip()
-            if mode != 'ul':
-                flush(); mode = 'ul'
-            buf.append(cleaned)
-        else:
-            flush()
-            flows.append(Paragraph(line, _get_body_style()))
-    flush()
-    return [KeepTogether(f) for f in flows]
-
-
-def _get_body_style():
-    style = ParagraphStyle(
-        "Body",
-        fontName="LiberationSans",
-        fontSize=11,
-        leading=14,
-        spaceAfter=8,
-        spaceBefore=0,
-        leftIndent=0,
-        rightIndent=0,
-    )
-    return style
-
-def _get_heading_style():
-    style = ParagraphStyle(
-        "Heading",
-        fontName="LiberationSans-Bold",
-        fontSize=14,
-        leading=16,
-        spaceAfter=8,
-        spaceBefore=16,
-        leftIndent=0,
-        rightIndent=0,
-        alignment=0,
-        # Add letterSpacing (tracking) via wordSpace, since reportlab does not support letterSpacing directly
-        wordSpace=0.5,  # 0.5 pt letter-spacing (emulated)
-        # small-caps is not supported directly, but can be added via font or manually if needed
+@lru_cache(maxsize=None)
+def _parse_env_int(name: str, value: str, default: int) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        typer.secho(f"[WARNING] Ignoring {name}={value!r} (expected a whole number); using {default}.",
+                    fg=typer.colors.YELLOW, err=True)
+        return default
+
+def _validation_store(root: Optional[Path] = None, enabled: bool = True):
+    """Return the shared validation result store, or ``None`` when caching is off.
+
+    ``root`` (``--cache-dir``) or ``ANNEX4AC_VALIDATE_CACHE`` may point at a
+    directory shared by several CI runners; ``ANNEX4AC_VALIDATE_CACHE=0``
+    disables the cache. The size bound is ``ANNEX4AC_VALIDATE_CACHE_MB``.
+    """
+    from .cache import ContentStore, cache_dir
+    env = os.getenv("ANNEX4AC_VALIDATE_CACHE", "").strip()
+    if not enabled or env.lower() in {"0", "false", "no", "off"}:
+        return None
+    max_mb = _env_int("ANNEX4AC_VALIDATE_CACHE_MB", 256)
+    try:
+        return ContentStore(root or env or cache_dir("validation"), max_bytes=max_mb * 2**20)
+    except OSError:
+        return None
+
+def _validation_salt(high_risk_tags, snap=None, index=None, explain: bool = True) -> str:
+    """Digest of everything besides the file that a validation result depends on."""
+    from .cache import digest
+    from .policy.annex4ac_validate import RULE_ENGINE_VERSION
+    from .structure import INDEX_FORMAT
+    db = "nodb"
+    if snap is not None:
+        db = json.dumps([snap.token, index.digest if index else None, dict(snap.top_counts)],
+                        sort_keys=True, default=str)
+    return digest(
+        "validate", RULE_ENGINE_VERSION, str(INDEX_FORMAT),
+        "\n".join(sorted(high_risk_tags)), db, "explain" if explain else "",
     )
-    return style
 
-def _doc_control_pdf(meta: dict):
-    """Returns list of Flowable for PDF 'Document control' block."""
-    flows = [Paragraph("Document control", _get_heading_style())]
-    for label, key in DOC_CTRL_FIELDS:
-        val = meta.get(key, "—")
-        flows.append(Paragraph(f"<b>{label}:</b> {val}", _get_body_style()))
-    flows.append(Spacer(1, 12))
-    return flows
-
-def _header(canvas, doc):
-    import datetime
-    canvas.saveState()
-    canvas.setFont("LiberationSans", 8)
-    schema = getattr(doc, "_schema_version", None)
-    if not schema:
-        # Try to get from payload
-        try:
-            schema = doc._payload.get("_schema_version", "unknown")
-        except Exception:
-            schema = "unknown"
-    canvas.drawRightString(A4[0]-25*mm, A4[1]-15*mm,
-        f"Annex IV — Technical documentation referred to in Article 11(1)")
-    canvas.restoreState()
-
-def _footer(canvas, doc):
-    canvas.saveState()
-    canvas.setFont("LiberationSans", 9)
-    # Center of the bottom margin — page number
-    page_num = canvas.getPageNumber()
-    canvas.drawCentredString(A4[0]/2, 15*mm, str(page_num))
-    canvas.restoreState()
-
-def _header_and_footer(canvas, doc):
-    _header(canvas, doc)
-    _footer(canvas, doc)
-
-def _render_pdf(payload: dict, out_pdf: Path, meta: dict):
-    doc = SimpleDocTemplate(str(out_pdf), pagesize=A4,
-                            leftMargin=25*mm, rightMargin=25*mm,
-                            topMargin=20*mm, bottomMargin=20*mm)  # top/bottom margins 20 mm
-    doc._schema_version = payload.get("_schema_version", "unknown")
-    doc._payload = payload
-    story = []
-    # Insert metadata block
-    story.extend(_doc_control_pdf(meta))
-    
-    # Generate all 9 sections for all enterprise sizes (SME, MID, LARGE)
-    for title, key in SECTION_MAPPING:
-        story.append(Paragraph(title, _get_heading_style()))
-        body = payload.get(key, "—")
-        # Fix text encoding issues
-        body = fix_text(body)
-        # Unescape \n and normalize line breaks
-        body = body.replace('\\r\\n', '\n').replace('\\r', '\n').replace('\\n', '\n')
-        # Restore logical line breaks for YAML flow scalars
-        body = re.sub(r'\s+(?=(?:[-•*]\s))', '\n', body)
-        body = re.sub(r'\s+(?=\([a-z]\)\s+)', '\n', body, flags=re.I)
-        # Fix double line breaks before list markers
-        body = re.sub(r'\n\s*\n\s*([-•*])', r'\n\1', body)
-        # Split into paragraphs and process each separately
-        paragraphs = re.split(r'\n{2,}', body)
-        for para in paragraphs:
-            if para.strip():
-                for fl in _text_to_flowables(para.strip()):
-                    story.append(fl)
-        story.append(Spacer(1, 12))
-    doc.build(story, onFirstPage=_header_and_footer, onLaterPages=_header_and_footer)
-
-def _embed_output_intent(pdf, icc_bytes):
-    """Embeds OutputIntent with ICC profile for PDF/A-2."""
-    import pikepdf
-    from pikepdf import Name
-    
-    # Create ICC profile as stream
-    icc = pdf.make_stream(icc_bytes)
-    icc[Name("/N")] = 3  # RGB
-    icc[Name("/Alternate")] = Name("/DeviceRGB")
-    typer.secho(f"  Created ICC stream: {len(icc_bytes)} bytes", fg=typer.colors.BLUE)
-
-    # Create OutputIntent as dictionary
-    oi = pikepdf.Dictionary()
-    oi[Name("/Type")] = Name("/OutputIntent")
-    oi[Name("/S")] = Name("/GTS_PDFA2")  # PDF/A-2 standard (can also use /GTS_PDFA1)
-    oi[Name("/OutputConditionIdentifier")] = "sRGB IEC61966-2.1"
-    oi[Name("/Info")] = "sRGB IEC61966-2.1 ICC profile"
-    oi[Name("/DestOutputProfile")] = icc
-    
-    # Add OutputIntent to document root
-    pdf.Root[Name("/OutputIntents")] = [oi]
-    typer.secho(f"  OutputIntent added to document root", fg=typer.colors.BLUE)
-
-def _to_pdfa(path: Path):
-    """Converts PDF to archival PDF/A-2b format."""
-    if not PIKEPDF_AVAILABLE:
-        typer.secho("pikepdf not installed, skipping PDF/A conversion", fg=typer.colors.YELLOW)
-        return
-    
-    typer.secho("Converting to PDF/A-2b...", fg=typer.colors.BLUE)
-    
-    try:
-        icc_bytes = files("annex4ac").joinpath("resources/sRGB.icc").read_bytes()
-        typer.secho(f"  Loaded ICC profile: {len(icc_bytes)} bytes", fg=typer.colors.BLUE)
-    except Exception:
-        # Fallback to direct file access
-        icc_path = Path(__file__).parent / "resources" / "sRGB.icc"
-        if not icc_path.exists():
-            typer.secho(f"  ICC profile not found: {icc_path}", fg=typer.colors.RED)
-            return
-        icc_bytes = icc_path.read_bytes()
-        typer.secho(f"  Loaded ICC profile: {len(icc_bytes)} bytes", fg=typer.colors.BLUE)
+def _validation_entry(payload, rules, db_schema=None, exp_top_counts=None, explain=True,
+                      db_index=None, store=None) -> dict:
+    """Run the time-independent checks on ``payload``; the result is what gets cached.
 
+    ``rules`` is the ``(violations, warnings)`` pair from the rule engine.
+    ``last_updated`` is kept so the age check can be redone on every run.
+    """
+    denies, warns = rules
+    entry = {"violations": list(denies), "warnings": list(warns), "error": None, "last_updated": None}
     try:
-        with pikepdf.open(str(path), allow_overwriting_input=True) as pdf:
-            typer.secho(f"  Opened PDF: {len(pdf.pages)} pages", fg=typer.colors.BLUE)
-
-            # Add XMP metadata for PDF/A
-            with pdf.open_metadata() as meta:
-                meta['pdfaid:part'] = "2"
-                meta['pdfaid:conformance'] = "B"
-                meta['dc:title'] = 'Annex IV Technical Documentation'
-                meta['dc:subject'] = 'EU AI Act Compliance'
-                meta['dc:creator'] = ['Annex4AC']
-            typer.secho(f"  Added XMP metadata: pdfaid:part=2, pdfaid:conformance=B", fg=typer.colors.BLUE)
-
-            # Add basic document info
-            pdf.docinfo['/Title'] = 'Annex IV Technical Documentation'
-            pdf.docinfo['/Subject'] = 'EU AI Act Compliance'
-            pdf.docinfo['/Creator'] = 'Annex4AC'
-            typer.secho(f"  Added document info: Title, Subject, Creator", fg=typer.colors.BLUE)
-
-            # Embed OutputIntent with ICC profile
-            _embed_output_intent(pdf, icc_bytes)
-
-            # Save with PDF/A-2b compliance using new pikepdf 9+ approach
-            typer.secho(f"  Saving with PDF/A-2b compliance...", fg=typer.colors.BLUE)
-            pdf.save(
-                str(path),
-                preserve_pdfa=True,  # don't break PDF/A compliance
-                fix_metadata_version=True,  # fix PDFVersion in XMP if present
-                deterministic_id=True,  # reproducible /ID for same input
+        if db_schema is not None:
+            entry["violations"].extend(
+                _db_violations(payload, db_schema, exp_top_counts or {}, explain,
+                               index=db_index, store=store)
+            )
+        if not entry["violations"]:
+            last_updated = AnnexIVSchema(**payload).last_updated
+            entry["last_updated"] = (
+                last_updated.isoformat() if hasattr(last_updated, "isoformat") else str(last_updated)
             )
+    except (ValidationError, Exception) as exc:
+        entry["error"] = str(exc)
+    return entry
+
+def _validation_result(entry: dict, path="", stale_after=0, strict_age=False) -> dict:
+    """Turn a (possibly cached) validation entry into a result for ``path``."""
+    result = {"path": str(path), "violations": list(entry["violations"]),
+              "warnings": list(entry["warnings"]), "notes": [], "error": entry["error"]}
+    if result["violations"] or result["error"] or not stale_after or stale_after <= 0:
+        return result
+    try:
+        msg = _freshness_message(datetime.fromisoformat(entry["last_updated"]), max_days=stale_after)
+    except (TypeError, ValueError) as exc:
+        result["error"] = str(exc)
+        return result
+    if msg:
+        if strict_age:
+            result["error"] = msg
+        else:
+            result["notes"].append(msg)
+    return result
 
-        # Check result
-        file_size = path.stat().st_size
-        typer.secho(f"  File size after conversion: {file_size:,} bytes", fg=typer.colors.BLUE)
+def _error_result(path, exc) -> dict:
+    return {"path": str(path), "violations": [], "warnings": [], "notes": [], "error": str(exc)}
 
-        typer.secho(f"PDF/A-2b conversion completed: {path}", fg=typer.colors.GREEN)
+def _validate_document(payload, path="", stale_after=0, strict_age=False, high_risk_tags=None,
+                       **checks) -> dict:
+    """Validate an already-parsed spec without printing anything.
 
-    except Exception as e:
-        typer.secho(f"PDF/A conversion failed: {e}", fg=typer.colors.RED)
-        import traceback
-        typer.secho(f"Error details: {traceback.format_exc()}", fg=typer.colors.RED)
+    The result is a plain, picklable dict (``violations``, ``warnings``,
+    ``notes``, ``error``) so batch workers and the local server can hand it back
+    to a caller that owns console output and the exit code. ``checks`` are the
+    keyword arguments of :func:`_validation_entry`.
+    """
+    try:
+        rules = validate_payload(payload, high_risk_tags=high_risk_tags)
+    except Exception as exc:
+        return _error_result(path, exc)
+    entry = _validation_entry(payload, rules, **checks)
+    return _validation_result(entry, path, stale_after, strict_age)
+
+def _validate_file(path, store=None, cache_salt=None, stale_after=0, strict_age=False,
+                   high_risk_tags=None, locate=False, **checks) -> dict:
+    """Load ``path`` and validate it like :func:`_validate_document`.
+
+    With a ``store`` and the batch-wide ``cache_salt`` an unchanged file is
+    answered from the cache without being parsed. With ``locate`` the result
+    also carries the SARIF ``regions`` of its violations.
+    """
+    from .cache import digest
+    payload = None
+    try:
+        raw = Path(path).read_bytes()
+        key = digest(cache_salt, raw) if store is not None and cache_salt else None
+        entry = store.get_json(key) if key else None
+        if entry is None:
+            payload = _parse_yaml_rt(raw.decode("utf-8"))
+            rules = validate_payload(payload, high_risk_tags=high_risk_tags)
+    except Exception as exc:
+        return _error_result(path, exc)
+    if entry is None:
+        entry = _validation_entry(payload, rules, store=store, **checks)
+        if key:
+            store.put_json(key, entry)
+    result = _validation_result(entry, path, stale_after, strict_age)
+    if locate and result["violations"]:
+        from .sarif import key_positions, load_positions, regions
+        positions = key_positions(payload) if payload is not None else load_positions(path)
+        result["regions"] = regions(result["violations"], positions)
+    return result
+
+def _print_validation(result: dict, sarif: Optional[Path] = None, doc=None) -> bool:
+    """Print a :func:`_validate_document` result the way ``validate`` does; return ``True`` if it passed.
 
-def _default_tpl() -> str:
+    ``doc`` is the parsed spec, if at hand, so SARIF positions need no re-parse.
+    """
+    for w in result["warnings"]:
+        typer.secho(f"[WARNING] {w['rule']}: {w['msg']}", fg=typer.colors.YELLOW)
+    violations = result["violations"]
+    if sarif and violations:
+        _write_sarif(violations, sarif, result["path"], doc=doc)
+    if violations:
+        for v in violations:
+            typer.secho(f"[VALIDATION] {v['rule']}: {v['msg']}", fg=typer.colors.RED, err=True)
+        return False
+    if result["error"]:
+        typer.secho("Validation failed:\n" + result["error"], fg=typer.colors.RED, err=True)
+        return False
+    for note in result["notes"]:
+        typer.secho(f"[WARNING] {note}", fg=typer.colors.YELLOW)
+    typer.secho("Validation OK!", fg=typer.colors.GREEN)
+    return True
+
+def _report_validation(result: dict, sarif: Optional[Path] = None, doc=None):
+    """Print a validation result; exit 1 on failure."""
+    if not _print_validation(result, sarif, doc):
+        raise typer.Exit(1)
+
+def _watch_loop(path: Path, on_change):
+    """Run ``on_change(bytes)`` for ``path`` now and on every save until Ctrl-C."""
+    from .watch import watch
+    typer.secho(f"Watching {path} for changes (Ctrl-C to stop)...", fg=typer.colors.CYAN, err=True)
     try:
-        return files("annex4ac").joinpath("templates/template.html").read_text(encoding="utf-8")
-    except Exception:
-        # Fallback to direct file access
-        return Path(__file__).parent.joinpath("templates", "template.html").read_text(encoding="utf-8")
-
-def _render_html(data: dict, meta: dict) -> str:
-    """Render HTML from template with data."""
-    from datetime import datetime
-    from jinja2 import Environment, select_autoescape
-
-    # normalize strings
-    norm = {}
-    for k, v in data.items():
-        if isinstance(v, str):
-            # Fix text encoding issues
-            v = fix_text(v)
-            # Unescape \n and normalize line breaks
-            v = v.replace('\\r\\n', '\n').replace('\\r', '\n').replace('\\n', '\n')
-            # Restore logical line breaks for YAML flow scalars
-            v = re.sub(r'\s+(?=(?:[-•*]\s))', '\n', v)
-            v = re.sub(r'\s+(?=\([a-z]\)\s+)', '\n', v, flags=re.I)
-            norm[k] = v
-        else:
-            norm[k] = v
-    # Use passed metadata
-    meta_lines = [f"<p><strong>{label}:</strong> {meta[key]}</p>" for label, key in DOC_CTRL_FIELDS]
-    norm['__doc_control_html'] = '<section id="doc-control"><h2>Document control</h2>' + "\n".join(meta_lines) + "</section>"
-    
-    env = Environment(autoescape=select_autoescape(['html', 'xml']))
-    env.filters['listify'] = listify  # add filter
-    
-    template = env.from_string(_default_tpl())
-    html = template.render(**norm)
-    
-    # Insert block after the title but before the first section
-    title_end = html.find('</h1>')
-    if title_end != -1:
-        insert_pos = title_end + 6  # after </h1>
-        # Remove duplicate metadata from template
-        # Find and remove lines with "Generated:", "Schema Version:", "Retention Until:"
-        lines = html.split('\n')
-        filtered_lines = []
-        skip_next = False
-        for line in lines:
-            if any(skip in line for skip in ['<p><strong>Generated:</strong>', '<p><strong>Schema Version:</strong>', '<p><strong>Retention Until:</strong>']):
-                skip_next = True
-                continue
-            if skip_next and line.strip() == '':
-                skip_next = False
-                continue
-            if skip_next:
-                skip_next = False
-                continue
-            filtered_lines.append(line)
-        
-        html = '\n'.join(filtered_lines)
-        title_end = html.find('</h1>')
-        if title_end != -1:
-            insert_pos = title_end + 6
-            return html[:insert_pos] + norm['__doc_control_html'] + html[insert_pos:]
-    return norm['__doc_control_html'] + html
+        watch(path, on_change)
+    except KeyboardInterrupt:
+        typer.secho("Stopped watching.", err=True)
 
-def _check_freshness(dt, max_days=None, strict=False):
-    """Heuristic staleness check. max_days=None/<=0 disables it."""
-    if not max_days or max_days <= 0:
-        return
-    if datetime.now() - dt > timedelta(days=max_days):
-        msg = f"Technical doc is older than {max_days} days — consider updating (Art. 11 'techdoc must be kept up-to-date')."
-        if strict:
-            typer.secho(f"[ERROR] {msg}", fg=typer.colors.RED, err=True)
-            raise typer.Exit(1)
-        else:
-            typer.secho(f"[WARNING] {msg}", fg=typer.colors.YELLOW)
+def _render_settings() -> dict:
+    """Local render settings a ``/generate`` request carries, so the server's environment does not change the output."""
+    return {"docx_backend": _docx_backend(), "pdf_jobs": _pdf_section_jobs()}
+
+def _server_call(endpoint: str, body: dict):
+    """Send a request to a running ``annex4ac serve`` instance.
+
+    Returns ``(status, content_type, body)`` on success and ``None`` when no
+    server is running or it could not handle the request, in which case the
+    caller simply does the work locally.
+    """
+    from .server import try_remote
+    if endpoint == "/generate":
+        body = {**body, **_render_settings()}
+    res = try_remote(endpoint, body)
+    if res is None or res[0] != 200:
+        return None
+    return res
 
 def _validate_payload(payload):
     """Offline validation via pure Python rule engine.
 
     Returns ``(violations, warnings)`` so callers can append extra rules to
-    ``violations`` before writing SARIF once. Warnings are printed but also
-    returned for callers that need them.
+    ``violations`` before writing SARIF once. Nothing is printed; the caller
+    reports warnings together with the rest of the result.
     """
     denies, warns = validate_payload(payload)
-    violations = list(denies)
-    warnings = list(warns)
+    return list(denies), list(warns)
 
-    # Print warnings for limited/minimal risk systems
-    for w in warnings:
-        typer.secho(f"[WARNING] {w['rule']}: {w['msg']}", fg=typer.colors.YELLOW)
-
-    return violations, warnings
-
-# SARIF: template for passing region (line/col)
-def _write_sarif(violations, sarif_path, yaml_path):
-    # Use ruamel.yaml AST for precise coordinates
-    key_lines = {}
-    try:
-        from ruamel.yaml import YAML
-        yaml_ruamel = YAML(typ="rt")
-        with open(yaml_path, "r", encoding="utf-8") as f:
-            data = yaml_ruamel.load(f)
-        def find_key_coords(node, target):
-            if hasattr(node, 'lc') and hasattr(node, 'fa'):
-                for k in node:
-                    if k == target:
-                        ln = node.lc.key(k)[0] + 1
-                        col = node.lc.key(k)[1] + 1
-                        return (ln, col)
-                    v = node[k]
-                    if isinstance(v, dict):
-                        res = find_key_coords(v, target)
-                        if res:
-                            return res
-            return None
-        for v in violations:
-            key = v.get("rule", "").replace("_required", "")
-            coords = find_key_coords(data, key)
-            if coords:
-                key_lines[v["rule"]] = coords
-    except Exception:
-        pass
-    sarif = {
-        "version": "2.1.0",
-        "$schema": "https://schemastore.azurewebsites.net/schemas/json/sarif-2.1.0-rtm.5.json",
-        "runs": [
-            {
-                "tool": {
-                    "driver": {
-                        "name": "annex4ac/opa",
-                        "informationUri": "https://openpolicyagent.org/"
-                    }
-                },
-                "results": [
-                    {
-                        "level": "error",
-                        "ruleId": v["rule"],
-                        "message": {"text": v["msg"]},
-                        **({"properties": {"help": v["help"]}} if v.get("help") else {}),
-                        "locations": [
-                            {
-                                "physicalLocation": {
-                                    "artifactLocation": {"uri": yaml_path or "annex.yaml"},
-                                    "region": {
-                                        "startLine": key_lines.get(v["rule"], (1,1))[0],
-                                        "startColumn": key_lines.get(v["rule"], (1,1))[1]
-                                    }
-                                }
-                            }
-                        ]
-                    } for v in violations
-                ]
-            }
-        ]
-    }
-    with open(sarif_path, "w", encoding="utf-8") as f:
-        json.dump(sarif, f, ensure_ascii=False, indent=2)
+def _write_sarif(violations, sarif_path, yaml_path, doc=None):
+    """Write a SARIF report; ``doc`` is the already-parsed ruamel document, if any."""
+    from .sarif import write_sarif
+    write_sarif(violations, sarif_path, yaml_path, doc=doc)
 
 # JWT license check (Pro)
 def _check_license():
@@ -1018,6 +708,8 @@ def _check_license():
         typer.secho(f"License plan '{plan}' insufficient for PDF generation", fg=typer.colors.RED)
         raise typer.Exit(1)
 
+    return claims
+
 @app.command("update-annex3-cache")
 def update_annex3_cache():
     """Force-update cached Annex III high-risk tags."""
@@ -1045,7 +737,9 @@ def fetch_schema(
     import requests
     from shutil import copyfile
 
-    settings = Settings()
+    from platformdirs import user_cache_dir
+
+    settings = _settings()
     db_url = db_url or settings.db_url
     celex_id = celex_id or settings.celex_id or None
     source_preference = (source_preference.value if source_preference else settings.source_preference)
@@ -1071,9 +765,11 @@ def fetch_schema(
         if try_db_first:
             try:
                 with get_session(db_url) as ses:
-                    data = load_annex_iv_from_db(ses, celex_id=celex_id)
-                    schema_version = get_schema_version_from_db(ses, celex_id=celex_id)
-                    source_used = f"DB (version {schema_version})" if schema_version else "DB"
+                    snap = load_annex_snapshot(ses, celex_id=celex_id)
+                _warn_if_stale(snap)
+                data = dict(snap.sections)
+                schema_version = snap.version
+                source_used = f"DB (version {schema_version})" if schema_version else "DB"
             except Exception:
                 typer.secho(
                     "[DB] fallback to web (connection failed or CELEX not found)",
@@ -1109,6 +805,50 @@ def fetch_schema(
             typer.secho(f"Download error and no cache: {e}.", fg=typer.colors.RED)
             raise typer.Exit(1)
 
+def _watch_validate(input: Path, sarif: Optional[Path], stale_after: int, strict_age: bool,
+                    db_url: Optional[str], celex_id: Optional[str], explain: bool):
+    """``validate --watch``: load the DB snapshot once, then re-check on every save."""
+    from .watch import changed_keys, elapsed_ms
+
+    snap = index = None
+    if db_url:
+        try:
+            with get_session(db_url) as ses:
+                snap = load_annex_snapshot(ses, celex_id=celex_id)
+        except Exception as exc:
+            typer.secho(f"Failed to load Annex IV from DB: {exc}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(2)
+        _warn_if_stale(snap)
+        index = get_index(snap.sections, snap.version)
+    keys = [key for _, key in SECTION_MAPPING]
+    last = {"payload": None}
+
+    def on_change(data: bytes):
+        start = time.perf_counter()
+        try:
+            payload = _parse_yaml_rt(data.decode("utf-8"))
+            changed = changed_keys(last["payload"], payload, keys)
+            last["payload"] = payload
+            entry = _validation_entry(
+                payload,
+                _validate_payload(payload),
+                db_schema=snap.sections if snap else None,
+                exp_top_counts=snap.top_counts if snap else None,
+                explain=explain,
+                db_index=index,
+            )
+            result = _validation_result(entry, input, stale_after, strict_age)
+        except Exception as exc:
+            typer.secho("Validation failed:\n" + str(exc), fg=typer.colors.RED, err=True)
+            return
+        _print_validation(result, sarif, payload)
+        typer.secho(
+            f"[watch] {len(changed)} section(s) changed, checked in {elapsed_ms(start)} ms",
+            fg=typer.colors.CYAN, err=True,
+        )
+
+    _watch_loop(input, on_change)
+
 @app.command()
 def validate(
     input: Path = typer.Argument(..., exists=True, help="Your filled Annex IV YAML"),
@@ -1122,121 +862,736 @@ def validate(
         True,
         help="Show which subpoints are missing when using --use-db; use --no-explain to hide",
     ),
+    offline: bool = typer.Option(
+        False, help="Never touch the network; use cached or packaged Annex III tags (or set ANNEX4AC_OFFLINE=1)"
+    ),
+    cache: bool = typer.Option(
+        True, help="Reuse results for unchanged files/sections; use --no-cache to always re-check"
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None, help="Validation cache directory, may be shared by CI runners (or set ANNEX4AC_VALIDATE_CACHE)"
+    ),
+    watch: bool = typer.Option(False, "--watch", help="Keep running and re-validate on every save"),
 ):
     """Validate user YAML against required Annex IV keys; exit 1 on error."""
+    if offline:
+        os.environ["ANNEX4AC_OFFLINE"] = "1"
     if stale_after == 0:
         stale_after = int(os.getenv("ANNEX4AC_STALE_AFTER", "0"))
-    try:
-        settings = Settings()
+    if use_db:
+        # pydantic-settings is only needed for the DB cross-check.
+        settings = _settings()
         db_url = db_url or settings.db_url
         celex_id = celex_id or settings.celex_id or None
+    if use_db and not db_url:
+        typer.secho(
+            "--use-db requires a database URL. Set ANNEX4AC_DB_URL or pass --db-url.",
+            fg=typer.colors.RED,
+            err=True,
+        )
+        raise typer.Exit(2)
+
+    if watch:
+        _watch_validate(input, sarif, stale_after, strict_age, db_url if use_db else None,
+                        celex_id, explain)
+        return
+
+    # The server keeps no validation cache (so --no-cache holds there), but
+    # results meant for a given cache directory must be stored locally.
+    env_cache = os.getenv("ANNEX4AC_VALIDATE_CACHE", "").strip().lower()
+    shared_cache = cache and (cache_dir is not None or env_cache not in {"", "0", "false", "no", "off"})
+    remote = None if shared_cache else _server_call("/validate", {
+        "yaml": input.read_text(encoding="utf-8"),
+        "path": str(input),
+        "use_db": use_db,
+        "db_url": db_url,
+        "celex_id": celex_id,
+        "explain": explain,
+        "stale_after": stale_after,
+        "strict_age": strict_age,
+        "offline": offline,
+    })
+    if remote is not None:
+        _report_validation(json.loads(remote[2]), sarif)
+        return
 
-        from ruamel.yaml import YAML
-        yaml_ruamel = YAML(typ="rt")
-        with input.open("r", encoding="utf-8") as f:
-            payload = yaml_ruamel.load(f)
+    store = _validation_store(cache_dir, cache)
+    try:
+        raw = input.read_bytes()
+        snap = index = None
+        if use_db:
+            with get_session(db_url) as ses:
+                snap = load_annex_snapshot(ses, celex_id=celex_id)
+            _warn_if_stale(snap)
+            index = get_index(snap.sections, snap.version)
+
+        key = entry = payload = None
+        if store is not None:
+            from .cache import digest
+            from .policy.annex4ac_validate import get_high_risk_tags
+            key = digest(_validation_salt(get_high_risk_tags(), snap, index, explain), raw)
+            entry = store.get_json(key)
+        if entry is None:
+            payload = _parse_yaml_rt(raw.decode("utf-8"))
+            entry = _validation_entry(
+                payload,
+                _validate_payload(payload),
+                db_schema=snap.sections if snap else None,
+                exp_top_counts=snap.top_counts if snap else None,
+                explain=explain,
+                db_index=index,
+                store=store,
+            )
+            if key:
+                store.put_json(key, entry)
+        result = _validation_result(entry, input, stale_after, strict_age)
+    except (ValidationError, Exception) as exc:
+        typer.secho("Validation failed:\n" + str(exc), fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    _report_validation(result, sarif, payload)
 
-        violations, _warnings = _validate_payload(payload)
+@app.command("validate-batch")
+def validate_batch(
+    inputs: Optional[List[str]] = typer.Argument(None, help="YAML files or glob patterns (quote globs, e.g. 'specs/**/*.yaml')"),
+    files_from: Path = typer.Option(None, help="Read input paths from this file, one per line ('-' for stdin)"),
+    jobs: int = typer.Option(0, "--jobs", "-j", help="Worker processes (0 = number of CPUs)"),
+    stale_after: int = typer.Option(0, help="Warn if last_updated older than N days (0=off)", show_default=False),
+    strict_age: bool = typer.Option(False, help="Fail a file if stale_after is exceeded"),
+    use_db: bool = typer.Option(False, help="Cross-check sections against DB"),
+    db_url: str = typer.Option(None, help="SQLAlchemy DB URL (postgresql+psycopg://...)"),
+    celex_id: Optional[str] = typer.Option(None, help="CELEX id (optional)"),
+    explain: bool = typer.Option(
+        True,
+        help="Show which subpoints are missing when using --use-db; use --no-explain to hide",
+    ),
+    offline: bool = typer.Option(
+        False, help="Never touch the network; use cached or packaged Annex III tags (or set ANNEX4AC_OFFLINE=1)"
+    ),
+    cache: bool = typer.Option(
+        True, help="Reuse results for unchanged files/sections; use --no-cache to always re-check"
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None, help="Validation cache directory, may be shared by CI runners (or set ANNEX4AC_VALIDATE_CACHE)"
+    ),
+    sarif: Path = typer.Option(None, help="Write one SARIF report covering all files"),
+):
+    """Validate many YAML files in parallel; exit 1 if any file fails."""
+    from .batch import expand_inputs, run_validate_batch
+
+    paths = expand_inputs(inputs, files_from)
+    if not paths:
+        typer.secho("No input files given.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(2)
+    missing = [p for p in paths if not p.is_file()]
+    if missing:
+        for p in missing:
+            typer.secho(f"File not found: {p}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(2)
+    if offline:
+        os.environ["ANNEX4AC_OFFLINE"] = "1"  # inherited by the worker processes
+    if stale_after == 0:
+        stale_after = int(os.getenv("ANNEX4AC_STALE_AFTER", "0"))
 
-        if use_db and not db_url:
+    opts = {"explain": explain, "stale_after": stale_after, "strict_age": strict_age}
+    if use_db:
+        settings = _settings()
+        db_url = db_url or settings.db_url
+        celex_id = celex_id or settings.celex_id or None
+        if not db_url:
             typer.secho(
                 "--use-db requires a database URL. Set ANNEX4AC_DB_URL or pass --db-url.",
                 fg=typer.colors.RED,
                 err=True,
             )
             raise typer.Exit(2)
-
-        if use_db and db_url:
+        # One snapshot for the whole batch; workers never talk to the DB.
+        try:
             with get_session(db_url) as ses:
-                db_schema = load_annex_iv_from_db(ses, celex_id=celex_id)
-                exp_top_counts = get_expected_top_counts(ses, celex_id=celex_id)
-            for _, key in SECTION_MAPPING:
-                db_text = (db_schema.get(key) or "").strip()
-                user_text = str(payload.get(key) or "").strip()
-                if not db_text:
-                    continue
-                if not user_text:
-                    violations.append({
-                        "rule": f"{key}_required",
-                        "msg": f"Annex IV requires content for '{key}' (per DB snapshot).",
-                    })
-                    continue
-                exp_top = exp_top_counts.get(key, 0)
-                exp_sub = _count_subpoints_db(db_text)[1]
-                got_top, got_sub = _count_subpoints_user(user_text)
-                expected_letters = _extract_letters(db_text)
-                user_letters = _extract_letters(user_text)
-                missing_letters = sorted(set(expected_letters) - set(user_letters))
-                if exp_top >= 2 and got_top < exp_top:
-                    msg = f"{key}: expected ≥{exp_top} top-level subpoints, got {got_top}."
-                    if explain and missing_letters:
-                        msg += "\nMissing: " + ", ".join(f"({l})" for l in missing_letters) + "."
-                    violation = {
-                        "rule": f"{key}_subpoints_insufficient",
-                        "msg": msg,
-                    }
-                    if missing_letters:
-                        violation["help"] = "Missing subpoints: " + ", ".join(
-                            f"({l})" for l in missing_letters
-                        )
-                    violations.append(violation)
-                if exp_sub >= 2 and got_sub < exp_sub:
-                    violations.append({
-                        "rule": f"{key}_subsub_insufficient",
-                        "msg": f"{key}: first subpoint expected ≥{exp_sub} nested items, got {got_sub}.",
-                    })
-
-        if sarif and violations:
-            _write_sarif(violations, sarif, str(input))
-
-        if violations:
-            for v in violations:
-                typer.secho(f"[VALIDATION] {v['rule']}: {v['msg']}", fg=typer.colors.RED, err=True)
-            raise typer.Exit(1)
+                snap = load_annex_snapshot(ses, celex_id=celex_id)
+            opts["db_schema"] = dict(snap.sections)
+            opts["exp_top_counts"] = dict(snap.top_counts)
+            # Parsed once here (or read from the structure cache); workers
+            # compare against it without touching the DB text again.
+            opts["db_index"] = get_index(snap.sections, snap.version)
+        except Exception as exc:
+            typer.secho(f"Failed to load Annex IV from DB: {exc}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(2)
+        _warn_if_stale(snap)
+
+    store = _validation_store(cache_dir, cache)
+    if store is not None:
+        # Resolved once so every worker checks (and keys results) against the same tags.
+        from .policy.annex4ac_validate import get_high_risk_tags
+        opts["high_risk_tags"] = get_high_risk_tags()
+        opts["store"] = store
+        opts["cache_salt"] = _validation_salt(
+            opts["high_risk_tags"], snap if use_db else None, opts.get("db_index"), explain
+        )
 
-        model = AnnexIVSchema(**payload)
-        _check_freshness(model.last_updated, max_days=stale_after, strict=strict_age)
-    except (ValidationError, Exception) as exc:
-        typer.secho("Validation failed:\n" + str(exc), fg=typer.colors.RED, err=True)
+    writer = None
+    if sarif:
+        from .sarif import SarifWriter
+        opts["locate"] = True
+        writer = SarifWriter(sarif)
+
+    failed = 0
+    try:
+        for res in run_validate_batch(paths, opts, jobs=jobs):
+            path = res["path"]
+            for w in res["warnings"]:
+                typer.secho(f"[WARNING] {path}: {w['rule']}: {w['msg']}", fg=typer.colors.YELLOW)
+            for note in res["notes"]:
+                typer.secho(f"[WARNING] {path}: {note}", fg=typer.colors.YELLOW)
+            if writer and res["violations"]:
+                writer.add_violations(res["violations"], path, res.get("regions"))
+            if res["violations"] or res["error"]:
+                failed += 1
+                typer.secho(f"[FAIL] {path}", fg=typer.colors.RED, err=True)
+                for v in res["violations"]:
+                    typer.secho(f"  [VALIDATION] {v['rule']}: {v['msg']}", fg=typer.colors.RED, err=True)
+                if res["error"]:
+                    typer.secho("  Validation failed:\n  " + res["error"], fg=typer.colors.RED, err=True)
+            else:
+                typer.secho(f"[OK] {path}", fg=typer.colors.GREEN)
+    finally:
+        if writer:
+            writer.close()
+
+    total = len(paths)
+    colour = typer.colors.RED if failed else typer.colors.GREEN
+    typer.secho(f"{total} file(s) validated: {total - failed} passed, {failed} failed.", fg=colour)
+    if failed:
         raise typer.Exit(1)
-    typer.secho("Validation OK!", fg=typer.colors.GREEN)
 
-@app.command()
-def generate(
-    input: Path = typer.Argument(..., help="YAML input file"),
-    output: Path = typer.Option(None, help="Output file name"),
-    fmt: str = typer.Option("pdf", help="pdf | html | docx"),
-    pdfa: bool = typer.Option(False, help="Convert PDF to PDF/A-2b format for archival")
+@app.command("sarif-merge")
+def sarif_merge(
+    inputs: List[str] = typer.Argument(..., help="SARIF files or glob patterns (quote globs, e.g. 'shards/*.sarif')"),
+    output: Path = typer.Option(..., "--output", "-o", help="Merged SARIF file"),
 ):
-    """Generate output from YAML: PDF (default), HTML, or DOCX."""
-    payload = yaml.safe_load(input.read_text(encoding='utf-8'))
+    """Merge per-shard SARIF logs into one, streaming (one run per tool)."""
+    from .batch import expand_inputs
+    from .sarif import merge_sarif
+
+    paths = [p for p in expand_inputs(inputs) if p.resolve() != output.resolve()]
+    missing = [p for p in paths if not p.is_file()]
+    if not paths or missing:
+        for p in missing:
+            typer.secho(f"File not found: {p}", fg=typer.colors.RED, err=True)
+        if not paths:
+            typer.secho("No input files given.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(2)
+    try:
+        n_files, n_results = merge_sarif(paths, output)
+    except (ValueError, OSError) as exc:
+        typer.secho(f"SARIF merge failed: {exc}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    typer.secho(f"Merged {n_results} result(s) from {n_files} file(s) into {output}", fg=typer.colors.GREEN)
 
-    # Build unified metadata for all formats (includes retention calculation)
-    meta = _build_doc_meta(payload)
+OUTPUT_FORMATS = ("pdf", "html", "docx")
+DOCX_BACKENDS = ("python-docx", "stream")
 
-    # Automatically determine output filename
-    if output is None:
-        output = input.with_suffix(f".{fmt}")
+def _docx_backend() -> str:
+    """DOCX backend from ``ANNEX4AC_DOCX_BACKEND``: ``python-docx`` (default) or ``stream``."""
+    backend = (os.getenv("ANNEX4AC_DOCX_BACKEND") or DOCX_BACKENDS[0]).strip().lower()
+    if backend not in DOCX_BACKENDS:
+        raise ValueError(f"Unknown ANNEX4AC_DOCX_BACKEND: {backend} (expected {' | '.join(DOCX_BACKENDS)})")
+    return backend
 
-    # License check for Pro features (PDF requires license)
+def _pdf_section_jobs() -> int:
+    """Worker processes for the section-per-page PDF layout from ``ANNEX4AC_PDF_JOBS``.
+
+    0 keeps the default flowing layout; ``auto`` means one per CPU. Inside a
+    pool worker (``generate-batch``, several formats) the section-per-page
+    layout is still used but built serially, since those processes cannot
+    start a pool of their own.
+    """
+    value = os.getenv("ANNEX4AC_PDF_JOBS", "").strip().lower()
+    if not value:
+        return 0
+    jobs = _parse_pdf_jobs(value)
+    return jobs if jobs > 1 else 0
+
+@lru_cache(maxsize=None)
+def _parse_pdf_jobs(value: str) -> int:
+    """``ANNEX4AC_PDF_JOBS`` as a number; warns once and returns 0 (serial) for anything else."""
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return int(value)
+    except ValueError:
+        typer.secho(f"[WARNING] Ignoring ANNEX4AC_PDF_JOBS={value!r} (expected a number or 'auto'); "
+                    "laying the PDF out serially.", fg=typer.colors.YELLOW, err=True)
+        return 0
+
+
+def _unshare(path: Path):
+    """Remove ``path`` if it is a hard link (e.g. into the render cache) so writing it cannot alter the other copy."""
+    try:
+        if path.stat().st_nlink > 1:
+            path.unlink()
+    except OSError:
+        pass
+
+def _render_store(root: Optional[Path] = None, enabled: Optional[bool] = None):
+    """Return the rendered-output store, or ``None`` when render caching is off.
+
+    Off unless ``--cache``/``--cache-dir`` is given or ``ANNEX4AC_RENDER_CACHE``
+    is set (to ``1`` or a directory, which may be shared by CI runners). The
+    size bound is ``ANNEX4AC_RENDER_CACHE_MB``. Outputs are copied out of the
+    store unless ``ANNEX4AC_RENDER_CACHE_LINK=1`` asks for hard links.
+    """
+    from .cache import ContentStore, cache_dir
+    env = os.getenv("ANNEX4AC_RENDER_CACHE", "").strip()
+    env_on = bool(env) and env.lower() not in {"0", "false", "no", "off"}
+    if enabled is None:
+        enabled = env_on or root is not None
+    if not enabled:
+        return None
+    if root is None and env_on and env.lower() not in {"1", "true", "yes", "on"}:
+        root = Path(env)
+    max_mb = _env_int("ANNEX4AC_RENDER_CACHE_MB", 1024)
+    hardlink = os.getenv("ANNEX4AC_RENDER_CACHE_LINK", "").strip().lower() in {"1", "true", "yes", "on"}
+    try:
+        return ContentStore(root or cache_dir("renders"), max_bytes=max_mb * 2**20, hardlink=hardlink)
+    except OSError:
+        return None
+
+@lru_cache(maxsize=8)
+def _render_assets_digest(fmt: str, pdfa: bool) -> str:
+    """Digest of the packaged files an output depends on: template, fonts, ICC profile."""
+    from importlib.metadata import version, PackageNotFoundError
+    from importlib.resources import files
+    from .cache import digest
+    try:
+        ver = version("annex4ac")
+    except PackageNotFoundError:
+        ver = "unknown"
+    pkg = files("annex4ac")
     if fmt == "pdf":
-        _check_license()
-        _render_pdf(payload, output, meta)
-        if pdfa:
-            _to_pdfa(output)
-        typer.secho(f"PDF generated: {output}", fg=typer.colors.GREEN)
+        assets = ["fonts/LiberationSans-Regular.ttf", "fonts/LiberationSans-Bold.ttf"]
+        assets += ["resources/sRGB.icc"] if pdfa else []
     elif fmt == "html":
-        # HTML is free
-        html_content = _render_html(payload, meta)
-        output.write_text(html_content, encoding='utf-8')
-        typer.secho(f"HTML generated: {output}", fg=typer.colors.GREEN)
+        assets = ["templates/template.html"]
+    else:
+        assets = []
+    parts = []
+    for name in assets:
+        try:
+            parts.append(pkg.joinpath(name).read_bytes())
+        except OSError:
+            parts.append(None)
+    return digest("render-assets", ver, fmt, "pdfa" if pdfa else "", *parts)
+
+def _render_key(document, meta: dict, fmt: str, pdfa: bool = False,
+                template: Optional[Path] = None, docx_template: Optional[Path] = None) -> str:
+    """Cache key of one rendered output: normalised content, format and assets.
+
+    The generation date is left out on purpose: a cache hit hands back the
+    file from the render that first produced it, generation date included.
+    """
+    from .cache import digest
+    stable_meta = {k: v for k, v in meta.items() if k != "generation_date"}
+    custom = backend = None
+    if fmt == "pdf" and _pdf_section_jobs():
+        backend = "sections"   # section-per-page: a different layout
+    elif template and fmt == "html":
+        custom = Path(template).read_bytes()
     elif fmt == "docx":
-        # DOCX is free
-        render_docx(payload, output, meta)
-        typer.secho(f"DOCX generated: {output}", fg=typer.colors.GREEN)
+        custom = Path(docx_template).read_bytes() if docx_template else None
+        backend = _docx_backend()
+    return digest(
+        "render", _render_assets_digest(fmt, bool(pdfa and fmt == "pdf")), custom, backend,
+        json.dumps(document.to_dict(), sort_keys=True, ensure_ascii=False, default=str),
+        json.dumps(stable_meta, sort_keys=True, ensure_ascii=False, default=str),
+    )
+
+def _render_cached(document, meta: dict, fmt: str, output: Path, store, pdfa: bool = False,
+                   icc_bytes: Optional[bytes] = None, verbose: bool = True,
+                   template: Optional[Path] = None,
+                   docx_template: Optional[Path] = None) -> Tuple[bool, bool]:
+    """Like :func:`_render_format` for a file, reusing ``store`` entries. Returns ``(ok, cached)``.
+
+    The output is rendered next to ``output`` and moved into place, so a path
+    that is still hard-linked to an older cache entry
+    (``ANNEX4AC_RENDER_CACHE_LINK``) is never written through.
+    """
+    key = _render_key(document, meta, fmt, pdfa, template, docx_template)
+    if store.link_into(key, output):
+        return True, True
+    tmp = output.with_name(f".{output.name}.{os.getpid()}.render")
+    try:
+        ok = _render_format(document, meta, fmt, tmp, pdfa=pdfa, icc_bytes=icc_bytes,
+                            verbose=verbose, template=template, docx_template=docx_template)
+        if ok:  # never cache the plain-PDF fallback of a failed PDF/A conversion
+            store.put_file(key, tmp)
+        os.replace(tmp, output)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return ok, False
+
+def _render_format(payload: dict, meta: dict, fmt: str, output, pdfa: bool = False,
+                   icc_bytes: Optional[bytes] = None, verbose: bool = True,
+                   template: Optional[Path] = None, docx_template: Optional[Path] = None,
+                   docx_backend: Optional[str] = None, pdf_jobs: Optional[int] = None) -> bool:
+    """Render one output format. The caller is responsible for the PDF licence check.
+
+    ``payload`` is a parsed spec or an already built :class:`~annex4ac.document.Document`.
+    ``output`` is a path or a writable binary stream (``--output -``).
+    ``template`` is a custom HTML template (``--template``), ``docx_template``
+    a .docx the DOCX output starts from (``--docx-template``).
+    ``docx_backend`` and ``pdf_jobs`` override ``ANNEX4AC_DOCX_BACKEND`` and
+    ``ANNEX4AC_PDF_JOBS`` (the server renders with the client's settings).
+    Returns ``False`` only when the optional PDF/A conversion did not succeed.
+    """
+    if isinstance(output, Path):
+        _unshare(output)
+    if docx_backend is None:
+        docx_backend = _docx_backend()
+    if fmt == "pdf":
+        from .pdf_generator import _write_pdf
+        return _write_pdf(payload, meta, output, pdfa=pdfa, icc_bytes=icc_bytes, verbose=verbose,
+                          jobs=_pdf_section_jobs() if pdf_jobs is None else pdf_jobs)
+    elif fmt == "html":
+        from .html_generator import _write_html
+        _write_html(payload, meta, output, template)
+    elif fmt == "docx" and docx_backend == "stream":
+        from .docx_stream import write_docx
+        write_docx(payload, output, meta, docx_template)
+    elif fmt == "docx":
+        from .docx_generator import render_docx
+        render_docx(payload, output, meta, docx_template)
     else:
         raise ValueError(f"Unknown format: {fmt}")
+    return True
+
+def _watch_generate(input: Path, targets: List[Tuple[str, Path]], pdfa: bool,
+                    template: Optional[Path] = None, docx_template: Optional[Path] = None):
+    """``generate --watch``: re-render every target whenever the spec's content changes.
+
+    Unchanged sections come out of the renderers' per-section caches; a save
+    that does not change the parsed document (comments, formatting) is skipped.
+    """
+    import yaml
+    from .watch import changed_keys, elapsed_ms
 
+    icc_bytes = None
+    if pdfa and any(fmt == "pdf" for fmt, _ in targets):
+        from .pdf_generator import _load_icc_bytes
+        icc_bytes = _load_icc_bytes()
+    last = {"payload": None}
+
+    def on_change(data: bytes):
+        start = time.perf_counter()
+        try:
+            payload = yaml.safe_load(data.decode("utf-8"))
+            if not isinstance(payload, dict):
+                raise ValueError("YAML root must be a mapping")
+            changed = changed_keys(last["payload"], payload, set(payload) | set(last["payload"] or ()))
+            if not changed:
+                return
+            meta = _build_doc_meta(payload)
+            failed_pdfa = [output for fmt, output in targets
+                           if not _render_format(payload, meta, fmt, output, pdfa=pdfa,
+                                                 icc_bytes=icc_bytes, verbose=False, template=template,
+                                                 docx_template=docx_template)]
+            last["payload"] = payload
+        except Exception as exc:
+            typer.secho(f"Generation failed: {exc}", fg=typer.colors.RED, err=True)
+            return
+        for output in failed_pdfa:
+            _warn_pdfa_failed(output)
+        for fmt, output in targets:
+            typer.secho(
+                f"{fmt.upper()} generated: {output} ({len(changed)} field(s) changed, {elapsed_ms(start)} ms)",
+                fg=typer.colors.GREEN,
+            )
+
+    _watch_loop(input, on_change)
+
+def _warn_pdfa_failed(output, err: bool = False):
+    typer.secho(f"[WARNING] PDF/A conversion failed for {output}", fg=typer.colors.YELLOW, err=err)
+
+def _generate_formats(payload: dict, targets: List[Tuple[str, Path]], pdfa: bool, jobs: int,
+                      store=None, template: Optional[Path] = None,
+                      docx_template: Optional[Path] = None):
+    """Render one document into several formats concurrently (``generate --fmt pdf,html``).
+
+    With a render ``store``, outputs whose inputs are unchanged are linked
+    from the cache instead of being rendered.
+    """
+    from .batch import run_render_formats
+    from .document import build_document
+
+    # Normalise once into the shared document model; every worker renders it.
+    document = build_document(payload)
+    icc_bytes = None
+    if pdfa and any(fmt == "pdf" for fmt, _ in targets):
+        from .pdf_generator import _load_icc_bytes
+        icc_bytes = _load_icc_bytes()
+    opts = {"payload": document, "meta": _build_doc_meta(payload), "pdfa": pdfa,
+            "icc_bytes": icc_bytes, "store": store, "template": template,
+            "docx_template": docx_template}
+
+    failed = 0
+    for fmt, output, ok, cached, err in run_render_formats(targets, opts, jobs=jobs):
+        if err:
+            failed += 1
+            typer.secho(f"{fmt.upper()} generation failed: {err}", fg=typer.colors.RED, err=True)
+            continue
+        if not ok:
+            _warn_pdfa_failed(output)
+        typer.secho(f"{fmt.upper()} generated: {output}{' (cached)' if cached else ''}", fg=typer.colors.GREEN)
+    if failed:
+        raise typer.Exit(1)
+
+@app.command()
+def generate(
+    input: Path = typer.Argument(..., help="YAML input file"),
+    output: Path = typer.Option(None, help="Output file name ('-' writes to stdout); with several formats each gets its own suffix"),
+    fmt: str = typer.Option("pdf", help="pdf | html | docx, or several comma-separated (pdf,html,docx)"),
+    pdfa: bool = typer.Option(False, help="Convert PDF to PDF/A-2b format for archival"),
+    watch: bool = typer.Option(False, "--watch", help="Keep running and re-render on every save"),
+    jobs: int = typer.Option(0, "--jobs", "-j", help="Worker processes for several formats (0 = one per format)"),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache",
+        help="Reuse outputs rendered earlier from identical content (or set ANNEX4AC_RENDER_CACHE=1)",
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None, help="Render cache directory, may be shared by CI runners (implies --cache)"
+    ),
+    template: Optional[Path] = typer.Option(
+        None, exists=True, dir_okay=False, help="Custom Jinja template for HTML output"
+    ),
+    docx_template: Optional[Path] = typer.Option(
+        None, exists=True, dir_okay=False, help="Corporate .docx whose styles and page setup DOCX output starts from"
+    ),
+):
+    """Generate output from YAML: PDF (default), HTML, or DOCX."""
+    import yaml
+
+    fmts = _parse_formats(fmt)
+    if template is not None and "html" not in fmts:
+        raise typer.BadParameter("--template only applies to HTML output")
+    if docx_template is not None and ("docx" not in fmts or docx_template.suffix.lower() != ".docx"):
+        raise typer.BadParameter("--docx-template takes a .docx file and only applies to DOCX output")
+    to_stdout = output is not None and str(output) == "-"
+    if to_stdout and watch:
+        raise typer.BadParameter("--watch needs an output file, not '-'")
+    if to_stdout and len(fmts) > 1:
+        raise typer.BadParameter("Only one format can be written to stdout")
+    # Automatically determine output filename(s)
+    if len(fmts) > 1:
+        base = output or input
+        targets = [(f, base.with_suffix(f".{f}")) for f in fmts]
+    else:
+        targets = [(fmts[0], output or input.with_suffix(f".{fmts[0]}"))]
+
+    # License check for Pro features (PDF requires license)
+    if "pdf" in fmts:
+        _check_license()
+    if watch:
+        _watch_generate(input, targets, pdfa, template, docx_template)
+        return
+
+    text = input.read_text(encoding='utf-8')
+    payload = yaml.safe_load(text)
+    store = None if to_stdout else _render_store(cache_dir, cache)
+    custom = template is not None or docx_template is not None
+    if store is not None or (custom and not to_stdout):
+        # Cache hits and custom templates are handled locally, without a running server.
+        _generate_formats(payload, targets, pdfa, jobs, store, template, docx_template)
+        return
+    if len(fmts) > 1:
+        remote = _server_call("/generate", {"yaml": text, "fmt": fmts[0], "pdfa": pdfa})
+        if remote is None:
+            _generate_formats(payload, targets, pdfa, jobs)
+            return
+        # A running server keeps every renderer warm; it renders the other formats too.
+        meta = None
+        for f, out in targets:
+            if f != fmts[0]:
+                remote = _server_call("/generate", {"yaml": text, "fmt": f, "pdfa": pdfa})
+            if remote is not None:
+                _unshare(out)
+                out.write_bytes(remote[2])
+            else:
+                meta = meta or _build_doc_meta(payload)
+                if not _render_format(payload, meta, f, out, pdfa=pdfa):
+                    _warn_pdfa_failed(out)
+            typer.secho(f"{f.upper()} generated: {out}", fg=typer.colors.GREEN)
+        return
+
+    fmt, output = targets[0]
+    remote = None if custom else _server_call("/generate", {"yaml": text, "fmt": fmt, "pdfa": pdfa})
+    if to_stdout:
+        # The document goes to stdout; every message goes to stderr.
+        sink = sys.stdout.buffer
+        if remote is not None:
+            sink.write(remote[2])
+        else:
+            if not _render_format(payload, _build_doc_meta(payload), fmt, sink, pdfa=pdfa,
+                                  template=template, docx_template=docx_template):
+                _warn_pdfa_failed("-", err=True)
+        sink.flush()
+        typer.secho(f"{fmt.upper()} generated: -", fg=typer.colors.GREEN, err=True)
+        return
+    if remote is not None:
+        _unshare(output)
+        output.write_bytes(remote[2])
+    else:
+        # Build unified metadata for all formats (includes retention calculation)
+        meta = _build_doc_meta(payload)
+        if not _render_format(payload, meta, fmt, output, pdfa=pdfa):
+            _warn_pdfa_failed(output)
+    typer.secho(f"{fmt.upper()} generated: {output}", fg=typer.colors.GREEN)
+
+
+def _parse_formats(value: str) -> List[str]:
+    """Split a ``pdf,html`` style option into a de-duplicated format list."""
+    fmts = []
+    for part in (value or "").split(","):
+        part = part.strip().lower()
+        if not part or part in fmts:
+            continue
+        if part not in OUTPUT_FORMATS:
+            raise typer.BadParameter(f"Unknown format: {part} (expected {' | '.join(OUTPUT_FORMATS)})")
+        fmts.append(part)
+    if not fmts:
+        raise typer.BadParameter("At least one output format is required")
+    return fmts
+
+@app.command("generate-batch")
+def generate_batch(
+    inputs: Optional[List[str]] = typer.Argument(None, help="YAML files or glob patterns (quote globs, e.g. 'specs/**/*.yaml')"),
+    files_from: Path = typer.Option(None, help="Read input paths from this file, one per line ('-' for stdin)"),
+    fmt: str = typer.Option("pdf", help="Comma-separated formats: pdf,html,docx"),
+    output_dir: Path = typer.Option(None, help="Write outputs here (default: next to each input)"),
+    jobs: int = typer.Option(0, "--jobs", "-j", help="Worker processes (0 = number of CPUs)"),
+    max_tasks_per_worker: int = typer.Option(0, help="Replace a worker after N documents (0 = never)"),
+    max_rss_mb: int = typer.Option(0, help="Replace a worker once its resident memory exceeds N MiB (0 = no limit)"),
+    pdfa: bool = typer.Option(False, help="Convert PDF to PDF/A-2b format for archival"),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache",
+        help="Reuse outputs rendered earlier from identical content (or set ANNEX4AC_RENDER_CACHE=1)",
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None, help="Render cache directory, may be shared by CI runners (implies --cache)"
+    ),
+    template: Optional[Path] = typer.Option(
+        None, exists=True, dir_okay=False, help="Custom Jinja template for HTML output"
+    ),
+    docx_template: Optional[Path] = typer.Option(
+        None, exists=True, dir_okay=False, help="Corporate .docx whose styles and page setup DOCX output starts from"
+    ),
+):
+    """Generate PDF/HTML/DOCX for many YAML files over a bounded process pool."""
+    from .batch import expand_inputs, batch_output_path, run_generate_batch
+
+    fmts = _parse_formats(fmt)
+    if docx_template is not None and docx_template.suffix.lower() != ".docx":
+        raise typer.BadParameter("--docx-template takes a .docx file")
+    paths = expand_inputs(inputs, files_from)
+    if not paths:
+        typer.secho("No input files given.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(2)
+    missing = [p for p in paths if not p.is_file()]
+    if missing:
+        for p in missing:
+            typer.secho(f"File not found: {p}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(2)
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        targets = {}
+        for p in paths:
+            out = batch_output_path(p, fmts[0], output_dir)
+            if out in targets:
+                typer.secho(f"Output name clash in {output_dir}: {targets[out]} and {p}", fg=typer.colors.RED, err=True)
+                raise typer.Exit(2)
+            targets[out] = p
+
+    # Checked once here; workers receive the verified claims instead of the token.
+    claims = _check_license() if "pdf" in fmts else None
+    pdfa = pdfa and "pdf" in fmts
+    icc_bytes = None
+    if pdfa:
+        from .pdf_generator import _load_icc_bytes
+        icc_bytes = _load_icc_bytes()
+    opts = {
+        "fmts": fmts,
+        "output_dir": str(output_dir) if output_dir else None,
+        "pdfa": pdfa,
+        "claims": claims,
+        "icc_bytes": icc_bytes,
+        "store": _render_store(cache_dir, cache),
+        "template": str(template.resolve()) if template else None,
+        "docx_template": str(docx_template.resolve()) if docx_template else None,
+    }
+
+    failed = cached = 0
+    for res in run_generate_batch(paths, opts, jobs=jobs,
+                                  max_tasks_per_worker=max_tasks_per_worker,
+                                  max_rss_mb=max_rss_mb):
+        for w in res["warnings"]:
+            typer.secho(f"[WARNING] {res['path']}: {w}", fg=typer.colors.YELLOW)
+        if res["error"]:
+            failed += 1
+            typer.secho(f"[FAIL] {res['path']}: {res['error']}", fg=typer.colors.RED, err=True)
+        else:
+            cached += res.get("cached", 0)
+            typer.secho(f"[OK] {res['path']} -> {', '.join(res['outputs'])}", fg=typer.colors.GREEN)
+
+    total = len(paths)
+    colour = typer.colors.RED if failed else typer.colors.GREEN
+    reused = f" ({cached} output(s) reused from cache)" if opts["store"] is not None else ""
+    typer.secho(f"{total} file(s) processed: {total - failed} generated, {failed} failed.{reused}", fg=colour)
+    if failed:
+        raise typer.Exit(1)
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Interface to bind (loopback unless --allow-remote)"),
+    port: int = typer.Option(8765, help="TCP port"),
+    socket_path: Optional[Path] = typer.Option(None, "--socket", help="Listen on this unix socket instead of TCP"),
+    db_url: str = typer.Option(None, help="Preload the Annex IV snapshot from this DB"),
+    celex_id: Optional[str] = typer.Option(None, help="CELEX id (optional)"),
+    offline: bool = typer.Option(
+        False, help="Never touch the network; use cached or packaged Annex III tags (or set ANNEX4AC_OFFLINE=1)"
+    ),
+    quiet: bool = typer.Option(False, help="Do not log requests"),
+    allow_remote: bool = typer.Option(
+        False, "--allow-remote", help="Allow --host to be a non-loopback interface (requests still need the token)"
+    ),
+):
+    """Run a local server that keeps schema, fonts, templates and licence warm.
+
+    While it runs, ``validate`` and ``generate`` send their work to it
+    automatically (set ANNEX4AC_NO_SERVER=1 to opt out).
+    """
+    from .server import ServerState, make_server, serve_forever
+
+    if offline:
+        os.environ["ANNEX4AC_OFFLINE"] = "1"
+    settings = _settings()
+    db_url = db_url or settings.db_url
+    celex_id = celex_id or settings.celex_id or None
+    state = ServerState(db_url=db_url, celex_id=celex_id, offline=offline)
+    try:
+        srv = make_server(state, host=host, port=port,
+                          socket_path=str(socket_path) if socket_path else None, quiet=quiet,
+                          allow_remote=allow_remote)
+    except ValueError as exc:
+        raise typer.BadParameter(f"{exc}; pass --allow-remote to do so", param_hint="--host")
+    try:
+        state.warm(log=lambda msg: typer.secho(msg, fg=typer.colors.GREEN))
+    except Exception as exc:
+        srv.server_close()
+        if socket_path:
+            socket_path.unlink(missing_ok=True)
+        typer.secho(f"Failed to warm up: {exc}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(2)
+    typer.secho(f"Serving on {srv.address} (Ctrl+C to stop)", fg=typer.colors.GREEN)
+    serve_forever(srv)
 
 
 if __name__ == "__main__":
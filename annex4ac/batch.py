@@ -0,0 +1,372 @@
+"""
+batch.py
+
+Process-pool helpers for ``validate-batch``, ``generate-batch`` and multi-format
+``generate``.
+
+The parent process does all one-off work (DB snapshot, licence check, ICC
+profile) and hands the results to every worker through the pool initializer,
+so each file only costs a YAML parse plus the actual validation or rendering.
+"""
+
+import os
+import sys
+import glob
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Per-worker state set by the pool initializers.
+_VALIDATE_OPTS: dict = {}
+_GENERATE_OPTS: dict = {}
+_RENDER_OPTS: dict = {}
+
+
+def expand_inputs(patterns: Iterable[str], files_from: Optional[Path] = None) -> List[Path]:
+    """Expand globs and ``--files-from`` entries into an ordered, de-duplicated path list."""
+    raw = list(patterns or [])
+    if files_from is not None:
+        if str(files_from) == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(files_from).read_text(encoding="utf-8").splitlines()
+        raw.extend(ln.strip() for ln in lines if ln.strip() and not ln.lstrip().startswith("#"))
+
+    out: List[Path] = []
+    seen = set()
+    for item in raw:
+        if glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+        else:
+            matches = [item]
+        for m in matches:
+            p = Path(m)
+            key = os.path.normpath(str(p))
+            if key in seen:
+                continue
+            seen.add(key)
+            out.append(p)
+    return out
+
+
+def _init_validate_worker(opts: dict):
+    global _VALIDATE_OPTS
+    _VALIDATE_OPTS = opts
+
+
+def _validate_one(path: str) -> dict:
+    from .annex4ac import _validate_file
+    return _validate_file(path, **_VALIDATE_OPTS)
+
+
+def run_validate_batch(paths: List[Path], opts: dict, jobs: int = 0) -> Iterator[dict]:
+    """Yield ``_validate_file`` results for ``paths`` in input order.
+
+    ``opts`` is passed to every call (DB snapshot, expected counts, flags).
+    ``jobs`` <= 1 validates in-process; otherwise a process pool is used.
+    """
+    items = [str(p) for p in paths]
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(items)) if items else 1
+    if jobs <= 1:
+        _init_validate_worker(opts)
+        for item in items:
+            yield _validate_one(item)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_validate_worker, initargs=(opts,)
+    ) as pool:
+        yield from pool.map(_validate_one, items, chunksize=chunksize)
+
+
+# -----------------------------------------------------------------------------
+# Recycling worker pool (generate-batch)
+# -----------------------------------------------------------------------------
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MiB (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    # Peak RSS: kilobytes on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _pool_worker(conn, func, initializer, initargs, max_tasks, max_rss_mb):
+    if initializer is not None:
+        initializer(*initargs)
+    done = 0
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            return
+        if item is None:
+            return
+        idx, arg = item
+        try:
+            res, err = func(arg), None
+        except Exception as exc:
+            res, err = None, f"{type(exc).__name__}: {exc}"
+        done += 1
+        retire = bool((max_tasks and done >= max_tasks) or (max_rss_mb and _rss_mb() > max_rss_mb))
+        try:
+            conn.send((idx, res, err, retire))
+        except Exception as exc:  # result could not be pickled
+            conn.send((idx, None, f"{type(exc).__name__}: {exc}", retire))
+        if retire:
+            return
+
+
+def run_pool(
+    func: Callable,
+    items: List,
+    jobs: int,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    max_tasks_per_worker: int = 0,
+    max_rss_mb: int = 0,
+) -> Iterator[Tuple[int, object, Optional[str]]]:
+    """Run ``func`` over ``items`` in up to ``jobs`` worker processes.
+
+    Yields ``(index, result, error)`` in completion order. A worker retires
+    after ``max_tasks_per_worker`` items or once its RSS exceeds ``max_rss_mb``
+    and is replaced while work remains; a worker that dies mid-task (e.g. OOM
+    kill) reports that task as failed instead of hanging the batch.
+
+    The parent hands each worker one item at a time over the worker's own
+    pipe, so it always knows which item a dead worker held and no shared
+    queue lock can be left held by a killed process.
+    """
+    import multiprocessing as mp
+    from multiprocessing.connection import wait
+
+    ctx = mp.get_context()
+    todo = deque(enumerate(items))
+    workers = {}     # wid -> (process, parent end of its pipe)
+    in_flight = {}   # wid -> index of the item it holds
+    next_wid = 0
+    pending = len(items)
+
+    def feed(wid):
+        if not todo:
+            return
+        idx, arg = todo.popleft()
+        try:
+            workers[wid][1].send((idx, arg))
+        except OSError:  # died before taking it; it is reaped below
+            todo.appendleft((idx, arg))
+            return
+        in_flight[wid] = idx
+
+    def spawn():
+        nonlocal next_wid
+        wid = next_wid
+        next_wid += 1
+        parent_conn, child_conn = ctx.Pipe()
+        p = ctx.Process(
+            target=_pool_worker,
+            args=(child_conn, func, initializer, initargs, max_tasks_per_worker, max_rss_mb),
+            daemon=True,
+        )
+        p.start()
+        child_conn.close()
+        workers[wid] = (p, parent_conn)
+        feed(wid)
+
+    for _ in range(min(jobs, len(items))):
+        spawn()
+
+    try:
+        while pending:
+            if not workers:
+                spawn()
+            ready = set(wait([c for _, c in workers.values()] + [p.sentinel for p, _ in workers.values()]))
+            for wid, (p, conn) in list(workers.items()):
+                # An exited process has flushed everything it sent, so draining
+                # its pipe after seeing the sentinel cannot miss a result.
+                exited = p.sentinel in ready
+                if not exited and conn not in ready:
+                    continue
+                gone = exited
+                try:
+                    while conn.poll():
+                        idx, res, err, retire = conn.recv()
+                        in_flight.pop(wid, None)
+                        pending -= 1
+                        yield idx, res, err
+                        if retire:
+                            gone = True
+                            break
+                        if not exited:
+                            feed(wid)
+                except (EOFError, OSError):
+                    gone = True
+                if not gone:
+                    continue
+                p.join()
+                conn.close()
+                del workers[wid]
+                idx = in_flight.pop(wid, None)
+                if idx is not None:
+                    pending -= 1
+                    yield idx, None, f"worker exited unexpectedly (code {p.exitcode})"
+                if todo:
+                    spawn()
+    finally:
+        for p, conn in workers.values():
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for p, conn in workers.values():
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+            conn.close()
+
+
+def batch_output_path(path, fmt: str, output_dir: Optional[str] = None) -> Path:
+    """Output file for ``path`` rendered as ``fmt``."""
+    path = Path(path)
+    if output_dir:
+        return Path(output_dir) / f"{path.stem}.{fmt}"
+    return path.with_suffix(f".{fmt}")
+
+
+def _init_generate_worker(opts: dict):
+    """Warm a render worker: fonts and styles, licence claims and ICC profile."""
+    global _GENERATE_OPTS
+    if "pdf" in opts["fmts"]:
+        from .pdf_generator import _render_context
+        _render_context()
+    if "html" in opts["fmts"]:
+        from .html_generator import _get_template
+        _get_template(opts.get("template"))  # compiled, or loaded from the bytecode cache
+    if "docx" in opts["fmts"]:
+        from .annex4ac import _docx_backend
+        if _docx_backend() == "stream":
+            from .docx_stream import _skeleton
+            _skeleton(opts.get("docx_template"))  # styled skeleton, built once per worker
+        else:
+            from .docx_generator import _new_document
+            _new_document(opts.get("docx_template"))  # styled base document, built once per worker
+    _GENERATE_OPTS = opts
+
+
+def _generate_one(path: str) -> dict:
+    import yaml
+    from .annex4ac import _build_doc_meta, _render_cached, _render_format
+    from .document import build_document
+
+    opts = _GENERATE_OPTS
+    if "pdf" in opts["fmts"] and not opts.get("claims"):
+        raise RuntimeError("PDF generation requires a verified licence")
+    payload = yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+    meta = _build_doc_meta(payload)
+    store = opts.get("store")
+    if store is not None or len(opts["fmts"]) > 1:
+        payload = build_document(payload)  # normalised once for every format
+    outputs, warnings, cached = [], [], 0
+    for fmt in opts["fmts"]:
+        out = batch_output_path(path, fmt, opts["output_dir"])
+        kwargs = dict(pdfa=opts["pdfa"] and fmt == "pdf", icc_bytes=opts.get("icc_bytes"),
+                      verbose=False, template=opts.get("template"),
+                      docx_template=opts.get("docx_template"))
+        if store is not None:
+            ok, hit = _render_cached(payload, meta, fmt, out, store, **kwargs)
+            cached += hit
+        else:
+            ok = _render_format(payload, meta, fmt, out, **kwargs)
+        if not ok:
+            warnings.append(f"PDF/A conversion failed for {out}")
+        outputs.append(str(out))
+    return {"path": path, "outputs": outputs, "warnings": warnings, "error": None, "cached": cached}
+
+
+def run_generate_batch(paths: List[Path], opts: dict, jobs: int = 0,
+                       max_tasks_per_worker: int = 0, max_rss_mb: int = 0) -> Iterator[dict]:
+    """Yield one result dict per input as documents finish rendering."""
+    items = [str(p) for p in paths]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(items) <= 1:
+        _init_generate_worker(opts)
+        for item in items:
+            try:
+                yield _generate_one(item)
+            except Exception as exc:
+                yield {"path": item, "outputs": [], "warnings": [],
+                       "error": f"{type(exc).__name__}: {exc}"}
+        return
+
+    for idx, res, err in run_pool(
+        _generate_one, items, jobs,
+        initializer=_init_generate_worker, initargs=(opts,),
+        max_tasks_per_worker=max_tasks_per_worker, max_rss_mb=max_rss_mb,
+    ):
+        if err:
+            res = {"path": items[idx], "outputs": [], "warnings": [], "error": err}
+        yield res
+
+
+# -----------------------------------------------------------------------------
+# One document, several formats (generate --fmt pdf,html,docx)
+# -----------------------------------------------------------------------------
+
+def _init_render_worker(opts: dict):
+    global _RENDER_OPTS
+    _RENDER_OPTS = opts
+
+
+def _render_one(item: Tuple[str, str]) -> Tuple[bool, bool]:
+    from .annex4ac import _render_cached, _render_format
+
+    fmt, out = item
+    opts = _RENDER_OPTS
+    kwargs = dict(pdfa=opts["pdfa"] and fmt == "pdf", icc_bytes=opts.get("icc_bytes"),
+                  verbose=False, template=opts.get("template"),
+                  docx_template=opts.get("docx_template"))
+    if opts.get("store") is not None:
+        return _render_cached(opts["payload"], opts["meta"], fmt, Path(out), opts["store"], **kwargs)
+    return _render_format(opts["payload"], opts["meta"], fmt, Path(out), **kwargs), False
+
+
+def run_render_formats(targets: List[Tuple[str, Path]], opts: dict,
+                       jobs: int = 0) -> Iterator[Tuple[str, Path, bool, bool, Optional[str]]]:
+    """Render one loaded document into every ``(fmt, output)`` target.
+
+    ``opts`` carries the ``payload`` (document model) and ``meta`` shared by
+    all formats and, optionally, a render ``store``. Each format gets its own
+    worker process (the renderers are CPU-bound pure Python, so threads would
+    serialise on the GIL) and the set finishes in about the time of the
+    slowest format. Yields ``(fmt, output, ok, cached, error)`` in completion
+    order; ``ok`` is ``False`` when PDF/A conversion failed.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(targets))
+    if jobs <= 1:
+        _init_render_worker(opts)
+        for fmt, out in targets:
+            try:
+                yield (fmt, out, *_render_one((fmt, str(out))), None)
+            except Exception as exc:
+                yield fmt, out, False, False, f"{type(exc).__name__}: {exc}"
+        return
+
+    items = [(fmt, str(out)) for fmt, out in targets]
+    for idx, res, err in run_pool(_render_one, items, jobs,
+                                  initializer=_init_render_worker, initargs=(opts,)):
+        fmt, out = targets[idx]
+        ok, cached = res if res else (False, False)
+        yield fmt, out, ok, cached, err
@@ -0,0 +1,228 @@
+"""
+cache.py
+
+Small helpers for annex4ac's on-disk caches.
+
+Everything lives under the per-user cache directory (``ANNEX4AC_CACHE_DIR``
+overrides it, e.g. for CI runners with a shared cache volume). Writes go to a
+temporary file in the same directory followed by ``os.replace`` so concurrent
+CLI runs and batch workers never see a half-written entry.
+
+:class:`ContentStore` is a content-addressed key/value store on top of that:
+one file per key, last use tracked through the file mtime and the total size
+kept under a bound by evicting the least recently used entries. Whole files
+(rendered documents) can be stored and placed back. They are copied by
+default, so the placed file is the caller's own: its mtime is not touched by
+later cache hits and editing it cannot corrupt the entry. With
+``hardlink=True`` they are hard-linked instead, which costs no copy but
+shares the inode, so such outputs must be treated as read-only.
+"""
+
+import os
+import json
+import random
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+def cache_dir(*parts: str) -> Path:
+    """Return (and create) ``<cache root>/<parts...>``."""
+    root = os.getenv("ANNEX4AC_CACHE_DIR")
+    if not root:
+        from platformdirs import user_cache_dir
+        root = user_cache_dir("annex4ac")
+    path = Path(root, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write ``data`` to ``path`` atomically."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _copy_or_link(src: Path, dest: Path, hardlink: bool = False):
+    """Atomically replace ``dest`` with a copy of ``src`` (a hard link if ``hardlink`` and possible)."""
+    if hardlink:
+        try:
+            if os.path.samefile(src, dest):
+                return  # already linked; renaming a link over itself would leave the temp name behind
+        except FileNotFoundError:
+            if not os.path.exists(src):
+                raise
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{random.getrandbits(32):08x}.tmp")
+    try:
+        linked = False
+        if hardlink:
+            try:
+                os.link(src, tmp)
+                linked = True
+            except FileNotFoundError:
+                raise
+            except OSError:
+                pass  # other filesystem, or no hard links
+        if not linked:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: Path, obj):
+    atomic_write_bytes(path, json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def read_json(path: Path) -> Optional[object]:
+    """Return the decoded JSON at ``path`` or ``None`` if missing/corrupt."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def digest(*parts) -> str:
+    """sha256 over ``parts`` (str/bytes/None), unambiguously separated."""
+    h = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b"\x00"
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class ContentStore:
+    """Size-bounded, content-addressed file store safe for concurrent writers.
+
+    Several processes (or CI runners sharing an NFS mount) may use the same
+    ``root``: entries are written atomically and eviction tolerates files that
+    another process removed first. Keys should be hex digests. ``hardlink``
+    makes :meth:`put_file` and :meth:`link_into` share inodes with the store
+    instead of copying.
+    """
+
+    PRUNE_EVERY = 32  # average number of writes between size checks
+
+    def __init__(self, root, max_bytes: int = 256 * 2**20, hardlink: bool = False):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hardlink = hardlink
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self.path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            atomic_write_bytes(path, data)
+        except OSError:
+            return  # a cache that cannot be written is just a cache miss later
+        if random.randrange(self.PRUNE_EVERY) == 0:
+            self.prune()
+
+    def link_into(self, key: str, dest) -> bool:
+        """Place the entry for ``key`` at ``dest`` (copy, or hard link); ``False`` on a miss.
+
+        ``dest`` is replaced atomically. With ``hardlink`` whoever writes
+        ``dest`` later must replace the file rather than write through the
+        shared inode.
+        """
+        path = self.path(key)
+        try:
+            _copy_or_link(path, Path(dest), self.hardlink)
+        except FileNotFoundError:
+            return False  # never stored, or evicted by another process
+        if not self.hardlink:
+            # a linked entry shares its mtime with ``dest``; leave the user's file alone
+            try:
+                os.utime(path)  # mark as recently used
+            except OSError:
+                pass
+        return True
+
+    def put_file(self, key: str, src):
+        """Store the file at ``src`` under ``key`` (copy, or hard link); ``src`` is left in place."""
+        path = self.path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            _copy_or_link(Path(src), path, self.hardlink)
+        except OSError:
+            return  # a cache that cannot be written is just a cache miss later
+        if random.randrange(self.PRUNE_EVERY) == 0:
+            self.prune()
+
+    def get_json(self, key: str):
+        data = self.get(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def put_json(self, key: str, obj):
+        self.put(key, json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def prune(self, max_bytes: Optional[int] = None):
+        """Evict least recently used entries until the store fits ``max_bytes``."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        for sub in self.root.iterdir():
+            if not sub.is_dir():
+                continue
+            for f in sub.iterdir():
+                if f.name.startswith("."):
+                    continue  # in-flight temp file of another writer
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, f))
+                total += st.st_size
+        if total <= limit:
+            return
+        entries.sort()
+        for _, size, f in entries:
+            try:
+                f.unlink()
+            except OSError:
+                continue
+            total -= size
+            if total <= limit:
+                break
@@ -1,10 +1,13 @@
 from __future__ import annotations
+import os
 import re
 from collections import defaultdict
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 from functools import lru_cache
+from types import MappingProxyType
 from datetime import datetime
-from typing import Dict, Iterator, Optional, List, Tuple
+from typing import Dict, Iterator, Mapping, Optional, List, Tuple
 
 from sqlalchemy import (
     Integer,
@@ -15,9 +18,13 @@ from sqlalchemy import (
     ForeignKey,
     func,
     case,
+    literal,
+    DateTime,
 )
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
 
+from .cache import atomic_write_json, cache_dir, read_json
 from .constants import SECTION_MAPPING, SECTION_KEYS
 
 
@@ -83,122 +90,255 @@ def _annex_key_from_section_code(sc: str) -> Optional[str]:
     return None
 
 
-def get_latest_regulation_id_with_annex(ses: Session) -> str:
-    """Return regulation_id of the freshest Annex IV snapshot available."""
-    regs = (
-        ses.execute(
-            select(Rule.regulation_id)
-            .where(Rule.section_code.like("AnnexIV%"))
-            .group_by(Rule.regulation_id)
+def _ver_as_dt(v: Optional[str]) -> datetime:
+    if not v:
+        return datetime.min
+    s = str(v).replace(".", "").replace("-", "")
+    try:
+        return datetime.strptime(s[:8], "%Y%m%d")
+    except Exception:
+        return datetime.min
+
+
+def _source_priority():
+    return case(
+        (RegSourceLog.source_name == "celex_consolidated", 3),
+        (RegSourceLog.source_name == "ai_act_original", 2),
+        (RegSourceLog.source_name == "ai_act_html", 1),
+        else_=0,
+    )
+
+
+def _latest_regulation_query(with_source_log: bool = True):
+    """Rank every regulation that has Annex IV rules in a single statement.
+
+    Ordering (all descending, NULLs last): best source priority, latest source
+    log entry, ``Regulation.last_updated``, ``Regulation.effective_date`` and
+    the newest rule timestamp (``last_modified``, else ``effective_date``).
+    """
+    annex = (
+        select(
+            Rule.regulation_id.label("rid"),
+            func.coalesce(
+                func.max(Rule.last_modified), func.max(Rule.effective_date)
+            ).label("max_rule"),
         )
-        .scalars()
-        .all()
+        .group_by(Rule.regulation_id)
+        .having(func.max(case((Rule.section_code.like("AnnexIV%"), 1), else_=0)) == 1)
+        .subquery("annex")
     )
-    if not regs:
+    if with_source_log:
+        rsl = (
+            select(
+                RegSourceLog.regulation_id.label("rid"),
+                func.max(RegSourceLog.created_at).label("rsl_last"),
+                func.max(_source_priority()).label("rsl_prio"),
+            )
+            .group_by(RegSourceLog.regulation_id)
+            .subquery("rsl")
+        )
+        rsl_prio = func.coalesce(rsl.c.rsl_prio, 0)
+        rsl_last = rsl.c.rsl_last
+    else:
+        rsl_prio = literal(0, Integer)
+        rsl_last = literal(None, DateTime)
+
+    stmt = (
+        select(
+            annex.c.rid,
+            rsl_prio.label("rsl_prio"),
+            rsl_last.label("rsl_last"),
+            Regulation.last_updated,
+            Regulation.effective_date,
+            annex.c.max_rule,
+            Regulation.version,
+        )
+        .select_from(annex)
+        .outerjoin(Regulation, Regulation.id == annex.c.rid)
+    )
+    order = [rsl_prio.desc()]
+    if with_source_log:
+        stmt = stmt.outerjoin(rsl, rsl.c.rid == annex.c.rid)
+        order.append(rsl_last.desc().nulls_last())
+    order += [
+        Regulation.last_updated.desc().nulls_last(),
+        Regulation.effective_date.desc().nulls_last(),
+        annex.c.max_rule.desc().nulls_last(),
+    ]
+    return stmt.order_by(*order)
+
+
+def get_latest_regulation_id_with_annex(ses: Session) -> str:
+    """Return regulation_id of the freshest Annex IV snapshot available."""
+    try:
+        result = ses.execute(_latest_regulation_query())
+    except Exception:
+        # e.g. no reg_source_log table in this DB: rank without source info.
+        ses.rollback()
+        result = ses.execute(_latest_regulation_query(with_source_log=False))
+
+    # The DB orders by every timestamp key; only the version string needs
+    # Python, and only among rows tied on all of them.
+    top = []
+    for row in result:
+        if top and tuple(row[1:6]) != tuple(top[0][1:6]):
+            break
+        top.append(row)
+    result.close()
+    if not top:
         raise ValueError("No AnnexIV rules found in DB")
+    top.sort(key=lambda r: _ver_as_dt(r.version), reverse=True)
+    return top[0].rid
 
-    candidates: List[Tuple[str, Dict]] = []
-    for rid in regs:
-        try:
-            max_rule_ts = ses.execute(
-                select(func.max(Rule.last_modified)).where(Rule.regulation_id == rid)
-            ).scalar()
-        except Exception:
-            ses.rollback()
-            max_rule_ts = None
 
-        try:
-            max_rule_eff = ses.execute(
-                select(func.max(Rule.effective_date)).where(Rule.regulation_id == rid)
-            ).scalar()
-        except Exception:
-            ses.rollback()
-            max_rule_eff = None
+def _resolve_regulation_id(ses: Session, celex_id: Optional[str] = None) -> str:
+    """Regulation id for ``celex_id``, or the freshest Annex IV snapshot."""
+    if not celex_id:
+        return get_latest_regulation_id_with_annex(ses)
+    regulation_id = ses.execute(
+        select(Regulation.id).where(Regulation.celex_id == celex_id)
+    ).scalar_one_or_none()
+    if regulation_id is None:
+        raise ValueError(f"CELEX {celex_id} not found in database")
+    return regulation_id
 
-        try:
-            reg = ses.execute(
-                select(Regulation.version, Regulation.last_updated, Regulation.effective_date)
-                .where(Regulation.id == rid)
-            ).one_or_none()
-            reg_version, reg_last, reg_eff = reg if reg else (None, None, None)
-        except Exception:
-            ses.rollback()
-            reg_version = reg_last = reg_eff = None
 
-        try:
-            src_prio = case(
-                (RegSourceLog.source_name == "celex_consolidated", 3),
-                else_=case(
-                    (RegSourceLog.source_name == "ai_act_original", 2),
-                    else_=case(
-                        (RegSourceLog.source_name == "ai_act_html", 1),
-                        else_=0,
-                    ),
-                ),
-            )
-            rsl = (
-                ses.execute(
-                    select(
-                        func.max(RegSourceLog.created_at),
-                        func.max(src_prio),
-                    ).where(RegSourceLog.regulation_id == rid)
-                ).first()
-            )
-            rsl_last = rsl[0] if rsl else None
-            rsl_prio = rsl[1] if rsl else 0
-        except Exception:
-            ses.rollback()
-            rsl_last, rsl_prio = None, 0
-
-        candidates.append(
-            (
-                rid,
-                {
-                    "rsl_prio": rsl_prio or 0,
-                    "rsl_last": rsl_last,
-                    "reg_last": reg_last,
-                    "reg_eff": reg_eff,
-                    "max_rule": max_rule_ts or max_rule_eff,
-                    "reg_ver": reg_version,
-                },
-            )
+# -----------------------------------------------------------------------------
+# On-disk snapshot cache
+#
+# Per regulation_id we keep the derived Annex IV data together with a change
+# token. A run costs the id resolution plus one aggregate query for the token;
+# the section text is only re-read when the token moves. An alias index maps
+# "latest"/CELEX ids to the last regulation they resolved to, so commands keep
+# working from the last good snapshot when the DB is unreachable.
+# -----------------------------------------------------------------------------
+
+def _snapshot_cache_enabled() -> bool:
+    return os.getenv("ANNEX4AC_DB_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _snapshot_path(regulation_id: str):
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", regulation_id)
+    return cache_dir("annex_iv") / f"{safe}.json"
+
+
+def _alias_index_path():
+    return cache_dir("annex_iv") / "index.json"
+
+
+def get_change_token(ses: Session, regulation_id: str) -> str:
+    """Cheap fingerprint of a regulation's Annex IV rows.
+
+    Newest ``Rule.last_modified``, Annex IV row count and the regulation
+    version. Edits that do not bump ``last_modified`` are not detected.
+    """
+    version = (
+        select(Regulation.version).where(Regulation.id == regulation_id).scalar_subquery()
+    )
+    count, latest, ver = ses.execute(
+        select(func.count(Rule.id), func.max(Rule.last_modified), version).where(
+            Rule.regulation_id == regulation_id, Rule.section_code.like("AnnexIV.%")
         )
+    ).one()
+    return f"{latest.isoformat() if latest else '-'}|{count}|{ver or '-'}"
+
+
+@dataclass(frozen=True)
+class AnnexSnapshot:
+    """Everything the CLI needs from one regulation's Annex IV, resolved once.
+
+    ``sections`` maps section keys to assembled text, ``top_counts`` holds the
+    expected number of lettered subpoints per section. ``token`` is the change
+    token the snapshot was built for. ``stale`` is set when the database was
+    unreachable and the snapshot came from the on-disk cache.
+    """
+
+    regulation_id: str
+    sections: Mapping[str, str]
+    top_counts: Mapping[str, int]
+    version: Optional[str] = None
+    token: Optional[str] = None
+    stale: bool = field(default=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "sections", MappingProxyType(dict(self.sections)))
+        object.__setattr__(self, "top_counts", MappingProxyType(dict(self.top_counts)))
+
+    def __reduce__(self):
+        # MappingProxyType does not pickle; batch workers receive snapshots.
+        return (AnnexSnapshot, (self.regulation_id, dict(self.sections),
+                                dict(self.top_counts), self.version, self.token, self.stale))
+
+    def to_dict(self) -> dict:
+        return {
+            "regulation_id": self.regulation_id,
+            "sections": dict(self.sections),
+            "top_counts": dict(self.top_counts),
+            "version": self.version,
+            "token": self.token,
+        }
+
+
+def load_annex_snapshot(
+    ses: Session, regulation_id: Optional[str] = None, celex_id: Optional[str] = None
+) -> AnnexSnapshot:
+    """Resolve the regulation once and return its :class:`AnnexSnapshot`.
 
-    def _ver_as_dt(v: Optional[str]) -> datetime:
-        if not v:
-            return datetime.min
-        s = str(v).replace(".", "").replace("-", "")
+    Goes through the on-disk snapshot cache; see ``_snapshot_cache_enabled``.
+    """
+    alias = regulation_id or (f"celex:{celex_id}" if celex_id else "latest")
+    enabled = _snapshot_cache_enabled()
+    try:
+        rid = regulation_id or _resolve_regulation_id(ses, celex_id)
+        token = get_change_token(ses, rid)
+        if not enabled:
+            return _build_snapshot(ses, rid, token)
+    except SQLAlchemyError as exc:
+        ses.rollback()
+        index = read_json(_alias_index_path()) if enabled else None
+        rid = (index or {}).get(alias)
+        entry = read_json(_snapshot_path(rid)) if rid else None
+        if not entry or "snapshot" not in entry:
+            raise
+        return AnnexSnapshot(**entry["snapshot"], stale=True)
+
+    path = _snapshot_path(rid)
+    entry = read_json(path)
+    if entry and entry.get("token") == token and "snapshot" in entry:
+        snap = AnnexSnapshot(**entry["snapshot"])
+    else:
+        snap = _build_snapshot(ses, rid, token)
         try:
-            return datetime.strptime(s[:8], "%Y%m%d")
-        except Exception:
-            return datetime.min
-
-    candidates.sort(
-        key=lambda x: (
-            x[1]["rsl_prio"],
-            x[1]["rsl_last"] or datetime.min,
-            x[1]["reg_last"] or datetime.min,
-            x[1]["reg_eff"] or datetime.min,
-            x[1]["max_rule"] or datetime.min,
-            _ver_as_dt(x[1]["reg_ver"]),
-        ),
-        reverse=True,
+            atomic_write_json(path, {"token": token, "snapshot": snap.to_dict()})
+        except OSError:
+            pass
+    index = read_json(_alias_index_path()) or {}
+    if index.get(alias) != rid:
+        index[alias] = rid
+        try:
+            atomic_write_json(_alias_index_path(), index)
+        except OSError:
+            pass
+    return snap
+
+
+def _build_snapshot(ses: Session, regulation_id: str, token: Optional[str]) -> AnnexSnapshot:
+    return AnnexSnapshot(
+        regulation_id=regulation_id,
+        sections=_load_sections(ses, regulation_id),
+        top_counts=_load_top_counts(ses, regulation_id),
+        version=_load_version(ses, regulation_id),
+        token=token,
     )
-    return candidates[0][0]
 
 
 def load_annex_iv_from_db(
     ses: Session, regulation_id: Optional[str] = None, celex_id: Optional[str] = None
 ) -> Dict[str, str]:
-    if regulation_id is None:
-        if celex_id:
-            regulation_id = ses.execute(
-                select(Regulation.id).where(Regulation.celex_id == celex_id)
-            ).scalar_one_or_none()
-            if regulation_id is None:
-                raise ValueError(f"CELEX {celex_id} not found in database")
-        else:
-            regulation_id = get_latest_regulation_id_with_annex(ses)
+    return dict(load_annex_snapshot(ses, regulation_id, celex_id).sections)
+
+
+def _load_sections(ses: Session, regulation_id: str) -> Dict[str, str]:
     try:
         rows = ses.execute(
             select(Rule.section_code, Rule.content, Rule.order_index)
@@ -269,47 +409,45 @@ def get_expected_top_counts(
     ses: Session, regulation_id: Optional[str] = None, celex_id: Optional[str] = None
 ) -> Dict[str, int]:
     """Return expected number of top-level subpoints per section key."""
-    if regulation_id is None:
-        if celex_id:
-            regulation_id = ses.execute(
-                select(Regulation.id).where(Regulation.celex_id == celex_id)
-            ).scalar_one_or_none()
-            if not regulation_id:
-                raise ValueError(f"CELEX {celex_id} not found")
-        else:
-            regulation_id = get_latest_regulation_id_with_annex(ses)
+    return dict(load_annex_snapshot(ses, regulation_id, celex_id).top_counts)
+
+
+def _load_top_counts(ses: Session, regulation_id: str) -> Dict[str, int]:
+    # Lettered children ("AnnexIV.<n>.<letter>") counted per parent code in SQL.
+    parent = func.substr(Rule.section_code, 1, func.length(Rule.section_code) - 2)
     try:
         rows = ses.execute(
-            select(Rule.section_code)
-            .where(Rule.regulation_id == regulation_id, Rule.section_code.like("AnnexIV.%"))
-        ).scalars().all()
+            select(parent, func.count())
+            .where(
+                Rule.regulation_id == regulation_id,
+                Rule.section_code.regexp_match(r"^AnnexIV\.[0-9]+\.[A-Za-z]$"),
+            )
+            .group_by(parent)
+        ).all()
     except Exception as exc:
         ses.rollback()
         raise RuntimeError("Failed to load Annex IV section codes") from exc
 
     counts: dict[str, int] = defaultdict(int)
-    for sc in rows:
-        m = re.match(r"^AnnexIV\.(\d+)\.([a-z])$", sc, re.I)
-        if not m:
-            continue
-        n = int(m.group(1))
-        if 1 <= n <= len(SECTION_KEYS):
-            counts[SECTION_KEYS[n - 1]] += 1
+    for code, n in rows:
+        key = _annex_key_from_section_code(code)
+        if key:
+            counts[key] += n
     return dict(counts)
 
 
 def get_schema_version_from_db(
     ses: Session, regulation_id: Optional[str] = None, celex_id: Optional[str] = None
 ) -> Optional[str]:
-    if regulation_id is None:
-        if celex_id:
-            regulation_id = ses.execute(
-                select(Regulation.id).where(Regulation.celex_id == celex_id)
-            ).scalar_one_or_none()
-            if regulation_id is None:
-                return None
-        else:
-            regulation_id = get_latest_regulation_id_with_annex(ses)
+    try:
+        return load_annex_snapshot(ses, regulation_id, celex_id).version
+    except ValueError:
+        if celex_id and regulation_id is None:
+            return None
+        raise
+
+
+def _load_version(ses: Session, regulation_id: str) -> Optional[str]:
     return ses.execute(
         select(Regulation.version).where(Regulation.id == regulation_id)
     ).scalar_one_or_none()
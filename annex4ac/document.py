@@ -0,0 +1,235 @@
+"""
+document.py
+
+Normalised intermediate document model shared by the PDF, HTML and DOCX
+renderers.
+
+A spec is normalised once into a :class:`Document`: nine :class:`Section`
+nodes in ``SECTION_MAPPING`` order, each a tuple of blocks — a
+:class:`Paragraph` or a :class:`ListBlock` of :class:`ListItem` nodes, where
+an ``(a)``-style item may carry the bullets written under it. Item text is
+kept as written; :func:`punctuated_items` adds the list punctuation (``;``
+between items, ``.`` after the last one) with the rules each renderer has
+always used, so the renderers only lay blocks out.
+
+Nodes use ``__slots__`` and are treated as immutable. Section blocks are
+memoised per source text, so a section that did not change between two
+renders (``generate --watch``, several formats of one spec) is the very same
+object and renderer-side caches keyed on it hit. ``to_dict``/``from_dict``
+give a compact JSON-friendly form for caching a document and re-rendering it
+without the YAML.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional, Tuple, Union
+
+from ftfy import fix_text
+
+from .constants import SECTION_MAPPING
+from .lexer import lex
+from .normalize import normalize_text
+
+MODEL_FORMAT = 2
+
+
+class Paragraph:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def to_list(self) -> list:
+        return ["p", self.text]
+
+    def __repr__(self):
+        return f"Paragraph({self.text!r})"
+
+
+class ListItem:
+    """One list entry; ``children`` are the bullets nested under an ``(a)`` item."""
+
+    __slots__ = ("text", "children")
+
+    def __init__(self, text: str, children: Tuple[str, ...] = ()):
+        self.text = text
+        self.children = children
+
+    def __repr__(self):
+        return f"ListItem({self.text!r}, {self.children!r})"
+
+
+class ListBlock:
+    """A bulleted (``ordered=False``) or lettered list; ``start`` is the first letter's number."""
+
+    __slots__ = ("ordered", "start", "items")
+
+    def __init__(self, ordered: bool, items: Tuple[ListItem, ...], start: int = 1):
+        self.ordered = ordered
+        self.start = start
+        self.items = items
+
+    def to_list(self) -> list:
+        items = [[i.text, list(i.children)] for i in self.items]
+        return ["ol", self.start, items] if self.ordered else ["ul", items]
+
+    def __repr__(self):
+        return f"ListBlock(ordered={self.ordered}, start={self.start}, items={self.items!r})"
+
+
+Block = Union[Paragraph, ListBlock]
+
+
+class Section:
+    __slots__ = ("key", "title", "blocks")
+
+    def __init__(self, key: str, title: str, blocks: Tuple[Block, ...]):
+        self.key = key
+        self.title = title
+        self.blocks = blocks
+
+    def __repr__(self):
+        return f"Section({self.key!r}, {len(self.blocks)} block(s))"
+
+
+class Document:
+    """``sections`` in ``SECTION_MAPPING`` order; ``fields`` are the other top-level values."""
+
+    __slots__ = ("sections", "fields")
+
+    def __init__(self, sections: Tuple[Section, ...], fields: dict):
+        self.sections = sections
+        self.fields = fields
+
+    def to_dict(self) -> dict:
+        return {
+            "format": MODEL_FORMAT,
+            "fields": self.fields,
+            "sections": [[s.key, s.title, [b.to_list() for b in s.blocks]] for s in self.sections],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Document":
+        if data.get("format") != MODEL_FORMAT:
+            raise ValueError(f"Unsupported document model format: {data.get('format')!r}")
+        sections = tuple(
+            Section(key, title, tuple(_block_from_list(b) for b in blocks))
+            for key, title, blocks in data["sections"]
+        )
+        return cls(sections, dict(data["fields"]))
+
+
+def _block_from_list(data: list) -> Block:
+    kind = data[0]
+    if kind == "p":
+        return Paragraph(data[1])
+    items = data[-1]
+    return ListBlock(kind == "ol", tuple(ListItem(t, tuple(c)) for t, c in items),
+                     start=data[1] if kind == "ol" else 1)
+
+
+def punctuate(items: Iterable[str]) -> list:
+    """Add ';' after each list entry and '.' after the last one, but not after a colon."""
+    items = list(items)
+    out = []
+    for i, t in enumerate(items):
+        t = t.rstrip(" ;.")
+        # Don't add period/semicolon if string ends with colon
+        if t.endswith(':'):
+            out.append(t)
+        else:
+            out.append(t + ("." if i == len(items)-1 else ";"))
+    return out
+
+
+def _letter_number(label: Optional[str]) -> int:
+    return ord(label) - ord("a") + 1 if label and len(label) == 1 else 1
+
+
+@lru_cache(maxsize=1024)
+def punctuated_items(block: ListBlock, per_item: bool = False) -> Tuple[ListItem, ...]:
+    """``block.items`` with list punctuation applied.
+
+    Bulleted lists are punctuated as one list. In a lettered list every line
+    is punctuated in reading order, heads and nested bullets alike (DOCX and
+    PDF); with ``per_item`` (HTML) the heads are left as written and the
+    bullets under each head are punctuated as a list of their own.
+    """
+    if not block.ordered:
+        return tuple(ListItem(t) for t in punctuate(i.text for i in block.items))
+    if per_item:
+        return tuple(ListItem(i.text, tuple(punctuate(i.children))) for i in block.items)
+    flat = punctuate(t for i in block.items for t in (i.text, *i.children))
+    items, pos = [], 0
+    for item in block.items:
+        n = len(item.children)
+        items.append(ListItem(flat[pos], tuple(flat[pos + 1:pos + 1 + n])))
+        pos += 1 + n
+    return tuple(items)
+
+
+@lru_cache(maxsize=256)
+def section_blocks(text: str, normalize: bool = True) -> Tuple[Block, ...]:
+    """Normalise one section body and group its lines into blocks (memoised per text).
+
+    A blank line ends a bulleted list but not a lettered one, so ``(a)`` and
+    ``(b)`` separated by an empty line stay one list; bullets that follow an
+    ``(a)`` item are nested under it. With ``normalize=False`` the text is
+    only repaired with ``ftfy``: ``\\n`` escapes and list markers joined onto
+    one line are left as written (the ``listify`` filter on raw strings).
+    """
+    if not text:
+        return ()
+    blocks = []
+    ordered = None        # kind of the open list: True/False, None if no list is open
+    start, entries = 1, []   # [(head, [bullets])] of the open list
+
+    def close():
+        nonlocal ordered, entries
+        if ordered is not None and entries:
+            items = tuple(ListItem(head, tuple(children)) for head, children in entries)
+            blocks.append(ListBlock(ordered, items, start))
+        ordered, entries = None, []
+
+    for tok in lex(normalize_text(text) if normalize else fix_text(text)):
+        if tok.kind == "blank":
+            if ordered is False:
+                close()
+        elif tok.is_alpha_item:
+            if ordered is not True:
+                close()
+                ordered, start = True, _letter_number(tok.label)
+            entries.append((tok.text, []))
+        elif tok.kind == "bullet":
+            if ordered is True:
+                entries[-1][1].append(tok.text)
+            else:
+                ordered = False
+                entries.append((tok.text, []))
+        else:
+            close()
+            blocks.append(Paragraph(tok.line.strip()))
+    close()
+    return tuple(blocks)
+
+
+def build_document(payload: Mapping) -> Document:
+    """Normalise a parsed spec into a :class:`Document`."""
+    section_keys = {key for _, key in SECTION_MAPPING}
+    sections = tuple(
+        Section(key, title, section_blocks(_text(payload.get(key))))
+        for title, key in SECTION_MAPPING
+    )
+    fields = {k: normalize_text(v) if isinstance(v, str) else v
+              for k, v in payload.items() if k not in section_keys}
+    return Document(sections, fields)
+
+
+def as_document(payload: Union[Document, Mapping]) -> Document:
+    """Accept either a built :class:`Document` or a parsed spec."""
+    return payload if isinstance(payload, Document) else build_document(payload)
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
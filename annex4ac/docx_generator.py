@@ -5,29 +5,29 @@ Module for generating Annex IV DOCX documents.
 Contains all the logic for working with python-docx to create technical documentation.
 """
 
-import re
 import os
-import yaml
+import json
+from copy import deepcopy
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from datetime import datetime
 from hashlib import sha256
-from typing import Dict
+from typing import Optional
 
 from docx import Document
-from docx.shared import Pt, Cm, RGBColor
+from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
-from docx.enum.section import WD_SECTION_START
 from docx.enum.style import WD_STYLE_TYPE
-from ftfy import fix_text
+from docx.text.paragraph import Paragraph as DocxParagraph
 
-# Regular expressions for parsing lists
-BULLET_RE = re.compile(r'^\s*(?:[\u2022\u25CF\u25AA\-\*])\s+')
-SUBPOINT_RE = re.compile(r'^\(([a-z])\)\s+', re.I)  # (a), (b)...
-PARA_SPLIT = re.compile(r'\n{2,}')  # paragraphs
+from .constants import DOC_CTRL_FIELDS
+from .document import Paragraph, as_document, punctuated_items
 
-from .constants import DOC_CTRL_FIELDS, SECTION_MAPPING, SCHEMA_VERSION
+# Styles the renderer refers to by name
+_RENDER_STYLES = ('Title', 'Heading 1', 'Heading 2', 'List Bullet')
 
 
 def _enable_auto_update_fields(doc):
@@ -59,6 +59,85 @@ def _ensure_toc_styles(doc):
 
 
 
+def _ensure_list_bullet_style(doc):
+    """Creates the 'List Bullet' style if the document lacks it."""
+    if 'List Bullet' not in doc.styles:
+        bullet_style = doc.styles.add_style('List Bullet', WD_STYLE_TYPE.PARAGRAPH)
+        bullet_style.font.name = 'Times New Roman'
+        bullet_style.font.size = Pt(12)
+        bullet_style.paragraph_format.left_indent = Pt(18)
+        bullet_style.paragraph_format.space_after = Pt(6)
+
+
+def _apply_house_style(doc):
+    """Sets up fields, margins and the Normal, heading, TOC and list styles."""
+    # --- Auto-update fields and TOC styles ---
+    _enable_auto_update_fields(doc)
+    _ensure_toc_styles(doc)
+
+    # --- Page margins ---
+    for s in doc.sections:
+        s.left_margin = s.right_margin = Cm(2.5)
+        s.top_margin = s.bottom_margin = Cm(2.5)
+
+    # --- Base style (TNR 12 pt, 1.5 line) ---
+    normal = doc.styles['Normal']
+    normal.font.name = 'Times New Roman'
+    normal.font.size = Pt(12)
+    normal._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    normal.paragraph_format.line_spacing = 1.5
+    if not normal.font.name:
+        normal.font.name = 'Liberation Serif'   # Linux fallback
+
+    # Headings
+    for name, size in (('Title', 18), ('Heading 1', 16), ('Heading 2', 14)):
+        st = doc.styles[name]
+        st.font.name = 'Times New Roman'
+        st.font.size = Pt(size)
+        st._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+
+    # Create list styles if they don't exist
+    _ensure_list_bullet_style(doc)
+
+
+def _save_bytes(doc) -> bytes:
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=1)
+def _base_docx_bytes() -> bytes:
+    """The house-styled empty document, built once per process."""
+    doc = Document()
+    _apply_house_style(doc)
+    return _save_bytes(doc)
+
+
+@lru_cache(maxsize=8)
+def _template_docx_bytes(path: str, mtime_ns: int, size: int) -> bytes:
+    """A user-supplied .docx completed with what rendering needs, keeping its own styles.
+
+    Word only stores the styles a document uses, so headings or 'List Bullet'
+    a template never used are copied over from the house style.
+    """
+    doc = Document(path)
+    _enable_auto_update_fields(doc)
+    base = Document(BytesIO(_base_docx_bytes())).styles
+    for name in _RENDER_STYLES:
+        if name not in doc.styles:
+            doc.styles.element.append(deepcopy(base[name].element))
+    return _save_bytes(doc)
+
+
+def _new_document(template: Optional[Path] = None):
+    """A fresh document loaded from the cached house-style (or ``template``) bytes."""
+    if template is None:
+        return Document(BytesIO(_base_docx_bytes()))
+    st = os.stat(template)
+    return Document(BytesIO(_template_docx_bytes(str(Path(template).resolve()), st.st_mtime_ns, st.st_size)))
+
+
 def _add_page_number(paragraph):
     """Adds page number to paragraph."""
     fld = OxmlElement('w:fldSimple')
@@ -66,58 +145,64 @@ def _add_page_number(paragraph):
     paragraph._p.append(fld)
 
 
-def _new_alpha_list(doc):
-    """Creates new numbering for lists with letters (a), (b), (c)..."""
-    numbering = doc.part.numbering_part.numbering_definitions._numbering
-    nid = str(max([int(x.get(qn('w:numId'))) for x in numbering.findall(qn('w:num'))] or [0]) + 1)
-
-    absNum = OxmlElement('w:abstractNum')
-    absNum.set(qn('w:abstractNumId'), nid)
-    lvl = OxmlElement('w:lvl')
-    lvl.set(qn('w:ilvl'), '0')
-    fmt = OxmlElement('w:numFmt')
-    fmt.set(qn('w:val'), 'lowerLetter')
-    lvl.append(fmt)
-    text = OxmlElement('w:lvlText')
-    text.set(qn('w:val'), '(%1)')
-    lvl.append(text)
-    suff = OxmlElement('w:suff')
-    suff.set(qn('w:val'), 'space')
-    lvl.append(suff)
-    start = OxmlElement('w:start')
-    start.set(qn('w:val'), '1')
-    lvl.append(start)
-    # optional restart each section
-    restart = OxmlElement('w:lvlRestart')
-    restart.set(qn('w:val'), '1')
-    lvl.append(restart)
-
-    absNum.append(lvl)
-    numbering.append(absNum)
-
-    num = OxmlElement('w:num')
-    num.set(qn('w:numId'), nid)
-    abs_ref = OxmlElement('w:abstractNumId')
-    abs_ref.set(qn('w:val'), nid)
-    num.append(abs_ref)
-    numbering.append(num)
-    return int(nid)
-
-
-def _is_last_in_block(line: str, para: str) -> bool:
-    """Determines if the line is the last in the paragraph block."""
-    lines = para.split('\n')
-    return line.strip() == lines[-1].strip()
-
-
-def _fix_escapes(text: str) -> str:
-    """Unescapes \n and normalizes line breaks"""
-    if not isinstance(text, str):
-        return text
-    # first normalize CRLF
-    text = text.replace('\\r\\n', '\n').replace('\\r', '\n')
-    # then literal \n -> real line breaks
-    return text.replace('\\n', '\n')
+def _el(tag, **attrs):
+    el = OxmlElement(tag)
+    for k, v in attrs.items():
+        el.set(qn(f'w:{k}'), str(v))
+    return el
+
+
+class _AlphaLists:
+    """Numbering for lettered lists (a), (b), (c)... in one document.
+
+    All lists share a single ``w:abstractNum``; each list is a ``w:num`` that
+    restarts it through ``lvlOverride``/``startOverride``. Ids come from
+    counters seeded by one scan of the numbering part, so starting a list
+    costs the same however many lists came before it.
+    """
+
+    def __init__(self, doc):
+        self._numbering = doc.part.numbering_part.numbering_definitions._numbering
+        self._next_num = 1 + max((int(x.get(qn('w:numId'))) for x in self._numbering.findall(qn('w:num'))), default=0)
+        self._abstract_id = None
+
+    def _add_abstract(self) -> int:
+        abs_id = 1 + max((int(x.get(qn('w:abstractNumId')))
+                          for x in self._numbering.findall(qn('w:abstractNum'))), default=-1)
+        lvl = _el('w:lvl', ilvl=0)
+        lvl.append(_el('w:start', val=1))
+        lvl.append(_el('w:numFmt', val='lowerLetter'))
+        # optional restart each section
+        lvl.append(_el('w:lvlRestart', val=1))
+        lvl.append(_el('w:suff', val='space'))
+        lvl.append(_el('w:lvlText', val='(%1)'))
+        abstract = _el('w:abstractNum', abstractNumId=abs_id)
+        abstract.append(lvl)
+        # abstract definitions precede every w:num in numbering.xml
+        first_num = self._numbering.find(qn('w:num'))
+        if first_num is not None:
+            first_num.addprevious(abstract)
+        else:
+            self._numbering.append(abstract)
+        return abs_id
+
+    @property
+    def abstract_id(self) -> int:
+        if self._abstract_id is None:
+            self._abstract_id = self._add_abstract()
+        return self._abstract_id
+
+    def new_list(self, start: int = 1) -> int:
+        """Return the ``numId`` of a new list whose first item is letter number ``start``."""
+        nid = self._next_num
+        self._next_num += 1
+        num = _el('w:num', numId=nid)
+        num.append(_el('w:abstractNumId', val=self.abstract_id))
+        override = _el('w:lvlOverride', ilvl=0)
+        override.append(_el('w:startOverride', val=start))
+        num.append(override)
+        self._numbering.append(num)
+        return nid
 
 
 def _apply_indent(p, left=720, hanging=360):
@@ -146,81 +231,61 @@ def _apply_numbering(p, num_id, left=720, hanging=360):
     pPr.append(ind)
 
 
-def render_docx(payload: dict, output_path: Path, meta: dict):
-    """
-    Main function for generating Annex IV DOCX document.
-    
-    Args:
-        payload: Dictionary with data to fill sections
-        output_path: Path to save DOCX file
-    """
-    doc = Document()
+def _body_appender(doc):
+    """Return ``add(text="", style_id=None)``, which appends a paragraph to the body.
 
-    # --- Auto-update fields and TOC styles ---
-    _enable_auto_update_fields(doc)
-    _ensure_toc_styles(doc)
-
-    # --- Page margins ---
-    for s in doc.sections:
-        s.left_margin = s.right_margin = Cm(2.5)
-        s.top_margin = s.bottom_margin = Cm(2.5)
-
-    # --- Base style (TNR 12 pt, 1.5 line) ---
-    normal = doc.styles['Normal']
-    normal.font.name = 'Times New Roman'
-    normal.font.size = Pt(12)
-    normal._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-    normal.paragraph_format.line_spacing = 1.5
-    if not normal.font.name:
-        normal.font.name = 'Liberation Serif'   # Linux fallback
-
-    # Headings
-    for name, size in (('Title', 18), ('Heading 1', 16), ('Heading 2', 14)):
-        st = doc.styles[name]
-        st.font.name = 'Times New Roman'
-        st.font.size = Pt(size)
-        st._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-
-    # Create list styles if they don't exist
-    if 'List Bullet' not in doc.styles:
-        bullet_style = doc.styles.add_style('List Bullet', WD_STYLE_TYPE.PARAGRAPH)
-        bullet_style.font.name = 'Times New Roman'
-        bullet_style.font.size = Pt(12)
-        bullet_style.paragraph_format.left_indent = Pt(18)
-        bullet_style.paragraph_format.space_after = Pt(6)
+    ``doc.add_paragraph`` looks for the closing ``w:sectPr`` by scanning the
+    body on every call, so a long document renders in quadratic time; here the
+    anchor is looked up once.
+    """
+    body = doc.element.body
+    sect_pr = body.sectPr
 
-    # Metadata
-    doc.core_properties.author = "Annex4AC"
-    doc.core_properties.created = datetime.now()
-    doc.core_properties.version = str(payload.get('_schema_version', 'unknown'))
-    
-    # Add retention period information
-    retention_until = payload.get('retention_until')
+    def add(text: str = "", style_id: Optional[str] = None) -> DocxParagraph:
+        p = OxmlElement('w:p')
+        if sect_pr is not None:
+            sect_pr.addprevious(p)
+        else:
+            body.append(p)
+        paragraph = DocxParagraph(p, doc._body)
+        if text:
+            paragraph.add_run(text)
+        if style_id is not None:
+            p.style = style_id
+        return paragraph
+
+    return add
+
+
+def _core_properties(document) -> dict:
+    """Core properties of the output: schema version, retention and a digest of the content."""
+    fields = document.fields
+    retention_until = fields.get('retention_until')
+    comments = "Generated by Annex4AC — EU AI Act Annex IV tool"
     if retention_until:
-        doc.core_properties.comments = f"Generated by Annex4AC — EU AI Act Annex IV tool. Retention until: {retention_until}"
-    else:
-        doc.core_properties.comments = "Generated by Annex4AC — EU AI Act Annex IV tool"
-    
-    doc.core_properties.title = "Annex IV Technical Documentation"
-    doc.core_properties.subject = "EU AI Act Compliance"
-    doc.core_properties.identifier = f"annex4-{payload.get('_schema_version', 'unknown')}"
-    try:
-        doc.part.core_properties.category = "Annex IV Tech Doc"
-        doc.part.core_properties.keywords = sha256(
-            yaml.safe_dump(payload, allow_unicode=True).encode('utf-8')
-        ).hexdigest()
-    except Exception:
-        pass
-
+        comments += f". Retention until: {retention_until}"
+    return {
+        "author": "Annex4AC",
+        "created": datetime.now(),
+        "version": str(fields.get('_schema_version', 'unknown')),
+        "comments": comments,
+        "title": "Annex IV Technical Documentation",
+        "subject": "EU AI Act Compliance",
+        "identifier": f"annex4-{fields.get('_schema_version', 'unknown')}",
+        "category": "Annex IV Tech Doc",
+        "keywords": sha256(
+            json.dumps(document.to_dict(), sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest(),
+    }
+
+
+def _add_front_matter(doc, meta: dict):
+    """Adds the title and the document control table."""
     # --- Title page ---
     title = doc.add_heading('Annex IV Technical Documentation', 0)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
     # --- Document control block ---
-    # Use passed metadata (ensure generation_date is current)
-    meta = meta.copy()
-    meta["generation_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
     doc.add_heading('Document control', level=1)
     table = doc.add_table(rows=0, cols=2)
     table.autofit = True
@@ -231,77 +296,65 @@ def render_docx(payload: dict, output_path: Path, meta: dict):
     doc.add_paragraph()  # Empty line after table
 
 
-    # --- Main Annex IV sections ---
-    # bookmark_counter = 0
-    for heading, key in SECTION_MAPPING:
-        raw = payload.get(key, "")
-        if not raw:
-            continue
-        raw = _fix_escapes(raw)
-        raw = fix_text(raw)
-        raw = re.sub(r'\r?\n', '\n', raw)  # unification
-        # If YAML "folded" line breaks before lists — restore them
-        raw = re.sub(r'\s+(?=(?:[-•*]\s))', '\n', raw)
-        raw = re.sub(r'\s+(?=\([a-z]\)\s+)', '\n', raw, flags=re.I)
-
-        # create heading with unique bookmark for navigation
-        heading_para = doc.add_heading(heading, level=1)
-        # bookmark_name = f"section_{key}"
-        # bookmark_counter += 1
-        # bookmark = OxmlElement('w:bookmarkStart')
-        # bookmark.set(qn('w:id'), str(bookmark_counter))
-        # bookmark.set(qn('w:name'), bookmark_name)
-        # heading_para._p.append(bookmark)
-        # add bookmark end
-        # bookmark_end = OxmlElement('w:bookmarkEnd')
-        # bookmark_end.set(qn('w:id'), str(bookmark_counter))
-        # heading_para._p.append(bookmark_end)
-
-        for para in re.split(r'\n{2,}', raw):  # paragraph = 2+ line breaks
-            if not para.strip():
-                continue
-            
-            mode = None               # None | 'ul' | 'ol'
-            alpha_id = None
-            for line in para.split('\n'):
-                if SUBPOINT_RE.match(line):
-                    txt = SUBPOINT_RE.sub('', line, 1).strip()
-                    if alpha_id is None:
-                        alpha_id = _new_alpha_list(doc)
-                    # add ;/. automatically, but not after colon
-                    txt_clean = txt.rstrip(' ;.')
-                    if txt_clean.endswith(':'):
-                        suffix = ''
-                    else:
-                        suffix = '.' if _is_last_in_block(line, para) else ';'
-                    p = doc.add_paragraph(txt_clean + suffix)
-                    _apply_numbering(p, alpha_id)      # sets w:numPr + indentation
-                    mode = 'ol'
-                elif BULLET_RE.match(line):
-                    txt = BULLET_RE.sub('', line, 1).strip()
-                    # add ;/. automatically, but not after colon
-                    txt_clean = txt.rstrip(' ;.')
-                    if txt_clean.endswith(':'):
-                        suffix = ''
-                    else:
-                        suffix = '.' if _is_last_in_block(line, para) else ';'
-                    p = doc.add_paragraph(txt_clean + suffix, style='List Bullet')
-                    _apply_indent(p, left=720, hanging=360)   # same indentation as ol
-                    mode = 'ul'
-                else:
-                    # regular text with line breaks
-                    p = doc.add_paragraph()
-                    for i, chunk in enumerate(line.split('\n')):
-                        if i:
-                            p.add_run().add_break()
-                        p.add_run(chunk)
-
-    # --- Footer with page number ---
+def _add_page_numbers(doc):
+    """Adds a centred page number to the footer of every section."""
     for s in doc.sections:
         footer_p = s.footer.paragraphs[0] if s.footer.paragraphs else s.footer.add_paragraph()
         footer_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
         _add_page_number(footer_p)
 
+
+def render_docx(payload, output_path: Path, meta: dict, template: Optional[Path] = None):
+    """
+    Main function for generating Annex IV DOCX document.
+    
+    Args:
+        payload: :class:`Document` model or dictionary with data to fill sections
+        output_path: Path (or binary stream) to save DOCX file
+        template: Optional .docx whose styles, page setup and content the output starts from
+    """
+    document = as_document(payload)
+    doc = _new_document(template)
+
+    # Metadata
+    for name, value in _core_properties(document).items():
+        setattr(doc.core_properties, name, value)
+
+    # Use passed metadata (ensure generation_date is current)
+    meta = meta.copy()
+    meta["generation_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _add_front_matter(doc, meta)
+
+    # --- Main Annex IV sections ---
+    alpha_lists = _AlphaLists(doc)
+    add_paragraph = _body_appender(doc)
+    # resolve style ids once; a lookup by name scans every style per paragraph
+    heading_style_id = doc.styles['Heading 1'].style_id
+    bullet_style_id = doc.styles['List Bullet'].style_id
+    for section in document.sections:
+        if not section.blocks:
+            continue
+        add_paragraph(section.title, heading_style_id)
+
+        for block in section.blocks:
+            if isinstance(block, Paragraph):
+                # regular text
+                add_paragraph().add_run(block.text)
+            elif block.ordered:
+                alpha_id = alpha_lists.new_list(start=block.start)
+                for item in punctuated_items(block):
+                    p = add_paragraph(item.text)
+                    _apply_numbering(p, alpha_id)      # sets w:numPr + indentation
+                    for child in item.children:
+                        p = add_paragraph(child, bullet_style_id)
+                        _apply_indent(p, left=720, hanging=360)   # same indentation as ol
+            else:
+                for item in punctuated_items(block):
+                    p = add_paragraph(item.text, bullet_style_id)
+                    _apply_indent(p, left=720, hanging=360)   # same indentation as ol
+
+    _add_page_numbers(doc)
+
     doc.save(output_path)
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""
+docx_stream.py
+
+Streaming DOCX backend for very large Annex IV documents.
+
+``render_docx`` appends every paragraph through python-docx, which keeps the
+whole document as an lxml tree until it is saved. This backend writes
+``word/document.xml`` into the zip stream block by block instead, so memory
+stays bounded by the document model rather than the output.
+
+Everything that is not section content comes from a skeleton built once per
+process (and per ``--docx-template``) with the same python-docx code
+``render_docx`` uses: styles and page setup, the title and document-control
+table (values are filled in per render), the footer page field and the shared
+lettered-list definition in ``numbering.xml``. Only the paragraphs of the nine
+sections, one ``w:num`` per lettered list and the core properties are written
+per render. Select it with ``ANNEX4AC_DOCX_BACKEND=stream``.
+"""
+
+import os
+import re
+import zipfile
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.coreprops import CoreProperties
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+
+from .constants import DOC_CTRL_FIELDS
+from .docx_generator import (
+    _AlphaLists, _add_front_matter, _add_page_numbers, _core_properties, _new_document, _save_bytes,
+)
+from .document import Paragraph, as_document, punctuated_items
+
+_TOKEN = "@@annex4ac-meta-{}@@"
+_FLUSH_CHARS = 1 << 16
+# XML 1.0 forbids these; python-docx refuses them too
+_INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_RUN_SPLIT_RE = re.compile(r'(\t|\r\n|\n|\r)')
+_IND = '<w:ind w:left="720" w:hanging="360"/>'
+
+
+class _Skeleton:
+    """A rendered empty document split where the streamed content goes."""
+
+    __slots__ = ("entries", "document_name", "numbering_name", "core_name", "head", "tail",
+                 "numbering_head", "numbering_tail", "core_xml", "abstract_id", "first_num",
+                 "heading_style", "bullet_style")
+
+
+@lru_cache(maxsize=8)
+def _build_skeleton(template_key: Optional[tuple]) -> _Skeleton:
+    doc = _new_document(Path(template_key[0]) if template_key else None)
+    _add_front_matter(doc, {key: _TOKEN.format(key) for _, key in DOC_CTRL_FIELDS})
+    _add_page_numbers(doc)
+    alpha = _AlphaLists(doc)
+    doc.core_properties  # make sure the package has a core properties part
+
+    sk = _Skeleton()
+    sk.abstract_id, sk.first_num = alpha.abstract_id, alpha._next_num
+    sk.heading_style = doc.styles['Heading 1'].style_id
+    sk.bullet_style = doc.styles['List Bullet'].style_id
+    sk.document_name = doc.part.partname.lstrip('/')
+    sk.numbering_name = doc.part.numbering_part.partname.lstrip('/')
+    sk.core_name = next(rel.target_part.partname.lstrip('/') for rel in doc.part.package.rels.values()
+                        if rel.reltype == RT.CORE_PROPERTIES)
+
+    with zipfile.ZipFile(BytesIO(_save_bytes(doc))) as zf:
+        sk.entries = tuple((info.filename, info.date_time, zf.read(info)) for info in zf.infolist())
+    parts = {name: data for name, _, data in sk.entries}
+
+    document_xml = parts[sk.document_name].decode('utf-8')
+    cut = document_xml.rindex('<w:sectPr')   # the body's own section properties come last
+    sk.head, sk.tail = document_xml[:cut], document_xml[cut:]
+    numbering_xml = parts[sk.numbering_name].decode('utf-8')
+    cut = numbering_xml.rindex('</w:numbering>')
+    sk.numbering_head, sk.numbering_tail = numbering_xml[:cut], numbering_xml[cut:]
+    sk.core_xml = parts[sk.core_name]
+    return sk
+
+
+def _skeleton(template: Optional[Path] = None) -> _Skeleton:
+    if template is None:
+        return _build_skeleton(None)
+    st = os.stat(template)
+    return _build_skeleton((str(Path(template).resolve()), st.st_mtime_ns, st.st_size))
+
+
+def _run(text: str) -> str:
+    """A ``w:r`` holding ``text``, with tabs and line breaks as python-docx writes them."""
+    if _INVALID_XML_RE.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    out = []
+    for piece in _RUN_SPLIT_RE.split(text):
+        if piece == '\t':
+            out.append('<w:tab/>')
+        elif piece in ('\n', '\r', '\r\n'):
+            out.append('<w:br/>')
+        elif piece:
+            space = ' xml:space="preserve"' if piece != piece.strip() else ''
+            out.append(f'<w:t{space}>{escape(piece)}</w:t>')
+    return f'<w:r>{"".join(out)}</w:r>'
+
+
+def _body(document, sk: _Skeleton, starts: list) -> Iterator[str]:
+    """``w:p`` elements of the nine sections; appends each lettered list's start to ``starts``."""
+    heading = f'<w:p><w:pPr><w:pStyle w:val="{sk.heading_style}"/></w:pPr>'
+    bullet = f'<w:p><w:pPr><w:pStyle w:val="{sk.bullet_style}"/>{_IND}</w:pPr>'
+    for section in document.sections:
+        if not section.blocks:
+            continue
+        yield f'{heading}{_run(section.title)}</w:p>'
+        for block in section.blocks:
+            if isinstance(block, Paragraph):
+                yield f'<w:p>{_run(block.text)}</w:p>'
+            elif block.ordered:
+                num_id = sk.first_num + len(starts)
+                starts.append(block.start)
+                item_p = (f'<w:p><w:pPr><w:numPr><w:ilvl w:val="0"/><w:numId w:val="{num_id}"/>'
+                          f'</w:numPr>{_IND}</w:pPr>')
+                for item in punctuated_items(block):
+                    yield f'{item_p}{_run(item.text) if item.text else ""}</w:p>'
+                    for child in item.children:
+                        yield f'{bullet}{_run(child) if child else ""}</w:p>'
+            else:
+                for item in punctuated_items(block):
+                    yield f'{bullet}{_run(item.text) if item.text else ""}</w:p>'
+
+
+def _numbering(sk: _Skeleton, starts: list) -> Iterator[str]:
+    yield sk.numbering_head
+    for i, start in enumerate(starts):
+        yield (f'<w:num w:numId="{sk.first_num + i}"><w:abstractNumId w:val="{sk.abstract_id}"/>'
+               f'<w:lvlOverride w:ilvl="0"><w:startOverride w:val="{start}"/></w:lvlOverride></w:num>')
+    yield sk.numbering_tail
+
+
+def _write_chunks(zf: zipfile.ZipFile, name: str, chunks):
+    with zf.open(name, 'w') as fh:
+        buf, size = [], 0
+        for chunk in chunks:
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= _FLUSH_CHARS:
+                fh.write(''.join(buf).encode('utf-8'))
+                buf, size = [], 0
+        fh.write(''.join(buf).encode('utf-8'))
+
+
+def _document_chunks(head: str, body: Iterator[str], tail: str) -> Iterator[str]:
+    yield head
+    yield from body
+    yield tail
+
+
+def write_docx(payload, output, meta: dict, template: Optional[Path] = None):
+    """Stream an Annex IV DOCX to ``output`` (path or binary stream); same content as ``render_docx``."""
+    document = as_document(payload)
+    sk = _skeleton(template)
+
+    meta = meta.copy()
+    meta["generation_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    head = sk.head
+    for _, key in DOC_CTRL_FIELDS:
+        head = head.replace(_TOKEN.format(key), escape(str(meta.get(key, "—"))))
+
+    core = parse_xml(sk.core_xml)
+    props = CoreProperties(core)
+    for name, value in _core_properties(document).items():
+        setattr(props, name, value)
+
+    starts = []
+    document_done = numbering_pending = False
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, date_time, data in sk.entries:
+            if name == sk.document_name:
+                _write_chunks(zf, name, _document_chunks(head, _body(document, sk, starts), sk.tail))
+                document_done = True
+                if numbering_pending:
+                    _write_chunks(zf, sk.numbering_name, _numbering(sk, starts))
+            elif name == sk.numbering_name:
+                # needs every list's numId, so it waits for the document part
+                if document_done:
+                    _write_chunks(zf, name, _numbering(sk, starts))
+                else:
+                    numbering_pending = True
+            else:
+                info = zipfile.ZipInfo(name, date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(info, serialize_part_xml(core) if name == sk.core_name else data)
@@ -0,0 +1,194 @@
+"""
+html_generator.py
+
+Module for generating Annex IV HTML documents from the Jinja template.
+"""
+
+from pathlib import Path
+from functools import lru_cache
+from importlib.resources import files
+
+from jinja2 import BaseLoader, ChoiceLoader, Environment, FileSystemBytecodeCache, PackageLoader, TemplateNotFound
+from jinja2 import select_autoescape
+from markupsafe import escape, Markup
+
+from .constants import DOC_CTRL_FIELDS
+from .document import Paragraph, as_document, punctuated_items, section_blocks
+
+DEFAULT_TEMPLATE = "template.html"
+
+
+def listify(text) -> Markup:
+    """
+    Creates HIERARCHICAL structure:
+      (a) Item heading
+          - subitem
+          - subitem
+      (b) ...
+    One <ol class="alpha"> per group; each <li> can contain <ul>.
+    Also processes regular bulleted lists.
+
+    Sections rendered by :func:`_render_html` reach the template as fragments
+    of the document model, built when written out, and pass through unchanged.
+    Other strings are only repaired with ``ftfy`` first, as they always were:
+    the template context is not normalised.
+    """
+    if isinstance(text, (Markup, _SectionHTML)):
+        return text
+    if not text:
+        return Markup("")
+    return Markup(_blocks_html(section_blocks(str(text), normalize=False)))
+
+
+@lru_cache(maxsize=256)
+def _blocks_html(blocks: tuple) -> str:
+    """HTML fragment for one section's blocks.
+
+    Memoised on the (per-text memoised) block tuple, so re-rendering a
+    document in which one section changed (``generate --watch``) only
+    rebuilds that one.
+    """
+    out: list[str] = []
+    for block in blocks:
+        if isinstance(block, Paragraph):
+            out.append(f"<p>{escape(block.text)}</p>")
+        elif block.ordered:
+            li_html = []
+            for item in punctuated_items(block, per_item=True):
+                head = escape(item.text)
+                if item.children:
+                    bullets = ''.join(f"<li>{escape(b)}</li>" for b in item.children)
+                    li_html.append(f"<li>{head}<ul>{bullets}</ul></li>")
+                else:
+                    li_html.append(f"<li>{head}</li>")
+            # the CSS counter ignores <ol start>, so restart it explicitly
+            reset = f' style="counter-reset: item {block.start - 1}"' if block.start > 1 else ''
+            out.append(f"<ol class=\"alpha\"{reset}>{''.join(li_html)}</ol>")
+        else:
+            bullets = ''.join(f"<li>{escape(i.text)}</li>" for i in punctuated_items(block))
+            out.append(f"<ul>{bullets}</ul>")
+    return '\n'.join(out)
+
+
+def _default_tpl() -> str:
+    try:
+        return files("annex4ac").joinpath("templates/template.html").read_text(encoding="utf-8")
+    except Exception:
+        # Fallback to direct file access
+        return Path(__file__).parent.joinpath("templates", "template.html").read_text(encoding="utf-8")
+
+class _PathLoader(BaseLoader):
+    """Load templates named by absolute file path (``--template``).
+
+    Jinja keeps compiled templates in the environment's cache and asks
+    ``uptodate`` before reusing one, so a custom template is compiled once per
+    path and again only after its mtime changes.
+    """
+
+    def get_source(self, environment, template):
+        path = Path(template)
+        if not path.is_absolute():
+            raise TemplateNotFound(template)
+        try:
+            mtime = path.stat().st_mtime_ns
+            source = path.read_text(encoding="utf-8")
+        except OSError:
+            raise TemplateNotFound(template)
+
+        def uptodate() -> bool:
+            try:
+                return path.stat().st_mtime_ns == mtime
+            except OSError:
+                return False
+
+        return source, str(path), uptodate
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that treats an unwritable cache directory as a miss."""
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=1)
+def _environment() -> Environment:
+    """Process-wide Jinja environment.
+
+    Compiled template code is also kept in a bytecode cache under the user
+    cache directory, so new processes (CLI runs, batch workers) load it
+    instead of compiling the template again.
+    """
+    from .cache import cache_dir
+    try:
+        bytecode_cache = _BytecodeCache(str(cache_dir("jinja")))
+    except OSError:
+        bytecode_cache = None
+    env = Environment(
+        loader=ChoiceLoader([_PathLoader(), PackageLoader("annex4ac", "templates")]),
+        autoescape=select_autoescape(['html', 'xml'], default=True),
+        bytecode_cache=bytecode_cache,
+    )
+    env.filters['listify'] = listify  # add filter
+    return env
+
+def _get_template(path=None):
+    """Compiled template: the packaged one, or the file at ``path`` (cached by path and mtime)."""
+    name = str(Path(path).resolve()) if path else DEFAULT_TEMPLATE
+    return _environment().get_template(name)
+
+class _SectionHTML:
+    """A section's HTML, built only when the template writes it out."""
+
+    __slots__ = ("blocks",)
+
+    def __init__(self, blocks: tuple):
+        self.blocks = blocks
+
+    def __html__(self) -> str:
+        return _blocks_html(self.blocks)
+
+    def __bool__(self) -> bool:
+        return bool(self.blocks)
+
+    def __str__(self) -> str:
+        return self.__html__()
+
+
+def _doc_control_html(meta: dict) -> Markup:
+    meta_lines = [f"<p><strong>{label}:</strong> {escape(meta.get(key, '—'))}</p>" for label, key in DOC_CTRL_FIELDS]
+    return Markup('<section id="doc-control"><h2>Document control</h2>' + "\n".join(meta_lines) + "</section>")
+
+def _template_context(data, meta: dict) -> dict:
+    document = as_document(data)
+    context = dict(document.fields)
+    context.setdefault("generation_date", meta.get("generation_date"))
+    for section in document.sections:
+        context[section.key] = _SectionHTML(section.blocks)
+    context["doc_control"] = _doc_control_html(meta)
+    return context
+
+def _iter_html(data, meta: dict, template=None):
+    """Yield the rendered document in chunks, section by section."""
+    return _get_template(template).generate(**_template_context(data, meta))
+
+def _render_html(data, meta: dict, template=None) -> str:
+    """Render HTML from template with data (a :class:`Document` or a parsed spec).
+
+    ``template`` is the path of a custom Jinja template; the packaged one by
+    default. Templates place the document-control block with ``{{ doc_control }}``.
+    """
+    return "".join(_iter_html(data, meta, template))
+
+def _write_html(data, meta: dict, output, template=None):
+    """Stream the rendered document into ``output`` (a path or a binary stream) without building it in memory."""
+    chunks = _iter_html(data, meta, template)
+    if isinstance(output, (str, Path)):
+        with open(output, "w", encoding="utf-8") as f:
+            f.writelines(chunks)
+    else:
+        for chunk in chunks:
+            output.write(chunk.encode("utf-8"))
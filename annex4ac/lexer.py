@@ -0,0 +1,89 @@
+"""
+lexer.py
+
+Single-pass line tokenizer for the list structure used in Annex IV sections.
+
+Every line is classified exactly once into a :class:`Token`; the validator's
+structural index and all three renderers consume the same token stream instead
+of re-running their own regexes. Results are memoised per input text, so the
+validator and a renderer looking at the same section share one scan.
+
+Token kinds:
+
+* ``blank``  – empty or whitespace-only line
+* ``alpha``  – lettered subpoint ``(a)`` (not a roman numeral)
+* ``roman``  – roman numeral item ``(i)``, ``(iv)``; ``(i)``/``(v)``/``(x)`` are
+  also valid letters, see :attr:`Token.is_alpha_item`
+* ``bullet`` – ``-``, ``*``, ``•``, ``●``, ``▪``, ``·``, ``–``, ``—``
+* ``number`` – ``1.`` or ``1)``
+* ``para``   – anything else
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# Marker after leading whitespace has been removed; one regex per line.
+_MARKER_RE = re.compile(
+    r"(?:\((?P<paren>[a-z]+)\)"
+    r"|(?P<bullet>[•●▪·–—\-\*])"
+    r"|(?P<num>\d+)[.)])\s+",
+    re.I,
+)
+_ROMAN_CHARS = frozenset("ivxIVX")
+# Bullets that count as top-level items for the validator (no "●", max 3 spaces).
+_TOP_BULLETS = frozenset("-*•▪·–—")
+_TOP_MAX_INDENT = 3
+
+
+class Token(NamedTuple):
+    kind: str
+    indent: int
+    label: Optional[str]  # letter/numeral/number, or the bullet character
+    text: str             # content after the marker, stripped
+    line: str             # the original line
+
+    @property
+    def is_alpha_item(self) -> bool:
+        """``(a)``-style item as the renderers see it (single letter, roman or not)."""
+        return self.kind == "alpha" or (self.kind == "roman" and len(self.label) == 1)
+
+    @property
+    def is_top_bullet(self) -> bool:
+        """Bullet or numbered item the validator may treat as a top-level point."""
+        if self.indent > _TOP_MAX_INDENT:
+            return False
+        return self.kind == "number" or (self.kind == "bullet" and self.label in _TOP_BULLETS)
+
+    @property
+    def is_nested_item(self) -> bool:
+        return self.kind in ("alpha", "roman") or self.is_top_bullet
+
+
+def _classify(line: str) -> Token:
+    body = line.lstrip()
+    if not body:
+        return Token("blank", 0, None, "", line)
+    indent = len(line) - len(body)
+    m = _MARKER_RE.match(body)
+    if m:
+        text = body[m.end():].strip()
+        paren = m.group("paren")
+        if paren is not None:
+            if all(c in _ROMAN_CHARS for c in paren):
+                return Token("roman", indent, paren.lower(), text, line)
+            if len(paren) == 1:
+                return Token("alpha", indent, paren.lower(), text, line)
+        elif m.group("bullet") is not None:
+            return Token("bullet", indent, m.group("bullet"), text, line)
+        else:
+            return Token("number", indent, m.group("num"), text, line)
+    return Token("para", indent, None, body.strip(), line)
+
+
+@lru_cache(maxsize=512)
+def lex(text: str) -> Tuple[Token, ...]:
+    """Tokenize ``text`` line by line. The caller normalises encoding first."""
+    if not text:
+        return ()
+    return tuple(_classify(ln) for ln in text.splitlines())
@@ -0,0 +1,32 @@
+"""
+normalize.py
+
+Text normalisation shared by the PDF, HTML and DOCX renderers.
+
+Section text from YAML is repaired with ``ftfy``, literal ``\\n`` escapes are
+turned into real line breaks and list markers that a folded or flow scalar
+joined onto one line are put back on lines of their own. The result is
+memoised per input text. :mod:`annex4ac.document` builds the renderers'
+shared document model on top of it.
+"""
+
+import re
+from functools import lru_cache
+
+from ftfy import fix_text
+
+_BULLET_BREAK_RE = re.compile(r'\s+(?=(?:[-•*]\s))')
+_ALPHA_BREAK_RE = re.compile(r'\s+(?=\([a-z]\)\s+)', re.I)
+
+
+@lru_cache(maxsize=256)
+def normalize_text(text: str) -> str:
+    """Repair encoding, unescape ``\\n`` and restore line breaks before list markers."""
+    # Fix text encoding issues (also unifies CRLF/CR line endings)
+    text = fix_text(text)
+    # Unescape \n and normalize line breaks
+    text = text.replace('\\r\\n', '\n').replace('\\r', '\n').replace('\\n', '\n')
+    # Restore logical line breaks for YAML flow scalars
+    text = _BULLET_BREAK_RE.sub('\n', text)
+    return _ALPHA_BREAK_RE.sub('\n', text)
+
@@ -0,0 +1,17 @@
+"""
+patterns.py
+
+Regular expressions for parsing list structures in Annex IV text.
+Kept dependency-free so the validator can use them without pulling in renderers.
+"""
+
+import re
+
+BULLET_RE = re.compile(r'^\s*(?:[\u2022\u25CF\u25AA\u00B7\u2013\u2014\-\*])\s+')
+# allow any letter a-z; roman numerals filtered separately via ROMAN_RE
+SUBPOINT_RE = re.compile(r'^\s*\(([a-z])\)\s+', re.I)
+TOP_BULLET_RE = re.compile(r'^\s{0,3}(?:[-*\u2022\u25AA\u00B7\u2013\u2014]|\d+[\.)])\s+')
+# Roman numerals in Annex IV use only i/v/x combinations like (i), (ii), …
+# Limit the pattern to those letters so that (c), (d) etc. are treated as
+# regular alphabetic subpoints rather than filtered as roman numerals.
+ROMAN_RE = re.compile(r'^\s*\(([ivx]+)\)\s+', re.I)
@@ -0,0 +1,344 @@
+"""
+pdf_generator.py
+
+Module for generating Annex IV PDF documents.
+Contains the ReportLab layout code and the optional PDF/A-2b post-processing.
+"""
+
+import io
+from pathlib import Path
+from functools import lru_cache, partial
+from importlib.resources import files
+from typing import NamedTuple, Optional
+
+import typer
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, KeepTogether
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from .constants import DOC_CTRL_FIELDS
+from .document import Paragraph as ModelParagraph, as_document, punctuated_items, section_blocks
+from .document import punctuate as _punctuate  # noqa: F401  (old import location)
+
+# Attempt to import pikepdf for PDF/A support
+try:
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+
+# Register Liberation Sans (expects LiberationSans-Regular.ttf and LiberationSans-Bold.ttf to be available)
+_FONTS_REGISTERED = False
+
+
+def _register_fonts():
+    """Register the bundled TTFonts with ReportLab (idempotent).
+
+    Deferred until the first PDF render so other commands never parse the fonts.
+    """
+    global _FONTS_REGISTERED
+    if _FONTS_REGISTERED:
+        return
+    try:
+        regular_font_path = files("annex4ac").joinpath("fonts/LiberationSans-Regular.ttf")
+        bold_font_path = files("annex4ac").joinpath("fonts/LiberationSans-Bold.ttf")
+        pdfmetrics.registerFont(TTFont("LiberationSans", str(regular_font_path)))
+        pdfmetrics.registerFont(TTFont("LiberationSans-Bold", str(bold_font_path)))
+    except Exception:
+        # Fallback to direct file access
+        FONTS_DIR = Path(__file__).parent / "fonts"
+        pdfmetrics.registerFont(TTFont("LiberationSans", str(FONTS_DIR / "LiberationSans-Regular.ttf")))
+        pdfmetrics.registerFont(TTFont("LiberationSans-Bold", str(FONTS_DIR / "LiberationSans-Bold.ttf")))
+    _FONTS_REGISTERED = True
+
+
+def _make_ul(items):
+    """Bulleted list from punctuated model ``ListItem``s or plain strings."""
+    body = _get_body_style()
+    return ListFlowable(
+        [Paragraph(getattr(t, "text", t), body) for t in items],
+        bulletType='bullet',
+        leftIndent=18,
+        bulletIndent=0,
+    )
+
+def _make_ol(items, start=1):
+    """Alphabetical list ((a),(b)…). Pass value=…, otherwise ReportLab repeats (a)."""
+    body = _get_body_style()
+    flow_items = []
+    for i, item in enumerate(items, start):
+        head = Paragraph(getattr(item, "text", item), body)
+        children = getattr(item, "children", ())
+        if children:
+            flow_items.append(ListItem([head, _make_ul(children)], value=i))
+        else:
+            flow_items.append(ListItem(head, value=i))
+    return ListFlowable(
+        flow_items,
+        bulletType='a',
+        bulletFormat='(%s)',
+        leftIndent=18,
+        bulletIndent=0,
+        start=start,
+    )
+
+def _blocks_to_flowables(blocks):
+    """Paragraph / ListFlowable per block of the document model."""
+    if not blocks:
+        return [Paragraph('—', _get_body_style())]
+    flows = []
+    for block in blocks:
+        if isinstance(block, ModelParagraph):
+            flows.append(Paragraph(block.text, _get_body_style()))
+        elif block.ordered:
+            flows.append(_make_ol(punctuated_items(block), start=block.start))
+        else:
+            flows.append(_make_ul(punctuated_items(block)))
+    return [KeepTogether(f) for f in flows]
+
+def _text_to_flowables(text: str):
+    """Splits section text into Paragraph / ListFlowable via the document model."""
+    return _blocks_to_flowables(section_blocks(text or ""))
+
+
+class _RenderContext(NamedTuple):
+    """Per-process PDF resources shared by every document: registered fonts and styles."""
+
+    body: ParagraphStyle
+    heading: ParagraphStyle
+
+
+@lru_cache(maxsize=1)
+def _render_context() -> _RenderContext:
+    """Register the fonts and build the paragraph styles once per process.
+
+    ReportLab never mutates a style while laying out a paragraph, so the same
+    instances are safe to share across all flowables and documents.
+    """
+    _register_fonts()
+    body = ParagraphStyle(
+        "Body",
+        fontName="LiberationSans",
+        fontSize=11,
+        leading=14,
+        spaceAfter=8,
+        spaceBefore=0,
+        leftIndent=0,
+        rightIndent=0,
+    )
+    heading = ParagraphStyle(
+        "Heading",
+        fontName="LiberationSans-Bold",
+        fontSize=14,
+        leading=16,
+        spaceAfter=8,
+        spaceBefore=16,
+        leftIndent=0,
+        rightIndent=0,
+        alignment=0,
+        # Add letterSpacing (tracking) via wordSpace, since reportlab does not support letterSpacing directly
+        wordSpace=0.5,  # 0.5 pt letter-spacing (emulated)
+        # small-caps is not supported directly, but can be added via font or manually if needed
+    )
+    return _RenderContext(body=body, heading=heading)
+
+def _get_body_style():
+    return _render_context().body
+
+def _get_heading_style():
+    return _render_context().heading
+
+def _doc_control_pdf(meta: dict):
+    """Returns list of Flowable for PDF 'Document control' block."""
+    flows = [Paragraph("Document control", _get_heading_style())]
+    for label, key in DOC_CTRL_FIELDS:
+        val = meta.get(key, "—")
+        flows.append(Paragraph(f"<b>{label}:</b> {val}", _get_body_style()))
+    flows.append(Spacer(1, 12))
+    return flows
+
+def _header(canvas, doc):
+    import datetime
+    canvas.saveState()
+    canvas.setFont("LiberationSans", 8)
+    schema = getattr(doc, "_schema_version", None)
+    if not schema:
+        # Try to get from payload
+        try:
+            schema = doc._payload.get("_schema_version", "unknown")
+        except Exception:
+            schema = "unknown"
+    canvas.drawRightString(A4[0]-25*mm, A4[1]-15*mm,
+        f"Annex IV — Technical documentation referred to in Article 11(1)")
+    canvas.restoreState()
+
+def _footer(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("LiberationSans", 9)
+    # Center of the bottom margin — page number
+    page_num = canvas.getPageNumber()
+    canvas.drawCentredString(A4[0]/2, 15*mm, str(page_num))
+    canvas.restoreState()
+
+def _header_and_footer(canvas, doc):
+    _header(canvas, doc)
+    _footer(canvas, doc)
+
+def _render_pdf(payload, out_pdf, meta: dict):
+    """Lay out the document (a :class:`Document` or a parsed spec) into ``out_pdf``: a path or a binary file object."""
+    _render_context()  # fonts + styles, once per process
+    document = as_document(payload)
+    target = str(out_pdf) if isinstance(out_pdf, Path) else out_pdf
+    doc = SimpleDocTemplate(target, pagesize=A4,
+                            leftMargin=25*mm, rightMargin=25*mm,
+                            topMargin=20*mm, bottomMargin=20*mm)  # top/bottom margins 20 mm
+    doc._schema_version = document.fields.get("_schema_version", "unknown")
+    doc._payload = document.fields
+    story = []
+    # Insert metadata block
+    story.extend(_doc_control_pdf(meta))
+    
+    # Generate all 9 sections for all enterprise sizes (SME, MID, LARGE)
+    for section in document.sections:
+        story.append(Paragraph(section.title, _get_heading_style()))
+        story.extend(_blocks_to_flowables(section.blocks))
+        story.append(Spacer(1, 12))
+    doc.build(story, onFirstPage=_header_and_footer, onLaterPages=_header_and_footer)
+
+def _embed_output_intent(pdf, icc_bytes, verbose=True):
+    """Embeds OutputIntent with ICC profile for PDF/A-2."""
+    import pikepdf
+    from pikepdf import Name
+    say = typer.secho if verbose else (lambda *a, **k: None)
+    
+    # Create ICC profile as stream
+    icc = pdf.make_stream(icc_bytes)
+    icc[Name("/N")] = 3  # RGB
+    icc[Name("/Alternate")] = Name("/DeviceRGB")
+    say(f"  Created ICC stream: {len(icc_bytes)} bytes", fg=typer.colors.BLUE)
+
+    # Create OutputIntent as dictionary
+    oi = pikepdf.Dictionary()
+    oi[Name("/Type")] = Name("/OutputIntent")
+    oi[Name("/S")] = Name("/GTS_PDFA2")  # PDF/A-2 standard (can also use /GTS_PDFA1)
+    oi[Name("/OutputConditionIdentifier")] = "sRGB IEC61966-2.1"
+    oi[Name("/Info")] = "sRGB IEC61966-2.1 ICC profile"
+    oi[Name("/DestOutputProfile")] = icc
+    
+    # Add OutputIntent to document root
+    pdf.Root[Name("/OutputIntents")] = [oi]
+    say(f"  OutputIntent added to document root", fg=typer.colors.BLUE)
+
+@lru_cache(maxsize=1)
+def _load_icc_bytes() -> Optional[bytes]:
+    """Return the bundled sRGB ICC profile (read once per process)."""
+    try:
+        return files("annex4ac").joinpath("resources/sRGB.icc").read_bytes()
+    except Exception:
+        # Fallback to direct file access
+        icc_path = Path(__file__).parent / "resources" / "sRGB.icc"
+        if not icc_path.exists():
+            return None
+        return icc_path.read_bytes()
+
+def _save_pdfa(pdf_bytes: bytes, dest, icc_bytes: Optional[bytes] = None, verbose: bool = True) -> bool:
+    """Convert an in-memory PDF to PDF/A-2b and save it to ``dest`` (path or binary stream) once.
+
+    Returns ``False`` without writing anything if conversion was skipped or failed.
+    Progress goes to stderr when ``dest`` is a stream (e.g. stdout).
+    """
+    to_stream = not isinstance(dest, (str, Path))
+    say = (lambda *a, **k: typer.secho(*a, err=to_stream, **k)) if verbose else (lambda *a, **k: None)
+    if not PIKEPDF_AVAILABLE:
+        say("pikepdf not installed, skipping PDF/A conversion", fg=typer.colors.YELLOW)
+        return False
+    
+    say("Converting to PDF/A-2b...", fg=typer.colors.BLUE)
+    
+    if icc_bytes is None:
+        icc_bytes = _load_icc_bytes()
+    if icc_bytes is None:
+        say(f"  ICC profile not found: {Path(__file__).parent / 'resources' / 'sRGB.icc'}", fg=typer.colors.RED)
+        return False
+    say(f"  Loaded ICC profile: {len(icc_bytes)} bytes", fg=typer.colors.BLUE)
+
+    try:
+        out = io.BytesIO() if to_stream else None
+        with pikepdf.open(io.BytesIO(pdf_bytes)) as pdf:
+            say(f"  Opened PDF: {len(pdf.pages)} pages", fg=typer.colors.BLUE)
+
+            # Add XMP metadata for PDF/A
+            with pdf.open_metadata() as meta:
+                meta['pdfaid:part'] = "2"
+                meta['pdfaid:conformance'] = "B"
+                meta['dc:title'] = 'Annex IV Technical Documentation'
+                meta['dc:subject'] = 'EU AI Act Compliance'
+                meta['dc:creator'] = ['Annex4AC']
+            say(f"  Added XMP metadata: pdfaid:part=2, pdfaid:conformance=B", fg=typer.colors.BLUE)
+
+            # Add basic document info
+            pdf.docinfo['/Title'] = 'Annex IV Technical Documentation'
+            pdf.docinfo['/Subject'] = 'EU AI Act Compliance'
+            pdf.docinfo['/Creator'] = 'Annex4AC'
+            say(f"  Added document info: Title, Subject, Creator", fg=typer.colors.BLUE)
+
+            # Embed OutputIntent with ICC profile
+            _embed_output_intent(pdf, icc_bytes, verbose=verbose)
+
+            # Save with PDF/A-2b compliance using new pikepdf 9+ approach
+            say(f"  Saving with PDF/A-2b compliance...", fg=typer.colors.BLUE)
+            pdf.save(
+                out if to_stream else str(dest),
+                preserve_pdfa=True,  # don't break PDF/A compliance
+                fix_metadata_version=True,  # fix PDFVersion in XMP if present
+                deterministic_id=True,  # reproducible /ID for same input
+            )
+        if to_stream:
+            # pikepdf needs a seekable target; a pipe gets the finished bytes in one write
+            dest.write(out.getbuffer())
+            size = out.tell()
+        else:
+            size = Path(dest).stat().st_size
+        say(f"  File size after conversion: {size:,} bytes", fg=typer.colors.BLUE)
+
+        say(f"PDF/A-2b conversion completed: {'-' if to_stream else dest}", fg=typer.colors.GREEN)
+        return True
+
+    except Exception as e:
+        say(f"PDF/A conversion failed: {e}", fg=typer.colors.RED)
+        import traceback
+        say(f"Error details: {traceback.format_exc()}", fg=typer.colors.RED)
+        return False
+
+def _to_pdfa(path: Path, icc_bytes: Optional[bytes] = None, verbose: bool = True) -> bool:
+    """Converts an existing PDF file to archival PDF/A-2b in place. Returns ``False`` if skipped or failed."""
+    return _save_pdfa(Path(path).read_bytes(), Path(path), icc_bytes=icc_bytes, verbose=verbose)
+
+def _write_pdf(payload: dict, meta: dict, dest, pdfa: bool = False,
+               icc_bytes: Optional[bytes] = None, verbose: bool = True, jobs: int = 0) -> bool:
+    """Render the PDF to ``dest`` (path or binary stream), writing it exactly once.
+
+    With ``pdfa`` the ReportLab output stays in memory and goes straight to
+    pikepdf. If the conversion does not succeed the plain PDF is written and
+    ``False`` is returned. ``jobs`` > 1 selects the section-per-page layout
+    whose sections are laid out in parallel (see :mod:`annex4ac.pdf_parallel`).
+    """
+    render = _render_pdf
+    if jobs > 1:
+        from .pdf_parallel import render_pdf_sections
+        render = partial(render_pdf_sections, jobs=jobs)
+    if not pdfa:
+        render(payload, dest, meta)
+        return True
+    buf = io.BytesIO()
+    render(payload, buf, meta)
+    if _save_pdfa(buf.getvalue(), dest, icc_bytes=icc_bytes, verbose=verbose):
+        return True
+    if isinstance(dest, (str, Path)):
+        Path(dest).write_bytes(buf.getvalue())
+    else:
+        dest.write(buf.getvalue())
+    return False
@@ -0,0 +1,168 @@
+"""
+pdf_parallel.py
+
+Section-per-page PDF layout, laid out in parallel (``ANNEX4AC_PDF_JOBS``).
+
+ReportLab lays a story out on one thread, and where a section starts depends
+on where the previous one ended, so the flowing layout of
+:func:`~annex4ac.pdf_generator._render_pdf` cannot be split up. This module
+renders a different layout instead: the document-control block and each of
+the nine sections start on a page of their own, with an outline entry per
+part. Within a part the text, styles, header and page numbering are those of
+the flowing render; the page breaks between parts are not, which is why the
+layout is opt-in.
+
+With that layout every part is an independent document, so the parts are laid
+out in worker processes (header only) and the parent then:
+
+* merges the parts with pikepdf in order,
+* stamps the page numbers of the merged document with the same ``_footer``
+  the flowing render uses (drawn once by ReportLab and overlaid per page),
+* builds the outline: one entry per part, at its first page.
+
+Where no pool can be used (pikepdf missing, ``jobs`` <= 1, or already inside
+a worker process) the same layout is built serially in one ReportLab pass, so
+the output has the same pages and outline either way.
+"""
+
+import io
+import multiprocessing as mp
+from pathlib import Path
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas as rl_canvas
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+
+from .document import as_document
+from . import pdf_generator
+from .pdf_generator import (
+    _blocks_to_flowables, _doc_control_pdf, _footer, _get_heading_style, _header, _header_and_footer,
+    _render_context,
+)
+
+# Per-worker state set by the pool initializer.
+_PART_OPTS: dict = {}
+
+
+class _PartsDocTemplate(SimpleDocTemplate):
+    """The page template of :func:`_render_pdf`; part headings become top-level outline entries."""
+
+    def afterFlowable(self, flowable):
+        title = getattr(flowable, "_outline_title", None)
+        if title:
+            key = f"part-{id(flowable)}"
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(title, key, level=0)
+
+
+def _doc_template(target, document) -> _PartsDocTemplate:
+    doc = _PartsDocTemplate(target, pagesize=A4,
+                            leftMargin=25*mm, rightMargin=25*mm,
+                            topMargin=20*mm, bottomMargin=20*mm)
+    doc._schema_version = document.fields.get("_schema_version", "unknown")
+    doc._payload = document.fields
+    return doc
+
+
+def _part_titles(document) -> list:
+    return ["Document control"] + [section.title for section in document.sections]
+
+
+def _story_part(document, meta: dict, index: int) -> list:
+    """Flowables of part ``index``: 0 is the document-control block, 1..9 the sections."""
+    if index == 0:
+        flows = _doc_control_pdf(meta)
+    else:
+        section = document.sections[index - 1]
+        flows = [Paragraph(section.title, _get_heading_style()),
+                 *_blocks_to_flowables(section.blocks), Spacer(1, 12)]
+    flows[0]._outline_title = _part_titles(document)[index]
+    return flows
+
+
+def _render_serial(document, out_pdf, meta: dict):
+    """The section-per-page layout in one ReportLab pass."""
+    story = []
+    for index in range(1 + len(document.sections)):
+        if index:
+            story.append(PageBreak())
+        story.extend(_story_part(document, meta, index))
+    target = str(out_pdf) if isinstance(out_pdf, Path) else out_pdf
+    _doc_template(target, document).build(story, onFirstPage=_header_and_footer,
+                                          onLaterPages=_header_and_footer)
+
+
+def _init_part_worker(document, meta: dict):
+    global _PART_OPTS
+    _render_context()
+    _PART_OPTS = {"document": document, "meta": meta}
+
+
+def _layout_part(index: int) -> bytes:
+    """Lay out one part as its own PDF (header only; page numbers and outline come at merge time)."""
+    document, meta = _PART_OPTS["document"], _PART_OPTS["meta"]
+    buf = io.BytesIO()
+    doc = _doc_template(buf, document)
+    doc.build(_story_part(document, meta, index), onFirstPage=_header, onLaterPages=_header)
+    return buf.getvalue()
+
+
+def _page_numbers(n_pages: int) -> bytes:
+    """``n_pages`` blank A4 pages carrying only the flowing render's footer."""
+    buf = io.BytesIO()
+    c = rl_canvas.Canvas(buf, pagesize=A4)
+    for _ in range(n_pages):
+        _footer(c, None)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _merge(parts, titles, dest):
+    import pikepdf
+
+    sources = [pikepdf.open(io.BytesIO(data)) for data in parts]
+    try:
+        merged = pikepdf.new()
+        starts = []
+        for src in sources:
+            starts.append(len(merged.pages))
+            merged.pages.extend(src.pages)
+        for key, value in sources[0].docinfo.items():
+            merged.docinfo[key] = value
+
+        with pikepdf.open(io.BytesIO(_page_numbers(len(merged.pages)))) as numbers:
+            for page, number in zip(merged.pages, numbers.pages):
+                page.add_overlay(number)
+            with merged.open_outline() as outline:
+                outline.root.extend(pikepdf.OutlineItem(title, start) for title, start in zip(titles, starts))
+            if isinstance(dest, (str, Path)):
+                merged.save(str(dest))
+            else:
+                # pikepdf needs a seekable target; a pipe gets the finished bytes in one write
+                out = io.BytesIO()
+                merged.save(out)
+                dest.write(out.getbuffer())
+    finally:
+        for src in sources:
+            src.close()
+
+
+def render_pdf_sections(payload, out_pdf, meta: dict, jobs: int):
+    """Render the section-per-page layout into ``out_pdf``, laying the parts out in up to ``jobs`` processes."""
+    from .batch import run_pool
+
+    _render_context()
+    document = as_document(payload)
+    if jobs <= 1 or not pdf_generator.PIKEPDF_AVAILABLE or mp.current_process().daemon:
+        return _render_serial(document, out_pdf, meta)
+
+    n_parts = 1 + len(document.sections)
+    parts = [None] * n_parts
+    for idx, data, err in run_pool(_layout_part, list(range(n_parts)), min(jobs, n_parts),
+                                   initializer=_init_part_worker, initargs=(document, meta)):
+        if err:
+            raise RuntimeError(f"PDF layout of part {idx} failed: {err}")
+        parts[idx] = data
+    _merge(parts, _part_titles(document), out_pdf)
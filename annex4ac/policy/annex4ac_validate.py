@@ -6,27 +6,56 @@ Standalone Python validator for Annex IV-as-Code models.
 Replaces Rego-based OPA rules with pure-Python logic.
 """
 
+import os
 import sys
 import json
-import yaml
-from importlib.resources import files
+from functools import lru_cache
+from typing import FrozenSet, Optional
 
-try:
-    from annex4ac.tags import fetch_annex3_tags
-    HIGH_RISK_TAGS = fetch_annex3_tags()
-except Exception:
-    data = (
-        files("annex4ac")
-        .joinpath("resources/high_risk_tags.default.json")
-        .read_text(encoding="utf-8")
-    )
-    HIGH_RISK_TAGS = set(json.loads(data))
+
+# -----------------------------------------------------------------------------
+# Annex III high-risk tags (resolved lazily, never at import time)
+# -----------------------------------------------------------------------------
+
+def _offline_from_env() -> bool:
+    return os.getenv("ANNEX4AC_OFFLINE", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+@lru_cache(maxsize=2)
+def _load_high_risk_tags(offline: bool) -> FrozenSet[str]:
+    try:
+        from annex4ac.tags import fetch_annex3_tags
+        return frozenset(fetch_annex3_tags(offline=offline))
+    except Exception:
+        from annex4ac.tags import _packaged_tags
+        return frozenset(_packaged_tags())
+
+
+def get_high_risk_tags(offline: Optional[bool] = None) -> FrozenSet[str]:
+    """Return the Annex III high-risk tag set, memoised per process.
+
+    ``offline=None`` follows the ``ANNEX4AC_OFFLINE`` environment variable. In
+    offline mode only the local cache or the packaged list is used.
+    """
+    if offline is None:
+        offline = _offline_from_env()
+    return _load_high_risk_tags(bool(offline))
+
+
+def __getattr__(name):
+    # Backwards compatibility for the former import-time constant.
+    if name == "HIGH_RISK_TAGS":
+        return set(get_high_risk_tags())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -----------------------------------------------------------------------------
 # Configuration of rules (translated from Rego)
 # -----------------------------------------------------------------------------
 
+# Bump whenever a rule below changes: cached validation results are keyed by it.
+RULE_ENGINE_VERSION = "1"
+
 PROHIBITED_TAGS = {
     "social_scoring",
     "emotion_recognition",
@@ -59,9 +88,11 @@ def is_blank(x):
 # Main validation logic
 # -----------------------------------------------------------------------------
 
-def validate_payload(payload):
+def validate_payload(payload, high_risk_tags=None):
     denies = []
     warns = []
+    if high_risk_tags is None:
+        high_risk_tags = get_high_risk_tags()
 
     risk = payload.get("risk_level")
     use_cases = payload.get("use_cases", [])
@@ -81,7 +112,7 @@ def validate_payload(payload):
 
     # 3) auto_high_risk
     for t in use_cases:
-        if t in HIGH_RISK_TAGS and risk != "high":
+        if t in high_risk_tags and risk != "high":
             denies.append({
                 "rule":"auto_high_risk",
                 "msg":f"Use‑case '{t}' triggers high‑risk; set risk_level: high."
@@ -96,7 +127,7 @@ def validate_payload(payload):
         denies.append({"rule":"size_missing","msg":"enterprise_size must be set."})
 
     # Determine high-risk flag
-    high_risk = (risk == "high") or any(tag in HIGH_RISK_TAGS for tag in use_cases)
+    high_risk = (risk == "high") or any(tag in high_risk_tags for tag in use_cases)
     is_sme = (size == "sme")
 
     # 6) required_fields
@@ -123,6 +154,8 @@ def main():
         print("Usage: python annex4ac_validate.py <input.yaml>", file=sys.stderr)
         sys.exit(2)
 
+    import yaml
+
     path = sys.argv[1]
     with open(path, encoding="utf-8") as f:
         payload = yaml.safe_load(f)
@@ -0,0 +1,351 @@
+"""
+sarif.py
+
+SARIF 2.1.0 output for ``validate``, ``validate-batch`` and ``sarif-merge``.
+
+Violations are located in the YAML spec through a key-position index built in
+one traversal of the ruamel round-trip document that validation already
+parsed, so the file is not read twice and each lookup is O(1).
+
+:class:`SarifWriter` streams a log one result at a time, so a fleet-wide run
+never holds more than one result in memory; :func:`merge_sarif` combines
+per-shard logs the same way, reading its inputs incrementally.
+"""
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+SARIF_VERSION = "2.1.0"
+SARIF_SCHEMA = "https://schemastore.azurewebsites.net/schemas/json/sarif-2.1.0-rtm.5.json"
+TOOL = {"driver": {"name": "annex4ac/opa", "informationUri": "https://openpolicyagent.org/"}}
+DEFAULT_ARTIFACT = "annex.yaml"
+
+Position = Tuple[int, int]
+
+
+def key_positions(doc) -> Dict[str, Position]:
+    """Map key paths of a ruamel document to 1-based ``(line, column)``.
+
+    Every mapping key is indexed under its dotted path (``a.b.c``) and, for
+    the first occurrence in document order, under its bare name, which is how
+    rule ids refer to sections. A top-level key's path is its bare name, so
+    there the first occurrence wins as well.
+    """
+    def entries(node, prefix):
+        if not (hasattr(node, "lc") and hasattr(node, "items")):
+            return []
+        return [(node, k, v, prefix) for k, v in reversed(list(node.items()))]
+
+    index: Dict[str, Position] = {}
+    stack = entries(doc, "")
+    while stack:
+        # Pre-order: a key, then its subtree, then its next sibling, so the
+        # first bare-name hit is the first occurrence in the file.
+        node, k, v, prefix = stack.pop()
+        path = f"{prefix}.{k}" if prefix else str(k)
+        try:
+            line, col = node.lc.key(k)
+        except (KeyError, TypeError, AttributeError):
+            continue
+        pos = (line + 1, col + 1)
+        if prefix:
+            index[path] = pos
+        index.setdefault(str(k), pos)
+        stack.extend(entries(v, path))
+    return index
+
+
+def load_positions(yaml_path) -> Dict[str, Position]:
+    """Parse ``yaml_path`` with the round-trip loader and index it; ``{}`` on failure."""
+    try:
+        from ruamel.yaml import YAML
+        with open(yaml_path, "r", encoding="utf-8") as f:
+            return key_positions(YAML(typ="rt").load(f))
+    except Exception:
+        return {}
+
+
+def violation_key(violation: dict) -> str:
+    """Key path a violation refers to: an explicit ``key`` or the rule's section."""
+    return violation.get("key") or violation.get("rule", "").replace("_required", "")
+
+
+def artifact_uri(path) -> str:
+    return Path(path).as_posix() if path else DEFAULT_ARTIFACT
+
+
+def make_result(violation: dict, uri: Optional[str], region: Position = (1, 1)) -> dict:
+    line, col = region
+    return {
+        "level": "error",
+        "ruleId": violation["rule"],
+        "message": {"text": violation["msg"]},
+        **({"properties": {"help": violation["help"]}} if violation.get("help") else {}),
+        "locations": [
+            {
+                "physicalLocation": {
+                    "artifactLocation": {"uri": artifact_uri(uri)},
+                    "region": {"startLine": line, "startColumn": col},
+                }
+            }
+        ],
+    }
+
+
+def build_log(violations: Iterable[dict], uri: Optional[str],
+              positions: Dict[str, Position]) -> dict:
+    return {
+        "version": SARIF_VERSION,
+        "$schema": SARIF_SCHEMA,
+        "runs": [{"tool": TOOL, "results": [
+            make_result(v, uri, positions.get(violation_key(v), (1, 1))) for v in violations
+        ]}],
+    }
+
+
+def write_sarif(violations, sarif_path, yaml_path, doc=None):
+    """Write a single-file SARIF log; ``doc`` is the parsed spec if the caller has it."""
+    positions = key_positions(doc) if doc is not None else load_positions(yaml_path)
+    with open(sarif_path, "w", encoding="utf-8") as f:
+        json.dump(build_log(violations, yaml_path, positions), f, ensure_ascii=False, indent=2)
+
+
+def regions(violations: Iterable[dict], positions: Dict[str, Position]) -> list:
+    """``[line, col]`` of every violation, in order (picklable for batch workers)."""
+    return [list(positions.get(violation_key(v), (1, 1))) for v in violations]
+
+
+class SarifWriter:
+    """Write a SARIF log incrementally: runs are opened in turn, results appended one by one.
+
+    Each run gets an ``artifacts`` table of the distinct URIs its results refer
+    to. Use as a context manager; the log is only valid JSON once closed.
+    """
+
+    def __init__(self, path):
+        self._fp: TextIO = open(path, "w", encoding="utf-8")
+        self._fp.write(f'{{"version": {json.dumps(SARIF_VERSION)}, "$schema": {json.dumps(SARIF_SCHEMA)}, "runs": [')
+        self._runs = 0
+        self._results = None   # results written to the open run, None if no run is open
+        self._artifacts: Dict[str, None] = {}
+
+    def begin_run(self, tool: Optional[dict] = None):
+        self.end_run()
+        self._fp.write(("," if self._runs else "") + '\n{"tool": ' + json.dumps(tool or TOOL) + ', "results": [')
+        self._runs += 1
+        self._results = 0
+        self._artifacts = {}
+
+    def add(self, result: dict):
+        if self._results is None:
+            self.begin_run()
+        for loc in result.get("locations", ()):
+            uri = loc.get("physicalLocation", {}).get("artifactLocation", {}).get("uri")
+            if uri:
+                self._artifacts[uri] = None
+        self._fp.write(("," if self._results else "") + "\n" + json.dumps(result, ensure_ascii=False))
+        self._results += 1
+
+    def add_violations(self, violations: Iterable[dict], uri, regions_: Optional[list] = None):
+        for i, v in enumerate(violations):
+            region = tuple(regions_[i]) if regions_ and i < len(regions_) else (1, 1)
+            self.add(make_result(v, uri, region))
+
+    def end_run(self):
+        if self._results is None:
+            return
+        artifacts = [{"location": {"uri": uri}} for uri in self._artifacts]
+        self._fp.write('\n], "artifacts": ' + json.dumps(artifacts, ensure_ascii=False) + "}")
+        self._results = None
+
+    def close(self):
+        if self._fp.closed:
+            return
+        if not self._runs:
+            self.begin_run()
+        self.end_run()
+        self._fp.write("\n]}\n")
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class _JsonStream:
+    """Pull parser over a text stream that materialises one value at a time."""
+
+    CHUNK = 1 << 16
+    _WS = " \t\r\n"
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        if self.eof:
+            return False
+        if self.pos > self.CHUNK:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        data = self.fp.read(max(size or 0, self.CHUNK))
+        if not data:
+            self.eof = True
+            return False
+        self.buf += data
+        return True
+
+    def _skip_ws(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self._WS:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return
+
+    def next_char(self) -> str:
+        self._skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError("unexpected end of SARIF input")
+        ch = self.buf[self.pos]
+        self.pos += 1
+        return ch
+
+    def expect(self, ch: str):
+        got = self.next_char()
+        if got != ch:
+            raise ValueError(f"malformed SARIF: expected {ch!r}, got {got!r}")
+
+    def value(self):
+        self._skip_ws()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value continues past the buffer; grow geometrically.
+                if not self._fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            if end == len(self.buf) and not isinstance(obj, (dict, list, str)) and self._fill():
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return obj
+
+    def object_keys(self) -> Iterator[str]:
+        """Iterate keys of the object whose ``{`` was consumed; the caller consumes each value."""
+        self._skip_ws()
+        if self.pos < len(self.buf) and self.buf[self.pos] == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            ch = self.next_char()
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"malformed SARIF: expected ',' or '}}', got {ch!r}")
+
+    def array_items(self) -> Iterator[None]:
+        """Iterate elements of the array whose ``[`` was consumed; the caller consumes each one."""
+        self._skip_ws()
+        if self.pos < len(self.buf) and self.buf[self.pos] == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            ch = self.next_char()
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"malformed SARIF: expected ',' or ']', got {ch!r}")
+
+
+def _iter_runs(fp: TextIO) -> Iterator[Tuple[str, Optional[dict], Iterator[dict]]]:
+    """Yield ``("results", tool, results)`` and ``("end", tool, None)`` events per run.
+
+    ``results`` must be exhausted before advancing. ``tool`` is ``None`` in a
+    results event when the run lists its results before its tool; the end
+    event always carries the run's tool.
+    """
+    js = _JsonStream(fp)
+    js.expect("{")
+    for key in js.object_keys():
+        if key != "runs":
+            js.value()
+            continue
+        js.expect("[")
+        for _ in js.array_items():
+            js.expect("{")
+            tool = None
+            for rkey in js.object_keys():
+                if rkey == "tool":
+                    tool = js.value()
+                elif rkey == "results":
+                    js.expect("[")
+                    yield "results", tool, (js.value() for _ in js.array_items())
+                else:
+                    js.value()  # artifacts/invocations etc. are rebuilt or dropped
+            yield "end", tool, None
+
+
+def merge_sarif(inputs: Iterable, output) -> Tuple[int, int]:
+    """Merge SARIF logs into ``output`` with one run per distinct tool.
+
+    Inputs are read incrementally and results are spooled to temporary files
+    grouped by tool, so memory stays bounded by the largest single result.
+    ``artifactLocation.index`` references are dropped because every merged run
+    gets a fresh ``artifacts`` table. Returns ``(files, results)``.
+    """
+    spools: Dict[str, list] = {}  # tool key -> [tool, spool file]
+    n_files = n_results = 0
+
+    def spool_for(tool: dict):
+        key = json.dumps(tool, sort_keys=True)
+        if key not in spools:
+            spools[key] = [tool, tempfile.TemporaryFile("w+", encoding="utf-8")]
+        return spools[key][1]
+
+    try:
+        for path in inputs:
+            n_files += 1
+            orphan = None  # results seen before their run's tool
+            with open(path, "r", encoding="utf-8") as fp:
+                for event, tool, results in _iter_runs(fp):
+                    if event == "results":
+                        if tool is not None:
+                            sink = spool_for(tool)
+                        else:
+                            orphan = orphan or tempfile.TemporaryFile("w+", encoding="utf-8")
+                            sink = orphan
+                        for res in results:
+                            for loc in res.get("locations", ()):
+                                loc.get("physicalLocation", {}).get("artifactLocation", {}).pop("index", None)
+                            sink.write(json.dumps(res, ensure_ascii=False) + "\n")
+                            n_results += 1
+                    elif orphan is not None:
+                        if tool is None:
+                            raise ValueError(f"{path}: SARIF run without a tool")
+                        orphan.seek(0)
+                        shutil.copyfileobj(orphan, spool_for(tool))
+                        orphan.close()
+                        orphan = None
+
+        with SarifWriter(output) as writer:
+            for tool, spool in spools.values():
+                writer.begin_run(tool)
+                spool.seek(0)
+                for line in spool:
+                    writer.add(json.loads(line))
+    finally:
+        for _, spool in spools.values():
+            spool.close()
+    return n_files, n_results
@@ -0,0 +1,437 @@
+"""
+server.py
+
+Local validation/render server (``annex4ac serve``) and the thin client the CLI
+uses when such a server is running.
+
+The server keeps everything that is expensive to set up warm for its whole
+lifetime: imported renderers, registered fonts, the compiled Jinja template,
+licence claims, the Annex III tag set and the Annex IV DB snapshot of the
+database it was started with.
+
+It binds to loopback TCP (other interfaces only with ``allow_remote``) or to a
+unix socket only its owner can connect to. Every request except ``/health``
+must carry the random token the server generates at start-up as
+``Authorization: Bearer <token>``; the token is published only through the
+owner-readable (0600) discovery file, so other local users cannot render
+documents under the owner's licence.
+
+Endpoints (JSON in, JSON or document bytes out):
+
+* ``GET  /health``   – liveness and version
+* ``POST /validate`` – ``{"yaml": "...", "path": "...", "use_db": false, ...}``
+* ``POST /generate`` – ``{"yaml": "...", "fmt": "pdf|html|docx", "pdfa": false,
+  "docx_backend": "python-docx|stream", "pdf_jobs": 0}``
+
+Clients find the server and its token through the ``server.json`` file the
+server writes into the user cache directory, or through ``ANNEX4AC_SERVER``
+(``http://host:port`` or ``unix:/path``) plus ``ANNEX4AC_SERVER_TOKEN``.
+``ANNEX4AC_NO_SERVER=1`` disables the client side.
+
+Only the standard library is imported at module level so the client path
+stays cheap.
+"""
+
+import io
+import os
+import hmac
+import json
+import socket
+import secrets
+import ipaddress
+import threading
+import time
+import http.client
+from pathlib import Path
+from typing import Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+MAX_BODY = 64 * 2**20
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 300
+SNAPSHOT_TTL = 60  # seconds between DB change-token checks
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "html": "text/html; charset=utf-8",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def _discovery_file() -> Path:
+    from platformdirs import user_cache_dir
+    return Path(user_cache_dir("annex4ac")) / "server.json"
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, ValueError, TypeError):
+        return False
+    return True
+
+
+# -----------------------------------------------------------------------------
+# Client
+# -----------------------------------------------------------------------------
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+        self.sock = sock
+
+
+def _read_discovery() -> dict:
+    try:
+        info = json.loads(_discovery_file().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return info if isinstance(info, dict) and _pid_alive(info.get("pid")) else {}
+
+
+def server_address() -> Optional[Tuple[str, Optional[str]]]:
+    """Return ``(address, token)`` of a running server, or ``None``."""
+    if os.getenv("ANNEX4AC_NO_SERVER", "").strip().lower() in {"1", "true", "yes", "on"}:
+        return None
+    addr = os.getenv("ANNEX4AC_SERVER")
+    info = _read_discovery()
+    if addr:
+        token = os.getenv("ANNEX4AC_SERVER_TOKEN")
+        if not token and info.get("address") == addr:
+            token = info.get("token")
+        return addr, token
+    if not info.get("address"):
+        return None
+    return info["address"], info.get("token")
+
+
+def _connect(address: str, timeout: float) -> http.client.HTTPConnection:
+    if address.startswith("unix:"):
+        conn = _UnixHTTPConnection(address[len("unix:"):], timeout)
+    else:
+        hostport = address.split("://", 1)[-1].rstrip("/")
+        conn = http.client.HTTPConnection(hostport, timeout=timeout)
+    conn.connect()  # fail fast with the short connect timeout
+    conn.sock.settimeout(REQUEST_TIMEOUT)
+    return conn
+
+
+def request(address: str, method: str, path: str, body: Optional[dict] = None,
+            timeout: float = CONNECT_TIMEOUT, token: Optional[str] = None) -> Tuple[int, str, bytes]:
+    """Send one request; return ``(status, content_type, body)``."""
+    conn = _connect(address, timeout)
+    try:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        conn.request(method, path, body=data, headers=headers)
+        resp = conn.getresponse()
+        return resp.status, resp.getheader("Content-Type", ""), resp.read()
+    finally:
+        conn.close()
+
+
+def try_remote(path: str, body: dict) -> Optional[Tuple[int, str, bytes]]:
+    """POST to a running server; ``None`` if there is none or it is unreachable."""
+    found = server_address()
+    if not found:
+        return None
+    address, token = found
+    try:
+        return request(address, "POST", path, body, token=token)
+    except (OSError, http.client.HTTPException):
+        return None
+
+
+# -----------------------------------------------------------------------------
+# Server
+# -----------------------------------------------------------------------------
+
+class _RequestError(Exception):
+    def __init__(self, status: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+
+
+class ServerState:
+    """Warm, process-wide state shared by all request threads."""
+
+    def __init__(self, db_url: Optional[str] = None, celex_id: Optional[str] = None,
+                 offline: bool = False):
+        self.db_url = db_url
+        self.celex_id = celex_id
+        self.offline = offline
+        self.claims = None
+        self.tags = None
+        self._snapshot = (0.0, None)
+        self._db_lock = threading.Lock()
+        # ReportLab keeps module-level state; one render at a time is safest.
+        self._render_lock = threading.Lock()
+
+    def warm(self, log=print):
+        import typer
+        from .docx_generator import _new_document
+        from .html_generator import _get_template
+        from .pdf_generator import _render_context, _load_icc_bytes
+        from .policy.annex4ac_validate import get_high_risk_tags
+        from .annex4ac import _check_license, _docx_backend
+
+        self.tags = get_high_risk_tags(offline=self.offline)
+        _render_context()
+        _load_icc_bytes()
+        _get_template()
+        _new_document()
+        if _docx_backend() == "stream":
+            from .docx_stream import _skeleton
+            _skeleton()
+        if os.getenv("ANNEX4AC_LICENSE"):
+            try:
+                self.claims = _check_license()
+            except typer.Exit:
+                self.claims = None
+        if self.db_url:
+            self.snapshot()
+        log(f"Warm: {len(self.tags)} Annex III tags, fonts, templates, "
+            f"licence {'ok' if self.claims else 'not available (PDF disabled)'}"
+            + (", DB snapshot" if self.db_url else ""))
+
+    def snapshot(self):
+        """The Annex IV snapshot of the configured database, revalidated every ``SNAPSHOT_TTL``."""
+        from .annex4ac import get_session, load_annex_snapshot
+
+        with self._db_lock:
+            loaded_at, snap = self._snapshot
+            if snap is None or time.monotonic() - loaded_at > SNAPSHOT_TTL:
+                # Revalidation is one change-token query; the text is only
+                # re-read when the regulation actually changed.
+                with get_session(self.db_url) as ses:
+                    snap = load_annex_snapshot(ses, celex_id=self.celex_id)
+                self._snapshot = (time.monotonic(), snap)
+            return snap
+
+    def health(self) -> dict:
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            ver = version("annex4ac")
+        except PackageNotFoundError:
+            ver = "unknown"
+        return {"status": "ok", "pid": os.getpid(), "version": ver, "pdf": bool(self.claims)}
+
+    def validate(self, body: dict) -> dict:
+        from ruamel.yaml import YAML
+        from .annex4ac import _validate_document
+        from .structure import get_index
+
+        text = body.get("yaml")
+        if not isinstance(text, str):
+            raise _RequestError(400, "'yaml' must be a string")
+        kwargs = {
+            "explain": bool(body.get("explain", True)),
+            "stale_after": int(body.get("stale_after") or 0),
+            "strict_age": bool(body.get("strict_age", False)),
+            "high_risk_tags": self.tags,
+        }
+        if body.get("offline") and not self.offline:
+            from .policy.annex4ac_validate import get_high_risk_tags
+            kwargs["high_risk_tags"] = get_high_risk_tags(offline=True)
+        if body.get("use_db"):
+            # Only the database the server was started with: clients must not
+            # point it (and its credentials) at arbitrary hosts.
+            if not self.db_url:
+                raise _RequestError(400, "server was started without a database URL")
+            if body.get("db_url") and body["db_url"] != self.db_url:
+                raise _RequestError(400, "server only serves its configured database URL")
+            if body.get("celex_id") and body["celex_id"] != self.celex_id:
+                raise _RequestError(400, "server only serves its configured CELEX id")
+            try:
+                snap = self.snapshot()
+            except Exception as exc:
+                raise _RequestError(502, f"Failed to load Annex IV from DB: {exc}")
+            kwargs["db_schema"], kwargs["exp_top_counts"] = snap.sections, snap.top_counts
+            kwargs["db_index"] = get_index(snap.sections, snap.version)
+        path = body.get("path") or "annex.yaml"
+        try:
+            payload = YAML(typ="rt").load(text)
+        except Exception as exc:
+            return {"path": path, "violations": [], "warnings": [], "notes": [], "error": str(exc)}
+        return _validate_document(payload, path=path, **kwargs)
+
+    def generate(self, body: dict) -> Tuple[bytes, str]:
+        import yaml
+        from .annex4ac import DOCX_BACKENDS, OUTPUT_FORMATS, _build_doc_meta, _render_format
+
+        fmt = body.get("fmt", "pdf")
+        if fmt not in OUTPUT_FORMATS:
+            raise _RequestError(400, f"Unknown format: {fmt}")
+        # Render with the client's settings, not the server's environment.
+        docx_backend = body.get("docx_backend") or DOCX_BACKENDS[0]
+        if docx_backend not in DOCX_BACKENDS:
+            raise _RequestError(400, f"Unknown DOCX backend: {docx_backend}")
+        if fmt == "pdf" and body.get("pdf_jobs"):
+            # forking a layout pool from a request thread is not safe; the client renders it
+            raise _RequestError(400, "section-per-page PDFs are rendered by the client")
+        if fmt == "pdf" and not self.claims:
+            raise _RequestError(403, "Server has no valid Pro licence; PDF generation is disabled")
+        try:
+            payload = yaml.safe_load(body.get("yaml") or "")
+        except yaml.YAMLError as exc:
+            raise _RequestError(400, f"Invalid YAML: {exc}")
+        if not isinstance(payload, dict):
+            raise _RequestError(400, "YAML document must be a mapping")
+        meta = _build_doc_meta(payload)
+        out = io.BytesIO()
+        with self._render_lock:
+            ok = _render_format(payload, meta, fmt, out, pdfa=bool(body.get("pdfa")),
+                                verbose=False, docx_backend=docx_backend, pdf_jobs=0)
+        if not ok:
+            raise _RequestError(500, "PDF/A conversion failed")
+        return out.getvalue(), CONTENT_TYPES[fmt]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "annex4ac"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "local"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, data: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status: int, obj):
+        self._send(status, json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"),
+                   "application/json")
+
+    def _authorized(self) -> bool:
+        sent = self.headers.get("Authorization") or ""
+        return hmac.compare_digest(sent.encode("utf-8"), f"Bearer {self.server.token}".encode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._json(200, self.server.state.health())
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            if not self._authorized():
+                raise _RequestError(401, "missing or invalid server token")
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                raise _RequestError(413, "request body too large")
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise _RequestError(400, "request body must be JSON")
+            state = self.server.state
+            if self.path == "/validate":
+                self._json(200, state.validate(body))
+            elif self.path == "/generate":
+                data, content_type = state.generate(body)
+                self._send(200, data, content_type)
+            else:
+                raise _RequestError(404, "not found")
+        except _RequestError as exc:
+            self._json(exc.status, {"error": str(exc)})
+        except Exception as exc:
+            self._json(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def make_server(state: ServerState, host: str = "127.0.0.1", port: int = 8765,
+                socket_path: Optional[str] = None, quiet: bool = False,
+                allow_remote: bool = False):
+    """Create (but do not start) a server bound to ``host:port`` or ``socket_path``.
+
+    Raises ``ValueError`` for a non-loopback ``host`` unless ``allow_remote``.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        old_umask = os.umask(0o177)  # socket file 0600 from the moment it exists
+        try:
+            srv = _UnixServer(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        srv.address = f"unix:{socket_path}"
+    else:
+        if not allow_remote and not _is_loopback(host):
+            raise ValueError(f"refusing to listen on non-loopback address {host!r}")
+        srv = _TCPServer((host, port), _Handler)
+        srv.address = f"http://{host}:{srv.server_address[1]}"
+    srv.token = secrets.token_urlsafe(32)
+    srv.state = state
+    srv.quiet = quiet
+    return srv
+
+
+def _write_discovery(path: Path, info: dict):
+    """Write ``info`` to ``path`` readable by the owner only (it holds the token)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.fchmod(fd, 0o600)
+        os.write(fd, json.dumps(info).encode("utf-8"))
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def serve_forever(srv, register: bool = True):
+    """Run ``srv`` until interrupted, advertising it through the discovery file."""
+    discovery = _discovery_file()
+    if register:
+        _write_discovery(discovery, {"address": srv.address, "pid": os.getpid(),
+                                     "token": srv.token})
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        if register:
+            try:
+                if json.loads(discovery.read_text(encoding="utf-8")).get("pid") == os.getpid():
+                    discovery.unlink()
+            except (OSError, ValueError):
+                pass
+        if srv.address.startswith("unix:"):
+            try:
+                os.unlink(srv.address[len("unix:"):])
+            except OSError:
+                pass
@@ -0,0 +1,186 @@
+"""
+structure.py
+
+Structural index of Annex IV section text.
+
+The canonical text from the DB is parsed once into a small tree
+(section → top-level subpoints → nested items) that validation compares user
+documents against. Indexes are memoised in-process by content digest and, when
+a schema version is known, stored as a compact JSON file in the user cache so
+later runs and batch workers skip the parse entirely.
+"""
+
+import re
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Tuple
+
+from .lexer import lex
+
+INDEX_FORMAT = 1
+_MEMO: Dict[str, "AnnexIndex"] = {}
+_MEMO_MAX = 8
+
+
+def normalize_lines(text: str) -> list[str]:
+    if not text:
+        return []
+    from ftfy import fix_text
+    text = fix_text(text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return [ln.rstrip() for ln in text.splitlines()]
+
+
+@dataclass(frozen=True)
+class Subpoint:
+    """A top-level item: ``label`` is the letter (``"a"``) or the bullet marker."""
+
+    label: str
+    text: str
+    children: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SectionIndex:
+    present: bool
+    letters: Tuple[str, ...]
+    items: Tuple[Subpoint, ...]
+
+    @property
+    def n_top(self) -> int:
+        return len(self.items)
+
+    @property
+    def n_sub_first(self) -> int:
+        return len(self.items[0].children) if self.items else 0
+
+    def to_list(self) -> list:
+        return [self.present, list(self.letters),
+                [[it.label, it.text, list(it.children)] for it in self.items]]
+
+    @classmethod
+    def from_list(cls, data: list) -> "SectionIndex":
+        present, letters, items = data
+        return cls(bool(present), tuple(letters),
+                   tuple(Subpoint(lbl, txt, tuple(ch)) for lbl, txt, ch in items))
+
+
+@lru_cache(maxsize=256)
+def parse_section(text: str) -> SectionIndex:
+    """Index one section body.
+
+    Lettered subpoints ``(a)``, ``(b)`` … are the top level; without them the
+    least-indented bullets or ``1.``/``1)`` items are. Nested bullets, roman
+    numerals and letters inside a top-level item become its children.
+    """
+    tokens = lex("\n".join(normalize_lines(text)))
+    letter_idx = [i for i, tok in enumerate(tokens) if tok.kind == "alpha"]
+
+    items = []
+    if letter_idx:
+        bounds = letter_idx + [len(tokens)]
+        for k, start in enumerate(letter_idx):
+            children = tuple(
+                tok.line.strip() for tok in tokens[start + 1:bounds[k + 1]] if tok.is_nested_item
+            )
+            items.append(Subpoint(tokens[start].label, tokens[start].text, children))
+    else:
+        tops = [i for i, tok in enumerate(tokens) if tok.is_top_bullet]
+        if tops:
+            min_indent = min(tokens[i].indent for i in tops)
+            tops = [i for i in tops if tokens[i].indent == min_indent]
+            bounds = tops[1:] + [len(tokens)]
+            for start, end in zip(tops, bounds):
+                children = []
+                for tok in tokens[start + 1:end]:
+                    if tok.is_top_bullet and tok.indent <= min_indent:
+                        break
+                    if tok.is_nested_item:
+                        children.append(tok.line.strip())
+                items.append(Subpoint(tokens[start].label, tokens[start].text, tuple(children)))
+
+    return SectionIndex(
+        present=bool((text or "").strip()),
+        letters=tuple(sp.label for sp in items) if letter_idx else (),
+        items=tuple(items),
+    )
+
+
+@dataclass(frozen=True)
+class AnnexIndex:
+    schema_version: Optional[str]
+    digest: str
+    sections: Mapping[str, SectionIndex]
+
+    def get(self, key: str) -> Optional[SectionIndex]:
+        return self.sections.get(key)
+
+    def to_dict(self) -> dict:
+        return {
+            "format": INDEX_FORMAT,
+            "schema_version": self.schema_version,
+            "digest": self.digest,
+            "sections": {k: v.to_list() for k, v in self.sections.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AnnexIndex":
+        return cls(
+            schema_version=data.get("schema_version"),
+            digest=data["digest"],
+            sections={k: SectionIndex.from_list(v) for k, v in data["sections"].items()},
+        )
+
+
+def sections_digest(sections: Mapping[str, str]) -> str:
+    payload = json.dumps(dict(sections), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def build_index(sections: Mapping[str, str], schema_version: Optional[str] = None,
+                digest: Optional[str] = None) -> AnnexIndex:
+    return AnnexIndex(
+        schema_version=schema_version,
+        digest=digest or sections_digest(sections),
+        sections={k: parse_section((v or "").strip()) for k, v in sections.items()},
+    )
+
+
+def _index_path(schema_version: str):
+    from .cache import cache_dir
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", schema_version)
+    return cache_dir("structure") / f"annex_iv-{safe}.json"
+
+
+def get_index(sections: Mapping[str, str], schema_version: Optional[str] = None) -> AnnexIndex:
+    """Return the index for ``sections``, building it at most once per content.
+
+    With a ``schema_version`` the index is also persisted on disk; the stored
+    digest guards against a version string being reused for different text.
+    """
+    digest = sections_digest(sections)
+    index = _MEMO.get(digest)
+    if index is not None:
+        return index
+
+    if schema_version:
+        from .cache import atomic_write_json, read_json
+        path = _index_path(schema_version)
+        data = read_json(path)
+        if data and data.get("format") == INDEX_FORMAT and data.get("digest") == digest:
+            index = AnnexIndex.from_dict(data)
+        else:
+            index = build_index(sections, schema_version, digest)
+            try:
+                atomic_write_json(path, index.to_dict())
+            except OSError:
+                pass
+    else:
+        index = build_index(sections, digest=digest)
+
+    if len(_MEMO) >= _MEMO_MAX:
+        _MEMO.clear()
+    _MEMO[digest] = index
+    return index
@@ -0,0 +1,73 @@
+"""
+watch.py
+
+Polling file watcher behind ``validate --watch`` and ``generate --watch``.
+
+The process stays alive between saves, so imports, fonts, the compiled
+template, the DB snapshot and the per-section caches (structural index, HTML
+fragments, normalised PDF paragraphs) are all reused; a save only costs
+re-parsing the YAML and re-doing the sections whose text changed. Polling
+``os.stat`` keeps this dependency-free and works for editors that save by
+writing a temporary file and renaming it over the original.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, Optional, Set
+
+POLL_INTERVAL = 0.05  # seconds between stat() calls
+
+
+def _stat_key(path: Path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def watch(path, on_change: Callable[[bytes], None], interval: float = POLL_INTERVAL,
+          stop: Optional[threading.Event] = None):
+    """Call ``on_change(data)`` now and whenever the content of ``path`` changes.
+
+    A change is reported once the file has stopped changing for one poll
+    interval (so half-written saves are skipped) and only if its bytes differ
+    from the last reported version. Runs until ``stop`` is set.
+    """
+    path = Path(path)
+    stop = stop or threading.Event()
+    last_digest = None
+    seen = pending = None
+    while not stop.is_set():
+        key = _stat_key(path)
+        if key is not None and key != seen:
+            if key == pending:
+                seen = key
+                try:
+                    data = path.read_bytes()
+                except OSError:
+                    data = None
+                if data is not None:
+                    digest = hashlib.sha256(data).digest()
+                    if digest != last_digest:
+                        last_digest = digest
+                        on_change(data)
+            else:
+                pending = key
+                if seen is None:
+                    continue  # first look at the file: no need to wait
+        stop.wait(interval)
+
+
+def changed_keys(old: Optional[Mapping], new: Mapping, keys: Iterable[str]) -> Set[str]:
+    """Return the ``keys`` whose values differ between two payloads."""
+    if old is None:
+        return set(keys)
+    return {k for k in keys if old.get(k) != new.get(k)}
+
+
+def elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
@@ -0,0 +1,152 @@
+"""
+bench_docx_numbering.py
+
+Benchmark for lettered lists in the DOCX renderer.
+
+Renders synthetic Annex IV documents holding N short ``(a)``/``(b)`` lists
+and reports render time per list and the size of ``word/numbering.xml`` for:
+
+* the previous numbering (a scan of every ``w:num`` for the next id and a
+  fresh ``w:abstractNum`` per list) with ``doc.add_paragraph``,
+* counter-allocated ids sharing one abstract definition, still with
+  ``doc.add_paragraph``, which scans the body for ``w:sectPr`` per paragraph,
+* the renderer as it is: shared numbering, paragraphs inserted before a
+  ``w:sectPr`` looked up once.
+
+Only the last is linear, so its time per list stays flat as N grows; the
+other two are quadratic and are skipped above ``--legacy-max`` lists.
+
+    python benchmarks/bench_docx_numbering.py            # 1000 .. 16000 lists
+    python benchmarks/bench_docx_numbering.py -l 32000 -n 1 --legacy-max 0
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from annex4ac import docx_generator
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+
+
+def make_payload(n_lists: int) -> dict:
+    per_section = max(1, n_lists // len(SECTION_KEYS))
+    body = []
+    for k in range(per_section):
+        body += [f"Requirement {k} applies as follows:",
+                 f"(a) first condition of requirement {k}",
+                 f"(b) second condition of requirement {k}"]
+    payload = {key: "\n".join(body) for key in SECTION_KEYS}
+    payload["_schema_version"] = "bench"
+    return payload
+
+
+# --- previous behaviour, kept for comparison ---------------------------------
+
+def _legacy_new_alpha_list(doc, start=1):
+    numbering = doc.part.numbering_part.numbering_definitions._numbering
+    nid = str(max([int(x.get(qn('w:numId'))) for x in numbering.findall(qn('w:num'))] or [0]) + 1)
+
+    absNum = OxmlElement('w:abstractNum')
+    absNum.set(qn('w:abstractNumId'), nid)
+    lvl = OxmlElement('w:lvl')
+    lvl.set(qn('w:ilvl'), '0')
+    for tag, val in (('w:numFmt', 'lowerLetter'), ('w:lvlText', '(%1)'), ('w:suff', 'space'),
+                     ('w:start', str(start)), ('w:lvlRestart', '1')):
+        el = OxmlElement(tag)
+        el.set(qn('w:val'), val)
+        lvl.append(el)
+    absNum.append(lvl)
+    numbering.append(absNum)
+
+    num = OxmlElement('w:num')
+    num.set(qn('w:numId'), nid)
+    abs_ref = OxmlElement('w:abstractNumId')
+    abs_ref.set(qn('w:val'), nid)
+    num.append(abs_ref)
+    numbering.append(num)
+    return int(nid)
+
+
+class _LegacyAlphaLists:
+    def __init__(self, doc):
+        self._doc = doc
+
+    def new_list(self, start=1):
+        return _legacy_new_alpha_list(self._doc, start)
+
+
+def _legacy_body_appender(doc):
+    def add(text="", style_id=None):
+        p = doc.add_paragraph(text)
+        if style_id is not None:
+            p._p.style = style_id
+        return p
+    return add
+
+
+@contextmanager
+def patched(**attrs):
+    saved = {name: getattr(docx_generator, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(docx_generator, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(docx_generator, name, value)
+
+
+VARIANTS = (
+    ("max scan + abstractNum per list", True,
+     {"_AlphaLists": _LegacyAlphaLists, "_body_appender": _legacy_body_appender}),
+    ("shared abstractNum, body scan", True, {"_body_appender": _legacy_body_appender}),
+    ("shared abstractNum, cached sectPr", False, {}),
+)
+
+
+def run(payload, out, runs):
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+    docx_generator.render_docx(payload, out, meta)  # warm the document model
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        docx_generator.render_docx(payload, out, meta)
+        samples.append(time.perf_counter() - t0)
+    with zipfile.ZipFile(out) as zf:
+        size = zf.getinfo("word/numbering.xml").file_size
+    return statistics.median(samples), size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-l", "--lists", type=int, action="append", help="lettered lists per document (repeatable)")
+    ap.add_argument("-n", "--runs", type=int, default=3)
+    ap.add_argument("--legacy-max", type=int, default=4000,
+                    help="largest N the quadratic variants are run for (default 4000)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp, "bench.docx")
+        for n in args.lists or [1000, 2000, 4000, 8000, 16000]:
+            payload = make_payload(n)
+            n = len(SECTION_KEYS) * max(1, n // len(SECTION_KEYS))
+            print(f"{n} lettered lists, median of {args.runs} runs")
+            for label, legacy, attrs in VARIANTS:
+                if legacy and n > args.legacy_max:
+                    print(f"  {label:34s} skipped (quadratic)")
+                    continue
+                with patched(**attrs):
+                    sec, size = run(payload, out, args.runs)
+                print(f"  {label:34s} {sec:7.2f} s  {sec / n * 1e6:7.1f} us/list"
+                      f"  numbering.xml {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
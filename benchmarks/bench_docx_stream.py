@@ -0,0 +1,88 @@
+"""
+bench_docx_stream.py
+
+Benchmark for the streaming DOCX backend.
+
+Renders a synthetic Annex IV spec whose ``changes_and_versions`` history has
+N entries (dated bullets, with a lettered breakdown every tenth entry) with
+``render_docx`` (python-docx tree) and ``write_docx``
+(``ANNEX4AC_DOCX_BACKEND=stream``), each in a fresh forked process, and
+reports wall time, entries/second and peak RSS growth. lxml allocates
+outside the Python heap, so RSS is measured rather than ``tracemalloc``.
+
+    python benchmarks/bench_docx_stream.py             # 5k and 20k entries
+    python benchmarks/bench_docx_stream.py -e 50000
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+
+
+def make_payload(n_entries: int) -> dict:
+    payload = {key: f"Summary of {key}.\n(a) first point\n(b) second point" for key in SECTION_KEYS}
+    history = []
+    for k in range(n_entries):
+        history.append(f"- 2024-{k % 12 + 1:02d}-{k % 28 + 1:02d} v1.{k}: updated risk controls and test data, entry {k}")
+        if k % 10 == 9:
+            history += [f"(a) model retrained for release {k}", f"(b) accuracy re-validated for release {k}"]
+    payload["changes_and_versions"] = "\n".join(history)
+    payload["_schema_version"] = "bench"
+    return payload
+
+
+def _rss_kib() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def _measure(backend, payload, out, queue):
+    from annex4ac.docx_generator import render_docx
+    from annex4ac.docx_stream import write_docx
+    from annex4ac.document import build_document
+
+    render = write_docx if backend == "stream" else render_docx
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+    render(build_document({}), out, meta)  # warm the base document / skeleton
+    document = build_document(payload)
+    start_rss = _rss_kib()
+    t0 = time.perf_counter()
+    render(document, out, meta)
+    sec = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((sec, max(0, peak - start_rss), out.stat().st_size))
+
+
+def run(backend, payload, out):
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(backend, payload, out, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-e", "--entries", type=int, action="append", help="change-history entries (repeatable)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp, "bench.docx")
+        for n in args.entries or [5_000, 20_000]:
+            payload = make_payload(n)
+            print(f"{n} change-history entries")
+            for backend in ("python-docx", "stream"):
+                sec, rss, size = run(backend, payload, out)
+                print(f"  {backend:12s} {sec:7.2f} s  {n / sec:9.0f} entries/s"
+                      f"  {rss / 1024:8.1f} MiB peak RSS growth  {size / 2**20:6.1f} MiB docx")
+
+
+if __name__ == "__main__":
+    main()
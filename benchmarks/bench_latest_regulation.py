@@ -0,0 +1,129 @@
+"""
+bench_latest_regulation.py
+
+Benchmark for ``db.get_latest_regulation_id_with_annex``.
+
+Seeds a database with N regulation snapshots (Annex IV rules plus source log
+rows) and compares the single ranked query against the previous per-regulation
+loop (four queries per regulation, sorted in Python). Both must pick the same
+regulation.
+
+    python benchmarks/bench_latest_regulation.py                 # SQLite in a temp dir
+    python benchmarks/bench_latest_regulation.py -r 1000 -n 10
+    python benchmarks/bench_latest_regulation.py --db-url postgresql+psycopg://u:p@h/bench
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from annex4ac.db import (
+    Base, Regulation, RegSourceLog, Rule, _source_priority, _ver_as_dt,
+    get_latest_regulation_id_with_annex,
+)
+
+SOURCES = ("celex_consolidated", "ai_act_original", "ai_act_html", "eurlex_misc")
+
+
+def seed(ses: Session, n_regs: int, rules_per_reg: int = 40, seed_value: int = 0):
+    rnd = random.Random(seed_value)
+    base = datetime(2024, 1, 1)
+    for r in range(n_regs):
+        rid = f"reg{r:05d}"
+        day = timedelta(days=rnd.randrange(700))
+        ses.add(Regulation(
+            id=rid, celex_id=f"3{r:04d}R1689",
+            version=(base + day).strftime("%Y%m%d"),
+            last_updated=(base + day) if rnd.random() < 0.7 else None,
+            effective_date=base + day,
+        ))
+        for i in range(rules_per_reg):
+            ses.add(Rule(
+                id=f"{rid}-{i}", regulation_id=rid,
+                section_code=f"AnnexIV.{i % 9 + 1}.{chr(97 + i // 9)}" if r % 10 else f"Article.{i}",
+                content="text", order_index=i,
+                last_modified=base + day + timedelta(hours=rnd.randrange(48)),
+            ))
+        for j in range(rnd.randrange(3)):
+            ses.add(RegSourceLog(
+                id=f"{rid}-log{j}", regulation_id=rid, source_name=rnd.choice(SOURCES),
+                created_at=base + day + timedelta(days=j),
+            ))
+    ses.commit()
+
+
+def legacy_latest(ses: Session) -> str:
+    """The previous N+1 implementation, kept here for comparison."""
+    regs = ses.execute(
+        select(Rule.regulation_id).where(Rule.section_code.like("AnnexIV%")).group_by(Rule.regulation_id)
+    ).scalars().all()
+    candidates = []
+    for rid in regs:
+        max_rule_ts = ses.execute(select(func.max(Rule.last_modified)).where(Rule.regulation_id == rid)).scalar()
+        max_rule_eff = ses.execute(select(func.max(Rule.effective_date)).where(Rule.regulation_id == rid)).scalar()
+        reg = ses.execute(
+            select(Regulation.version, Regulation.last_updated, Regulation.effective_date).where(Regulation.id == rid)
+        ).one_or_none()
+        reg_version, reg_last, reg_eff = reg if reg else (None, None, None)
+        rsl = ses.execute(
+            select(func.max(RegSourceLog.created_at), func.max(_source_priority()))
+            .where(RegSourceLog.regulation_id == rid)
+        ).first()
+        candidates.append((rid, (
+            (rsl[1] if rsl else 0) or 0,
+            (rsl[0] if rsl else None) or datetime.min,
+            reg_last or datetime.min,
+            reg_eff or datetime.min,
+            (max_rule_ts or max_rule_eff) or datetime.min,
+            _ver_as_dt(reg_version),
+        )))
+    candidates.sort(key=lambda x: x[1], reverse=True)
+    return candidates[0][0]
+
+
+def _time(fn, ses, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn(ses)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-r", "--regulations", type=int, default=300)
+    ap.add_argument("-n", "--runs", type=int, default=5)
+    ap.add_argument("--db-url", help="Use this (empty) database instead of a temporary SQLite file")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.db_url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        eng = create_engine(url)
+        Base.metadata.drop_all(eng)
+        Base.metadata.create_all(eng)
+        with Session(eng) as ses:
+            seed(ses, args.regulations)
+            old_id, old_ms = _time(legacy_latest, ses, args.runs)
+            new_id, new_ms = _time(get_latest_regulation_id_with_annex, ses, args.runs)
+        if args.db_url:
+            Base.metadata.drop_all(eng)
+        eng.dispose()
+
+    print(f"{args.regulations} regulations, median of {args.runs} runs")
+    print(f"  per-regulation loop : {old_ms:9.1f} ms  -> {old_id}")
+    print(f"  single ranked query : {new_ms:9.1f} ms  -> {new_id}")
+    print(f"  speed-up            : {old_ms / new_ms:9.1f}x")
+    if old_id != new_id:
+        raise SystemExit("mismatch: implementations picked different regulations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+bench_lexer.py
+
+Benchmark for the shared list lexer on very long sections.
+
+Builds synthetic Annex IV sections with N lines of lettered subpoints, nested
+bullets, roman items and prose, then times:
+
+* the validator's DB cross-check of one section against itself, with the
+  previous per-helper regex scans (four ftfy passes) vs ``parse_section``;
+* the DOCX block loop on one long list block, previous quadratic
+  ``_is_last_in_block`` vs building the shared document model;
+* ``listify`` (HTML) and a memoised re-lex.
+
+    python benchmarks/bench_lexer.py              # 10k and 50k lines
+    python benchmarks/bench_lexer.py -l 20000 -n 5
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from annex4ac import lexer, structure
+from annex4ac.document import section_blocks
+from annex4ac.html_generator import _blocks_html, listify
+from annex4ac.patterns import BULLET_RE, ROMAN_RE, SUBPOINT_RE, TOP_BULLET_RE
+
+
+def make_section(n_lines: int) -> str:
+    out = []
+    letters = "abcdefghjklmnopqrstuwyz"  # no i/v/x
+    k = 0
+    while len(out) < n_lines:
+        out.append(f"({letters[k % len(letters)]}) subpoint {k} describing the system:")
+        out += [f"  - nested bullet {k}.{j};" for j in range(3)]
+        out += ["  (i) first roman item", "  (ii) second roman item"]
+        out.append(f"Free text paragraph number {k} with some words in it.")
+        out.append("")
+        k += 1
+    return "\n".join(out[:n_lines])
+
+
+# --- previous implementations, kept for comparison --------------------------
+
+def _legacy_count(text):
+    lines = structure.normalize_lines(text)
+    letters = [i for i, ln in enumerate(lines) if SUBPOINT_RE.match(ln) and not ROMAN_RE.match(ln)]
+    if letters:
+        end = letters[1] if len(letters) > 1 else len(lines)
+        block = lines[letters[0] + 1:end]
+        n_top = len(letters)
+    else:
+        return (0, 0)
+    return n_top, sum(1 for ln in block if TOP_BULLET_RE.match(ln) or ROMAN_RE.match(ln) or SUBPOINT_RE.match(ln))
+
+
+def _legacy_letters(text):
+    return [m.group(1).lower() for ln in structure.normalize_lines(text)
+            if (m := SUBPOINT_RE.match(ln)) and not ROMAN_RE.match(ln)]
+
+
+def legacy_validate(db_text, user_text):
+    _legacy_count(db_text), _legacy_count(user_text)
+    _legacy_letters(db_text), _legacy_letters(user_text)
+
+
+def legacy_docx_loop(raw):
+    n = 0
+    for para in re.split(r"\n{2,}", raw):
+        lines = para.split("\n")
+        for line in lines:
+            if SUBPOINT_RE.match(line.lstrip()) or BULLET_RE.match(line):
+                n += line.strip() == para.split("\n")[-1].strip()  # _is_last_in_block
+    return n
+
+
+# --- new code paths ----------------------------------------------------------
+
+def new_validate(db_text, user_text):
+    structure.parse_section.cache_clear()
+    db_sec, user_sec = structure.parse_section(db_text), structure.parse_section(user_text)
+    db_sec.n_sub_first, user_sec.n_top, db_sec.letters, user_sec.letters
+
+
+def new_docx_loop(raw):
+    # One pass builds the punctuated list the DOCX renderer lays out.
+    return sum(len(b.items) for b in section_blocks(raw) if hasattr(b, "items"))
+
+
+def _time(fn, runs, setup=None):
+    samples = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-l", "--lines", type=int, action="append", help="section length (repeatable)")
+    ap.add_argument("-n", "--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    for n in args.lines or [10_000, 50_000]:
+        text = make_section(n)
+        # One long list block (no blank lines) is the DOCX worst case.
+        block = "\n".join(ln for ln in text.splitlines() if ln)
+        cold = lexer.lex.cache_clear
+
+        def cold_model():
+            lexer.lex.cache_clear()
+            section_blocks.cache_clear()
+
+        def cold_html():
+            cold_model()
+            _blocks_html.cache_clear()  # fragments are memoised per section
+        rows = [
+            ("validate: legacy regex helpers", _time(lambda: legacy_validate(text, text), args.runs)),
+            ("validate: parse_section", _time(lambda: new_validate(text, text), args.runs)),
+            ("docx loop: legacy (one block)", _time(lambda: legacy_docx_loop(block), args.runs)),
+            ("docx loop: model (one block)", _time(lambda: new_docx_loop(block), args.runs, setup=cold_model)),
+            ("lex (cold)", _time(lambda: lexer.lex(text), args.runs, setup=cold)),
+            ("lex (memoised)", _time(lambda: lexer.lex(text), args.runs)),
+            ("listify (HTML)", _time(lambda: listify(text), args.runs, setup=cold_html)),
+        ]
+        print(f"{n} lines, median of {args.runs} runs")
+        for label, ms in rows:
+            print(f"  {label:32s} {ms:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+bench_pdf_sections.py
+
+Benchmark for the section-per-page PDF layout (``ANNEX4AC_PDF_JOBS``).
+
+Renders synthetic Annex IV documents whose sections hold thousands of list
+items with the default flowing layout, with the section-per-page layout in one
+pass, and with its document-control block and nine sections laid out in
+worker processes and merged with pikepdf, and reports wall time, pages and
+file size. The speed-up over the one-pass section-per-page render is bounded
+by the slowest section plus the merge, so it needs several CPUs to show.
+
+    python benchmarks/bench_pdf_sections.py             # 5000 and 20000 items, one job per CPU
+    python benchmarks/bench_pdf_sections.py -i 50000 -j 4
+"""
+
+import argparse
+import io
+import os
+import time
+
+import pikepdf
+
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+from annex4ac.document import build_document
+from annex4ac.pdf_generator import _write_pdf
+from annex4ac.pdf_parallel import render_pdf_sections
+
+
+def make_payload(n_items: int) -> dict:
+    per_section = max(1, n_items // len(SECTION_KEYS))
+    body = []
+    for k in range(per_section):
+        if k % 10 == 0:
+            body.append(f"({'abcdefgh'[(k // 10) % 8]}) subpoint {k}")
+        else:
+            body.append(f"- list item {k} with a few words of text")
+    payload = {key: "\n".join(body) for key in SECTION_KEYS}
+    payload["_schema_version"] = "bench"
+    return payload
+
+
+def run(document, jobs):
+    """``jobs`` None: flowing layout; otherwise section-per-page in ``jobs`` processes."""
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+    buf = io.BytesIO()
+    t0 = time.perf_counter()
+    if jobs is None:
+        _write_pdf(document, meta, buf)
+    else:
+        render_pdf_sections(document, buf, meta, jobs=jobs)
+    sec = time.perf_counter() - t0
+    with pikepdf.open(io.BytesIO(buf.getvalue())) as pdf:
+        pages = len(pdf.pages)
+    return sec, pages, len(buf.getvalue())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-i", "--items", type=int, action="append", help="list items per document (repeatable)")
+    ap.add_argument("-j", "--jobs", type=int, default=0, help="layout processes (0 = one per CPU)")
+    args = ap.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    print(f"{os.cpu_count()} CPU(s), {jobs} layout job(s)")
+    for n in args.items or [5000, 20000]:
+        document = build_document(make_payload(n))
+        print(f"{n} list items")
+        for label, j in (("flowing", None), ("per-page serial", 1), ("per-page parallel", max(2, jobs))):
+            sec, pages, size = run(document, j)
+            print(f"  {label:18s} {sec:7.2f} s  {pages:5d} pages  {size / 2**20:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
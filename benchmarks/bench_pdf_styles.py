@@ -0,0 +1,118 @@
+"""
+bench_pdf_styles.py
+
+Benchmark for paragraph-style reuse in the PDF renderer.
+
+Renders synthetic Annex IV documents whose sections hold thousands of list
+items, once with the previous behaviour (a fresh ``ParagraphStyle`` per
+paragraph and list item) and once with the shared per-process render context,
+and reports documents/second, styles built and peak traced memory.
+
+    python benchmarks/bench_pdf_styles.py             # 1000 and 5000 items
+    python benchmarks/bench_pdf_styles.py -i 20000 -n 5
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from reportlab.lib.styles import ParagraphStyle
+
+from annex4ac import pdf_generator
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+
+
+def make_payload(n_items: int) -> dict:
+    per_section = max(1, n_items // len(SECTION_KEYS))
+    body = []
+    for k in range(per_section):
+        if k % 10 == 0:
+            body.append(f"({'abcdefgh'[(k // 10) % 8]}) subpoint {k}")
+        else:
+            body.append(f"- list item {k} with a few words of text")
+    payload = {key: "\n".join(body) for key in SECTION_KEYS}
+    payload["_schema_version"] = "bench"
+    return payload
+
+
+# --- previous behaviour, kept for comparison ---------------------------------
+
+def _legacy_body():
+    return ParagraphStyle("Body", fontName="LiberationSans", fontSize=11, leading=14,
+                          spaceAfter=8, spaceBefore=0, leftIndent=0, rightIndent=0)
+
+
+def _legacy_heading():
+    return ParagraphStyle("Heading", fontName="LiberationSans-Bold", fontSize=14, leading=16,
+                          spaceAfter=8, spaceBefore=16, leftIndent=0, rightIndent=0,
+                          alignment=0, wordSpace=0.5)
+
+
+@contextmanager
+def legacy_styles():
+    saved = pdf_generator._get_body_style, pdf_generator._get_heading_style
+    pdf_generator._get_body_style, pdf_generator._get_heading_style = _legacy_body, _legacy_heading
+    try:
+        yield
+    finally:
+        pdf_generator._get_body_style, pdf_generator._get_heading_style = saved
+
+
+@contextmanager
+def count_styles():
+    counter = {"n": 0}
+    init = ParagraphStyle.__init__
+
+    def counting_init(self, *args, **kwargs):
+        counter["n"] += 1
+        init(self, *args, **kwargs)
+
+    ParagraphStyle.__init__ = counting_init
+    try:
+        yield counter
+    finally:
+        ParagraphStyle.__init__ = init
+
+
+def run(payload, out, runs):
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+    pdf_generator._render_pdf(payload, out, meta)  # warm fonts / caches
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        pdf_generator._render_pdf(payload, out, meta)
+        samples.append(time.perf_counter() - t0)
+    with count_styles() as counter:
+        tracemalloc.start()
+        pdf_generator._render_pdf(payload, out, meta)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return statistics.median(samples), counter["n"], peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-i", "--items", type=int, action="append", help="list items per document (repeatable)")
+    ap.add_argument("-n", "--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp, "bench.pdf")
+        for n in args.items or [1000, 5000]:
+            payload = make_payload(n)
+            with legacy_styles():
+                legacy = run(payload, out, args.runs)
+            shared = run(payload, out, args.runs)
+            print(f"{n} list items, median of {args.runs} runs")
+            for label, (sec, styles, peak) in (("fresh style per paragraph", legacy),
+                                               ("shared render context", shared)):
+                print(f"  {label:28s} {1 / sec:8.2f} docs/s  {styles:7d} styles built"
+                      f"  {peak / 2**20:8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
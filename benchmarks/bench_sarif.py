@@ -0,0 +1,100 @@
+"""
+bench_sarif.py
+
+Benchmark for SARIF output on large specs with many violations.
+
+Builds a YAML spec with N sections (each a small nested mapping) and one
+violation per section, then times the previous ``_write_sarif`` (re-parse the
+file, recursive ``find_key_coords`` per violation) against
+``annex4ac.sarif.write_sarif`` with the document validation already parsed.
+
+    python benchmarks/bench_sarif.py              # 300 and 1000 sections
+    python benchmarks/bench_sarif.py -s 3000 -n 5
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from annex4ac.sarif import write_sarif
+
+
+def make_spec(n_sections: int) -> str:
+    out = []
+    for k in range(n_sections):
+        out.append(f"section_{k}:")
+        out += [f"  meta_{j}:\n    value: {j}\n    note: text {k}.{j}" for j in range(3)]
+    return "\n".join(out) + "\n"
+
+
+# --- previous implementation, kept for comparison ---------------------------
+
+def legacy_write_sarif(violations, sarif_path, yaml_path):
+    key_lines = {}
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        data = YAML(typ="rt").load(f)
+
+    def find_key_coords(node, target):
+        if hasattr(node, "lc") and hasattr(node, "fa"):
+            for k in node:
+                if k == target:
+                    return (node.lc.key(k)[0] + 1, node.lc.key(k)[1] + 1)
+                v = node[k]
+                if isinstance(v, dict):
+                    res = find_key_coords(v, target)
+                    if res:
+                        return res
+        return None
+
+    for v in violations:
+        coords = find_key_coords(data, v["rule"].replace("_required", ""))
+        if coords:
+            key_lines[v["rule"]] = coords
+    results = [{"ruleId": v["rule"], "region": key_lines.get(v["rule"], (1, 1))} for v in violations]
+    with open(sarif_path, "w", encoding="utf-8") as f:
+        json.dump({"runs": [{"results": results}]}, f, indent=2)
+
+
+def _time(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-s", "--sections", type=int, action="append", help="number of sections (repeatable)")
+    ap.add_argument("-n", "--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spec, out = Path(tmp, "spec.yaml"), Path(tmp, "out.sarif")
+        for n in args.sections or [300, 1000]:
+            spec.write_text(make_spec(n), encoding="utf-8")
+            # Worst case for the recursive search: violations for the last sections.
+            violations = [{"rule": f"section_{k}_required", "msg": "missing"} for k in reversed(range(n))]
+            t0 = time.perf_counter()
+            doc = YAML(typ="rt").load(spec.read_text(encoding="utf-8"))
+            parse_ms = (time.perf_counter() - t0) * 1000
+            rows = [
+                ("legacy: re-parse + per-violation search",
+                 _time(lambda: legacy_write_sarif(violations, out, spec), args.runs)),
+                ("write_sarif: parsed doc + key index",
+                 _time(lambda: write_sarif(violations, out, str(spec), doc=doc), args.runs)),
+            ]
+            print(f"{n} sections / {n} violations, median of {args.runs} runs "
+                  f"(validation parse, shared: {parse_ms:.0f} ms)")
+            for label, ms in rows:
+                print(f"  {label:42s} {ms:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
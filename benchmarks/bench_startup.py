@@ -0,0 +1,124 @@
+"""
+bench_startup.py
+
+Startup benchmark for the annex4ac CLI.
+
+Runs each command in a fresh interpreter (as a shell or pre-commit hook would)
+and reports wall-clock time, total import time from ``-X importtime`` and which
+heavy third-party packages the command pulled in.
+
+    python benchmarks/bench_startup.py            # 5 runs per command
+    python benchmarks/bench_startup.py -n 20 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HEAVY = (
+    "reportlab", "docx", "bs4", "requests", "jinja2", "ftfy",
+    "pikepdf", "sqlalchemy", "pydantic_settings",
+)
+
+SPEC = """\
+system_overview: "(a) purpose"
+development_process: "design"
+system_monitoring: "monitoring"
+performance_metrics: "metrics"
+risk_management: "risk"
+changes_and_versions: "changes"
+standards_applied: "standards"
+compliance_declaration: "declaration"
+post_market_plan: "plan"
+enterprise_size: sme
+risk_level: high
+use_cases: []
+placed_on_market: 2024-01-01T00:00:00
+last_updated: 2024-06-01T00:00:00
+"""
+
+RUNNER = (
+    "import sys; sys.argv = ['annex4ac'] + sys.argv[1:]; "
+    "from annex4ac import app; app()"
+)
+
+
+def _scenarios(spec: Path):
+    return {
+        "--help": ["--help"],
+        "validate --help": ["validate", "--help"],
+        "validate": ["validate", str(spec)],
+        "generate --help": ["generate", "--help"],
+    }
+
+
+def _parse_importtime(stderr: str):
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2].rstrip()
+        if len(name) - len(name.lstrip()) == 1:  # top-level import
+            total_us += cumulative
+        modules.add(name.strip().split(".")[0])
+    return total_us / 1000, sorted(m for m in HEAVY if m in modules)
+
+
+def run(repeat: int):
+    env = dict(os.environ, ANNEX4AC_OFFLINE="1")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = Path(tmp) / "spec.yaml"
+        spec.write_text(SPEC, encoding="utf-8")
+        for name, argv in _scenarios(spec).items():
+            walls, imports, heavy = [], [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                proc = subprocess.run(
+                    [sys.executable, "-X", "importtime", "-c", RUNNER, *argv],
+                    capture_output=True, text=True, env=env,
+                )
+                walls.append((time.perf_counter() - t0) * 1000)
+                import_ms, heavy = _parse_importtime(proc.stderr)
+                imports.append(import_ms)
+            results[name] = {
+                "wall_ms_median": round(statistics.median(walls), 1),
+                "wall_ms_min": round(min(walls), 1),
+                "import_ms_median": round(statistics.median(imports), 1),
+                "heavy_modules": heavy,
+            }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    ap.add_argument("-n", "--repeat", type=int, default=5)
+    ap.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = ap.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'command':<18} {'wall median':>12} {'wall min':>10} {'imports':>10}  heavy modules")
+    for name, r in results.items():
+        print(
+            f"{name:<18} {r['wall_ms_median']:>10.1f}ms {r['wall_ms_min']:>8.1f}ms "
+            f"{r['import_ms_median']:>8.1f}ms  {', '.join(r['heavy_modules']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import pytest
+
+from annex4ac.constants import SECTION_KEYS
+
+
+@pytest.fixture(autouse=True)
+def _isolated_env(monkeypatch, tmp_path_factory):
+    # Keep CLI tests independent of an `annex4ac serve` running on this machine
+    # and of the user's on-disk caches.
+    monkeypatch.setenv("ANNEX4AC_NO_SERVER", "1")
+    monkeypatch.setenv("ANNEX4AC_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+
+
+def _spec_text(section: str = "{key} text", **overrides) -> str:
+    """YAML of a valid spec: every section is ``section`` formatted with its key, then ``overrides``."""
+    data = {key: section.format(key=key) for key in SECTION_KEYS}
+    data.update(
+        enterprise_size="sme",
+        risk_level="high",
+        use_cases=[],
+        placed_on_market="2024-01-01T00:00:00",
+        last_updated="2024-06-01T00:00:00",
+    )
+    data.update(overrides)
+    lines = []
+    for k, v in data.items():
+        lines.append(f"{k}: {v!r}" if not isinstance(v, list) else f"{k}: []")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def spec_text():
+    """``spec_text(section="{key} text", **overrides)`` -> spec YAML."""
+    return _spec_text
+
+
+@pytest.fixture
+def write_spec():
+    """``write_spec(path, section="{key} text", **overrides)`` writes a spec and returns ``path``."""
+    def write(path, section: str = "{key} text", **overrides):
+        path.write_text(_spec_text(section, **overrides))
+        return path
+    return write
@@ -11,3 +11,33 @@ def test_annex3_offline_fallback(monkeypatch, tmp_path):
     tags = fetch_annex3_tags(cache_path=str(cache), cache_days=14)
     assert "biometric_id" in tags and len(tags) >= 8
     assert cache.exists() is False
+
+
+def test_annex3_offline_mode_never_fetches(monkeypatch, tmp_path):
+    def boom(*a, **k):
+        raise AssertionError("network used in offline mode")
+    monkeypatch.setattr("annex4ac.tags._fetch_html", boom)
+
+    cache = tmp_path / "tags.json"
+    assert "biometric_id" in fetch_annex3_tags(cache_path=str(cache), cache_days=0, offline=True)
+
+    cache.write_text('["custom_tag"]')
+    # a stale cache is still used when offline
+    assert fetch_annex3_tags(cache_path=str(cache), cache_days=0, offline=True) == {"custom_tag"}
+
+
+def test_validator_import_is_network_free(monkeypatch):
+    import importlib
+    import annex4ac.policy.annex4ac_validate as policy
+
+    calls = []
+    monkeypatch.setattr("annex4ac.tags._fetch_html", lambda url: calls.append(url))
+    importlib.reload(policy)
+    assert calls == []
+
+    monkeypatch.setenv("ANNEX4AC_OFFLINE", "1")
+    policy._load_high_risk_tags.cache_clear()
+    denies, _ = policy.validate_payload({"risk_level": "limited", "use_cases": ["biometric_id"]})
+    assert any(d["rule"] == "auto_high_risk" for d in denies)
+    assert calls == []
+    assert policy.get_high_risk_tags() is policy.get_high_risk_tags()
@@ -0,0 +1,89 @@
+import pickle
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from annex4ac import db
+from annex4ac.db import (
+    Base, Regulation, Rule, get_expected_top_counts, load_annex_iv_from_db, load_annex_snapshot,
+)
+
+
+def _engine(path):
+    eng = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(eng, "connect")
+    def _regexp(dbapi_conn, _):
+        # Postgres function used for ordering; SQLite needs a Python stand-in.
+        dbapi_conn.create_function("regexp_replace", 3, lambda s, p, r: re.sub(p, r, s or ""))
+
+    return eng
+
+
+@pytest.fixture
+def rules_db(tmp_path):
+    eng = _engine(tmp_path / "rules.db")
+    Base.metadata.create_all(eng)
+    with Session(eng) as ses:
+        ses.add_all([
+            Regulation(id="r1", celex_id="32024R1689", version="20240712"),
+            Rule(id="1", regulation_id="r1", section_code="AnnexIV.1", content="General",
+                 last_modified=datetime(2024, 7, 1)),
+            Rule(id="2", regulation_id="r1", section_code="AnnexIV.1.a", content="(a) purpose",
+                 order_index=1, last_modified=datetime(2024, 7, 1)),
+            Rule(id="3", regulation_id="r1", section_code="AnnexIV.1.b", content="(b) interaction",
+                 order_index=2, last_modified=datetime(2024, 7, 1)),
+        ])
+        ses.commit()
+    return eng
+
+
+def test_snapshot_reused_until_change_token_moves(rules_db):
+    with Session(rules_db) as ses:
+        first = load_annex_iv_from_db(ses)
+        assert "(b) interaction" in first["system_overview"]
+
+        # Content edit without a last_modified bump: token unchanged, cache wins.
+        ses.get(Rule, "3").content = "(b) edited"
+        ses.commit()
+        assert load_annex_iv_from_db(ses) == first
+
+        ses.get(Rule, "3").last_modified = datetime(2024, 8, 1)
+        ses.commit()
+        assert "(b) edited" in load_annex_iv_from_db(ses)["system_overview"]
+
+
+def test_falls_back_to_last_snapshot_when_db_unreachable(rules_db, tmp_path):
+    with Session(rules_db) as ses:
+        snap = load_annex_snapshot(ses, celex_id="32024R1689")
+        assert not snap.stale
+
+    dead = create_engine(f"sqlite:///{tmp_path / 'missing' / 'rules.db'}")
+    with Session(dead) as ses:
+        cached = load_annex_snapshot(ses, celex_id="32024R1689")
+        assert cached.stale and cached.regulation_id == "r1"
+        assert cached == snap
+        assert get_expected_top_counts(ses, celex_id="32024R1689") == {"system_overview": 2}
+        with pytest.raises(OperationalError):
+            load_annex_snapshot(ses, celex_id="OTHER")
+
+
+def test_snapshot_resolves_once_and_pickles(rules_db):
+    with Session(rules_db) as ses:
+        snap = load_annex_snapshot(ses)
+    assert snap.version == "20240712"
+    assert dict(snap.top_counts) == {"system_overview": 2}
+    with pytest.raises(TypeError):
+        snap.sections["system_overview"] = "changed"
+    assert pickle.loads(pickle.dumps(snap)) == snap
+
+
+def test_cache_can_be_disabled(rules_db, monkeypatch):
+    monkeypatch.setenv("ANNEX4AC_DB_CACHE", "0")
+    with Session(rules_db) as ses:
+        load_annex_iv_from_db(ses)
+    assert not db._snapshot_path("r1").exists()
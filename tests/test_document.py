@@ -0,0 +1,83 @@
+import json
+import pickle
+
+import pytest
+
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+from annex4ac.document import Document, ListBlock, Paragraph, build_document, punctuated_items, section_blocks
+from annex4ac.html_generator import listify
+
+
+def test_section_blocks_groups_lists_and_punctuates():
+    blocks = section_blocks("Intro\\n(a) first\n- one\n- two:\n\n(b) second\n\n- loose\n- end.")
+
+    assert isinstance(blocks[0], Paragraph) and blocks[0].text == "Intro"
+    ol = blocks[1]
+    assert isinstance(ol, ListBlock) and ol.ordered and ol.start == 1
+    # the blank line does not restart the lettering
+    assert [i.text for i in ol.items] == ["first", "second"]
+    assert ol.items[1].children == ("loose", "end.")
+
+    # DOCX/PDF: every line in reading order
+    items = punctuated_items(ol)
+    assert [i.text for i in items] == ["first;", "second;"]
+    assert items[0].children == ("one;", "two:")
+    assert items[1].children == ("loose;", "end.")
+    # HTML: heads as written, bullets per head
+    items = punctuated_items(ol, per_item=True)
+    assert [i.text for i in items] == ["first", "second"]
+    assert items[0].children == ("one;", "two:")
+
+
+def test_paragraph_ends_bullets_and_letters_keep_label():
+    blocks = section_blocks("- a\n- b\nText\n- c\n\n(c) third")
+    assert [(getattr(b, "ordered", None), [i.text for i in punctuated_items(b)] if isinstance(b, ListBlock) else [])
+            for b in blocks] == [
+        (False, ["a;", "b."]), (None, []), (False, ["c."]), (True, ["third."]),
+    ]
+    assert blocks[3].start == 3
+
+
+def test_nested_list_html_matches_baseline_listify():
+    html = listify("Intro\n(a) first\n- one\n- two:\n(b) second\n- alpha\n- beta\n\n- loose\n- end.")
+
+    assert str(html) == (
+        '<p>Intro</p>\n'
+        '<ol class="alpha"><li>first<ul><li>one;</li><li>two:</li></ul></li>'
+        '<li>second<ul><li>alpha;</li><li>beta;</li><li>loose;</li><li>end.</li></ul></li></ol>'
+    )
+
+
+def test_document_round_trips_through_json_and_pickle(tmp_path):
+    payload = {key: f"{key}\n(a) x\n- y" for key in SECTION_KEYS}
+    payload.update(risk_level="high", _schema_version="20240613")
+    doc = build_document(payload)
+
+    for restored in (Document.from_dict(json.loads(json.dumps(doc.to_dict()))),
+                     pickle.loads(pickle.dumps(doc))):
+        assert restored.to_dict() == doc.to_dict()
+        assert restored.fields["risk_level"] == "high"
+
+    from annex4ac.html_generator import _render_html
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+    restored = Document.from_dict(doc.to_dict())
+    assert _render_html(restored, meta) == _render_html(payload, meta)
+
+
+@pytest.mark.parametrize("text, html", [
+    # a blank line ends a bulleted list
+    ("- alpha\n- beta\n\n- gamma", '<ul><li>alpha;</li><li>beta.</li></ul>\n<ul><li>gamma.</li></ul>'),
+    # raw strings are not unescaped: a literal \n stays in one paragraph
+    ("a\\nb", '<p>a\\nb</p>'),
+    ("(a) x;\n\n(b) y.", '<ol class="alpha"><li>x;</li><li>y.</li></ol>'),
+    ("(a) x\nplain\n- q", '<ol class="alpha"><li>x</li></ol>\n<p>plain</p>\n<ul><li>q.</li></ul>'),
+])
+def test_listify_matches_baseline_html(text, html):
+    assert str(listify(text)) == html
+
+
+def test_listify_keeps_letter_of_first_item():
+    # Changed on purpose: the baseline restarted the CSS counter, so (c) (d) printed as (a) (b).
+    assert str(listify("(c) x\n(d) y")) == (
+        '<ol class="alpha" style="counter-reset: item 2"><li>x</li><li>y</li></ol>'
+    )
@@ -0,0 +1,36 @@
+import zipfile
+
+from lxml import etree
+
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+from annex4ac.docx_generator import render_docx
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def test_lettered_lists_share_one_abstract_definition(tmp_path):
+    payload = {key: "Intro\n(a) first\n(b) second\nMore text\n(c) third" for key in SECTION_KEYS}
+    out = tmp_path / "spec.docx"
+    render_docx(payload, out, {key: "x" for _, key in DOC_CTRL_FIELDS})
+
+    with zipfile.ZipFile(out) as zf:
+        numbering = etree.fromstring(zf.read("word/numbering.xml"))
+        body = etree.fromstring(zf.read("word/document.xml"))
+
+    used = [int(n.get(f"{W}val")) for n in body.iter(f"{W}numId")]
+    nums = {int(n.get(f"{W}numId")): n for n in numbering.iter(f"{W}num")}
+    lists = sorted(set(used))
+    assert len(lists) == 2 * len(SECTION_KEYS)
+    # ids come from a counter: consecutive, one per list
+    assert lists == list(range(lists[0], lists[0] + len(lists)))
+
+    abstract_ids = {nums[i].find(f"{W}abstractNumId").get(f"{W}val") for i in lists}
+    assert len(abstract_ids) == 1
+    abstract = [a for a in numbering.iter(f"{W}abstractNum")
+                if a.get(f"{W}abstractNumId") in abstract_ids]
+    assert len(abstract) == 1
+    assert abstract[0].find(f"{W}lvl/{W}numFmt").get(f"{W}val") == "lowerLetter"
+
+    # each list restarts the lettering; "(c) third" starts at c
+    starts = [int(nums[i].find(f"{W}lvlOverride/{W}startOverride").get(f"{W}val")) for i in lists]
+    assert starts == [1, 3] * len(SECTION_KEYS)
@@ -0,0 +1,42 @@
+import re
+import zipfile
+
+from docx import Document
+from typer.testing import CliRunner
+
+from annex4ac.annex4ac import app
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+from annex4ac.docx_generator import render_docx
+from annex4ac.docx_stream import write_docx
+
+_DATE_RE = re.compile(rb"\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\dZ?")
+
+
+def test_stream_backend_writes_the_same_parts_as_python_docx(tmp_path):
+    payload = {key: "" for key in SECTION_KEYS}
+    payload["system_overview"] = "Intro & <x>\n(a) first\n- sub\n(b) second\n\n-  b1\twith tab\nText\n(c) third"
+    payload["changes_and_versions"] = "\n".join(f"- v1.{k} change {k}" for k in range(50))
+    payload["retention_until"] = "2035-01-01"
+    meta = {key: "v & <w>" for _, key in DOC_CTRL_FIELDS}
+
+    render_docx(payload, tmp_path / "tree.docx", meta)
+    write_docx(payload, tmp_path / "stream.docx", meta)
+
+    with zipfile.ZipFile(tmp_path / "tree.docx") as tree, zipfile.ZipFile(tmp_path / "stream.docx") as stream:
+        assert stream.namelist() == tree.namelist()
+        for name in tree.namelist():
+            # only the generation timestamps differ
+            assert _DATE_RE.sub(b"", stream.read(name)) == _DATE_RE.sub(b"", tree.read(name)), name
+
+
+def test_generate_with_stream_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANNEX4AC_DOCX_BACKEND", "stream")
+    spec = tmp_path / "spec.yaml"
+    spec.write_text("\n".join(f"{key}: '(a) {key} text'" for key in SECTION_KEYS) + "\n")
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "docx"])
+
+    assert result.exit_code == 0, result.output
+    doc = Document(tmp_path / "spec.docx")
+    assert any(p.text == "system_overview text." for p in doc.paragraphs)
+    assert "PAGE" in doc.sections[0].footer._element.xml
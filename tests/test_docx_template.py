@@ -0,0 +1,51 @@
+from docx import Document
+from docx.shared import Cm
+from typer.testing import CliRunner
+
+from annex4ac import docx_generator
+from annex4ac.annex4ac import app
+
+SECTION = "(a) {key} text\n- bullet"
+
+
+def test_renders_start_from_shared_styled_base():
+    first, second = docx_generator._new_document(), docx_generator._new_document()
+    assert first.element is not second.element
+    assert first.styles['Normal'].font.name == 'Times New Roman'
+    assert round(first.sections[0].left_margin.cm, 2) == 2.5
+    assert 'List Bullet' in first.styles
+    assert docx_generator._base_docx_bytes.cache_info().misses == 1
+
+
+def test_generate_with_corporate_docx_template(tmp_path, write_spec):
+    corporate = Document()
+    corporate.styles['Normal'].font.name = 'Arial'
+    corporate.sections[0].left_margin = Cm(1)
+    corporate.add_paragraph("ACME Corp letterhead")
+    for name in ('Heading 2', 'List Bullet'):  # never used, so Word would not store them
+        el = corporate.styles[name].element
+        el.getparent().remove(el)
+    tpl = tmp_path / "acme.docx"
+    corporate.save(tpl)
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "docx", "--docx-template", str(tpl)])
+
+    assert result.exit_code == 0, result.output
+    out = Document(tmp_path / "spec.docx")
+    assert out.paragraphs[0].text == "ACME Corp letterhead"
+    assert out.styles['Normal'].font.name == 'Arial'
+    assert round(out.sections[0].left_margin.cm, 2) == 1
+    assert 'List Bullet' in out.styles
+    assert any(p.style.name == 'List Bullet' and p.text == "bullet." for p in out.paragraphs)
+
+
+def test_docx_template_rejected_for_other_formats(tmp_path, write_spec):
+    tpl = tmp_path / "acme.html"
+    tpl.write_text("x")
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "html", "--docx-template", str(tpl)])
+
+    assert result.exit_code != 0
+    assert not (tmp_path / "spec.html").exists()
@@ -1,6 +1,7 @@
 import os
 from typer.testing import CliRunner
 from annex4ac.annex4ac import app
+from annex4ac.db import AnnexSnapshot
 
 
 def test_fetch_schema_db(monkeypatch, tmp_path):
@@ -15,15 +16,16 @@ def test_fetch_schema_db(monkeypatch, tmp_path):
     def fake_get_session(url):
         return DummySession()
 
-    def fake_load_annex_iv_from_db(ses, regulation_id=None, celex_id=None):
-        return {"system_overview": "stub"}
-
-    def fake_get_schema_version_from_db(ses, regulation_id=None, celex_id=None):
-        return "20240101"
+    def fake_load_annex_snapshot(ses, regulation_id=None, celex_id=None):
+        return AnnexSnapshot(
+            regulation_id="reg",
+            sections={"system_overview": "stub"},
+            top_counts={},
+            version="20240101",
+        )
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", fake_get_session)
-    monkeypatch.setattr("annex4ac.annex4ac.load_annex_iv_from_db", fake_load_annex_iv_from_db)
-    monkeypatch.setattr("annex4ac.annex4ac.get_schema_version_from_db", fake_get_schema_version_from_db)
+    monkeypatch.setattr("annex4ac.annex4ac.load_annex_snapshot", fake_load_annex_snapshot)
     monkeypatch.setenv("HOME", str(tmp_path))
     monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / ".cache"))
 
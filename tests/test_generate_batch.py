@@ -0,0 +1,104 @@
+import os
+import signal
+
+from typer.testing import CliRunner
+from annex4ac.annex4ac import app
+from annex4ac.batch import run_pool
+from annex4ac.constants import SECTION_KEYS
+
+SECTION = "(a) {key} first\n\n(b) {key} second"
+
+
+def _square(x):
+    return x * x
+
+
+def _boom(x):
+    if x == 2:
+        raise ValueError("bad item")
+    return x
+
+
+def _die_on_two(x):
+    if x == 2:
+        os.kill(os.getpid(), signal.SIGKILL)  # as the OOM killer would
+    return x
+
+
+def test_run_pool_recycles_workers():
+    results = sorted(run_pool(_square, list(range(6)), jobs=2, max_tasks_per_worker=1))
+    assert results == [(i, i * i, None) for i in range(6)]
+
+
+def test_run_pool_reports_task_errors():
+    results = dict((idx, (res, err)) for idx, res, err in run_pool(_boom, [1, 2, 3], jobs=2))
+    assert results[0] == (1, None)
+    assert results[1][0] is None and "bad item" in results[1][1]
+    assert results[2] == (3, None)
+
+
+def test_run_pool_survives_worker_killed_mid_task():
+    results = {idx: (res, err) for idx, res, err in run_pool(_die_on_two, list(range(6)), jobs=2)}
+
+    assert sorted(results) == list(range(6))
+    assert results[2][0] is None and "exited unexpectedly" in results[2][1]
+    assert all(results[i] == (i, None) for i in (0, 1, 3, 4, 5))
+
+
+def test_generate_batch_html_docx(tmp_path, write_spec):
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("one", "two", "three"):
+        write_spec(src / f"{name}.yaml", SECTION)
+    out = tmp_path / "out"
+
+    result = CliRunner().invoke(
+        app,
+        [
+            "generate-batch",
+            str(src / "*.yaml"),
+            "--fmt", "html,docx",
+            "--output-dir", str(out),
+            "--jobs", "2",
+            "--max-tasks-per-worker", "1",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "3 generated, 0 failed" in result.output
+    for name in ("one", "two", "three"):
+        assert (out / f"{name}.html").stat().st_size > 0
+        assert (out / f"{name}.docx").stat().st_size > 0
+
+
+def test_generate_batch_rejects_unknown_format(tmp_path, write_spec):
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    result = CliRunner().invoke(app, ["generate-batch", str(spec), "--fmt", "html,odt"])
+    assert result.exit_code != 0
+    assert not (tmp_path / "spec.html").exists()
+
+
+def test_generate_several_formats_in_one_run(tmp_path, write_spec):
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "html,docx",
+                                      "--output", str(tmp_path / "report")])
+
+    assert result.exit_code == 0, result.output
+    assert "HTML generated" in result.output and "DOCX generated" in result.output
+    assert (tmp_path / "report.html").stat().st_size > 0
+    assert (tmp_path / "report.docx").stat().st_size > 0
+
+
+def test_generate_several_formats_normalises_once(tmp_path, write_spec):
+    from annex4ac.document import section_blocks
+
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    section_blocks.cache_clear()
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "html,docx", "--jobs", "1"])
+
+    assert result.exit_code == 0, result.output
+    info = section_blocks.cache_info()
+    # the document model is built once and both renderers consume it
+    assert (info.misses, info.hits) == (len(SECTION_KEYS), 0)
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from annex4ac import html_generator
+from annex4ac.annex4ac import app
+from annex4ac.constants import SECTION_KEYS
+
+SECTION = "(a) {key} text"
+
+
+@pytest.fixture
+def fresh_env():
+    html_generator._environment.cache_clear()  # bind the bytecode cache to this test's cache dir
+    yield
+    html_generator._environment.cache_clear()
+
+
+def test_generate_with_custom_template(tmp_path, fresh_env, write_spec):
+    tpl = tmp_path / "corporate.html"
+    tpl.write_text("<h1>ACME</h1><main>{{ system_overview | listify }}</main>\n")
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "html", "--template", str(tpl)])
+
+    assert result.exit_code == 0, result.output
+    html = (tmp_path / "spec.html").read_text()
+    assert "<h1>ACME</h1>" in html
+    assert '<ol class="alpha"><li>system_overview text</li></ol>' in html
+
+
+def test_custom_template_cached_by_path_and_mtime(tmp_path, fresh_env):
+    tpl = tmp_path / "t.html"
+    tpl.write_text("one")
+    first = html_generator._get_template(tpl)
+    assert html_generator._get_template(tpl) is first
+
+    tpl.write_text("two")
+    st = tpl.stat()
+    os.utime(tpl, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert html_generator._get_template(tpl).render() == "two"
+
+
+def test_new_process_loads_template_from_bytecode_cache(monkeypatch, fresh_env):
+    html_generator._get_template()
+    html_generator._environment.cache_clear()  # as if in a fresh process
+
+    env = html_generator._environment()
+
+    def no_compile(*a, **kw):
+        raise AssertionError("template compiled again")
+
+    monkeypatch.setattr(env, "compile", no_compile)
+    assert "Annex IV" in html_generator._get_template().render()
+
+
+def test_doc_control_slot_is_streamed_once(tmp_path):
+    import io
+    from annex4ac.constants import DOC_CTRL_FIELDS
+
+    payload = {key: f"(a) {key}" for key in SECTION_KEYS}
+    meta = {key: "<v>" for _, key in DOC_CTRL_FIELDS}
+    sink = io.BytesIO()
+
+    html_generator._write_html(payload, meta, sink)
+
+    html = sink.getvalue().decode("utf-8")
+    assert html == html_generator._render_html(payload, meta)
+    assert html.count('<section id="doc-control">') == 1
+    assert html.index("</h1>") < html.index("doc-control") < html.index("1. System Overview")
+    assert "&lt;v&gt;" in html and "Schema Version:" not in html
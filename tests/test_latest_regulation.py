@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from annex4ac.db import Base, Regulation, RegSourceLog, Rule, get_latest_regulation_id_with_annex
+
+
+def _session(tmp_path, tables=None):
+    eng = create_engine(f"sqlite:///{tmp_path / 'rules.db'}")
+    Base.metadata.create_all(eng, tables=tables)
+    return Session(eng)
+
+
+def _rule(rid, code, ts=None):
+    return Rule(id=f"{rid}-{code}", regulation_id=rid, section_code=code,
+                content="text", last_modified=ts)
+
+
+def test_source_priority_wins_over_timestamps(tmp_path):
+    with _session(tmp_path) as ses:
+        ses.add_all([
+            Regulation(id="old", version="20240101", last_updated=datetime(2024, 1, 1)),
+            Regulation(id="new", version="20250101", last_updated=datetime(2025, 1, 1)),
+            Regulation(id="other", last_updated=datetime(2026, 1, 1)),
+            _rule("old", "AnnexIV.1"),
+            _rule("new", "AnnexIV.1", datetime(2025, 1, 1)),
+            _rule("other", "Article.1", datetime(2026, 1, 1)),  # no Annex IV: ignored
+            RegSourceLog(id="1", regulation_id="old", source_name="celex_consolidated"),
+            RegSourceLog(id="2", regulation_id="new", source_name="ai_act_html",
+                         created_at=datetime(2025, 1, 2)),
+        ])
+        ses.commit()
+        assert get_latest_regulation_id_with_annex(ses) == "old"
+
+
+def test_timestamps_then_version_break_ties(tmp_path):
+    with _session(tmp_path) as ses:
+        ses.add_all([
+            Regulation(id="a", version="2024.01.01"),
+            Regulation(id="b", version="2024.06.01"),
+            Regulation(id="c", version="2030.01.01"),
+            _rule("a", "AnnexIV.1", datetime(2024, 6, 1)),
+            _rule("b", "AnnexIV.1", datetime(2024, 6, 1)),
+            _rule("c", "AnnexIV.1", datetime(2024, 5, 1)),
+        ])
+        ses.commit()
+        assert get_latest_regulation_id_with_annex(ses) == "b"
+
+
+def test_works_without_source_log_table(tmp_path):
+    tables = [Regulation.__table__, Rule.__table__]
+    with _session(tmp_path, tables=tables) as ses:
+        ses.add_all([
+            Regulation(id="a", last_updated=datetime(2024, 1, 1)),
+            Regulation(id="b", last_updated=datetime(2025, 1, 1)),
+            _rule("a", "AnnexIV.1"),
+            _rule("b", "AnnexIV.2"),
+        ])
+        ses.commit()
+        assert get_latest_regulation_id_with_annex(ses) == "b"
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+HEAVY = ("reportlab", "docx", "bs4", "requests", "jinja2", "ftfy", "pikepdf", "sqlalchemy", "pydantic_settings")
+
+
+def _loaded_after(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print(' '.join(sorted(sys.modules)))"],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return {m for m in HEAVY if m in out}
+
+
+def test_import_does_not_load_renderers_or_db():
+    assert _loaded_after("import annex4ac") == set()
+
+
+def test_help_does_not_load_renderers_or_db():
+    code = (
+        "from typer.testing import CliRunner\n"
+        "from annex4ac import app\n"
+        "assert CliRunner().invoke(app, ['--help']).exit_code == 0"
+    )
+    assert _loaded_after(code) == set()
+
+
+def test_moved_names_still_resolve():
+    import annex4ac.annex4ac as cli_mod
+    from annex4ac.html_generator import listify
+
+    assert cli_mod.listify is listify
@@ -0,0 +1,18 @@
+from annex4ac.lexer import lex
+
+
+def test_lex_classifies_each_line_once():
+    toks = lex("Intro\n(a) first\n  - sub\n(i) one\n(iv) four\n1. num\n● dot\n\n(ab) not a list")
+    assert [t.kind for t in toks] == [
+        "para", "alpha", "bullet", "roman", "roman", "number", "bullet", "blank", "para",
+    ]
+    assert toks[1].label == "a" and toks[1].text == "first"
+    assert toks[2].indent == 2 and toks[2].is_top_bullet
+    assert toks[3].is_alpha_item and not toks[4].is_alpha_item
+    assert toks[5].is_top_bullet
+    assert not toks[6].is_top_bullet  # "●" is a list bullet but never a top-level point
+
+
+def test_lex_is_memoised():
+    text = "(a) x\n(b) y"
+    assert lex(text) is lex(text)
@@ -0,0 +1,55 @@
+import io
+
+import pikepdf
+
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS, SECTION_MAPPING
+from annex4ac.pdf_generator import _render_pdf, _write_pdf
+from annex4ac.pdf_parallel import render_pdf_sections
+
+
+def _pages_and_outline(data):
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        index = {page.objgen: i for i, page in enumerate(pdf.pages)}
+        outline = [(item.title, index[item.destination[0].objgen]) for item in pdf.open_outline().root]
+        overlays = [len(page.Resources.get("/XObject", {}).keys()) for page in pdf.pages]
+    return overlays, outline
+
+
+def test_section_per_page_layout_matches_between_serial_and_parallel():
+    # long enough that sections run over several pages
+    body = "\n".join(["(a) first"] + [f"- item {i} with a few words of text" for i in range(70)])
+    payload = {key: f"{key}\n{body}" for key in SECTION_KEYS}
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+
+    flowing = io.BytesIO()
+    _render_pdf(payload, flowing, meta)
+    serial = io.BytesIO()
+    render_pdf_sections(payload, serial, meta, jobs=1)
+    merged = io.BytesIO()
+    assert _write_pdf(payload, meta, merged, jobs=3)
+
+    serial_overlays, serial_outline = _pages_and_outline(serial.getvalue())
+    overlays, outline = _pages_and_outline(merged.getvalue())
+    titles = ["Document control"] + [title for title, _ in SECTION_MAPPING]
+    assert [title for title, _ in serial_outline] == titles
+    # same page breaks and outline whether the parts are laid out in one pass or in parallel
+    assert outline == serial_outline
+    assert len(overlays) == len(serial_overlays)
+    # the page number is stamped over each merged page
+    assert overlays == [1] * len(overlays)
+    assert all(b > a for (_, a), (_, b) in zip(outline, outline[1:]))
+
+    # the default flowing render is untouched: no outline, and sections share pages
+    flowing_overlays, flowing_outline = _pages_and_outline(flowing.getvalue())
+    assert flowing_outline == []
+    assert len(flowing_overlays) < len(overlays)
+
+
+def test_invalid_pdf_jobs_falls_back_to_serial(monkeypatch, capsys):
+    from annex4ac.annex4ac import _pdf_section_jobs
+
+    monkeypatch.setenv("ANNEX4AC_PDF_JOBS", "foo")
+    assert _pdf_section_jobs() == 0
+    assert "ANNEX4AC_PDF_JOBS='foo'" in capsys.readouterr().err
+    monkeypatch.setenv("ANNEX4AC_PDF_JOBS", "3")
+    assert _pdf_section_jobs() == 3
@@ -0,0 +1,52 @@
+import io
+
+import pikepdf
+from typer.testing import CliRunner
+
+from annex4ac.annex4ac import app
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+from annex4ac.pdf_generator import _write_pdf
+
+
+def test_pdfa_is_rendered_in_memory_and_written_once():
+    payload = {key: f"(a) {key}\n- item" for key in SECTION_KEYS}
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+
+    class Sink(io.BytesIO):
+        writes = 0
+
+        def write(self, b):
+            Sink.writes += 1
+            return super().write(b)
+
+    sink = Sink()
+    assert _write_pdf(payload, meta, sink, pdfa=True, verbose=False)
+
+    assert Sink.writes == 1
+    with pikepdf.open(io.BytesIO(sink.getvalue())) as pdf:
+        assert "/OutputIntents" in pdf.Root
+        assert pdf.open_metadata()["pdfaid:part"] == "2"
+
+
+def test_generate_to_stdout_keeps_messages_on_stderr(tmp_path):
+    spec = tmp_path / "in.yaml"
+    spec.write_text("\n".join(f"{key}: '{key} text'" for key in SECTION_KEYS) + "\n")
+
+    result = CliRunner(mix_stderr=False).invoke(app, ["generate", str(spec), "--fmt", "html", "--output", "-"])
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout.lstrip().startswith("<!DOCTYPE html>")
+    assert "HTML generated: -" in result.stderr
+    assert not (tmp_path / "-").exists()
+
+
+def test_single_format_generate_warns_when_pdfa_fails(tmp_path, monkeypatch, write_spec):
+    monkeypatch.setattr("annex4ac.annex4ac._check_license", lambda: None)
+    monkeypatch.setattr("annex4ac.pdf_generator._save_pdfa", lambda *a, **kw: False)
+    spec = write_spec(tmp_path / "in.yaml")
+
+    result = CliRunner().invoke(app, ["generate", str(spec), "--fmt", "pdf", "--pdfa"])
+
+    assert result.exit_code == 0, result.output
+    assert f"[WARNING] PDF/A conversion failed for {tmp_path / 'in.pdf'}" in result.output
+    assert (tmp_path / "in.pdf").read_bytes().startswith(b"%PDF")
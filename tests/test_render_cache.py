@@ -0,0 +1,94 @@
+import os
+
+from typer.testing import CliRunner
+from annex4ac.annex4ac import app
+
+SECTION = "(a) {key} first"
+
+
+def test_unchanged_spec_is_reused_from_cache(monkeypatch, tmp_path, write_spec):
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    store = tmp_path / "renders"
+    args = ["generate", str(spec), "--fmt", "html,docx", "--jobs", "1", "--cache-dir", str(store)]
+
+    first = CliRunner().invoke(app, args)
+    assert first.exit_code == 0, first.output
+    assert "(cached)" not in first.output
+    html = (tmp_path / "spec.html").read_bytes()
+
+    def boom(*a, **kw):
+        raise AssertionError("unchanged document rendered again")
+
+    monkeypatch.setattr("annex4ac.annex4ac._render_format", boom)
+    (tmp_path / "spec.html").unlink()
+    second = CliRunner().invoke(app, args)
+    assert second.exit_code == 0, second.output
+    assert second.output.count("(cached)") == 2
+    assert (tmp_path / "spec.html").read_bytes() == html
+    assert (tmp_path / "spec.html").stat().st_nlink == 1  # a copy, not a link into the store
+
+    write_spec(spec, SECTION, risk_management="(a) changed")
+    third = CliRunner().invoke(app, args)
+    assert "unchanged document rendered again" in third.output
+
+
+def test_rendering_over_a_linked_output_keeps_cache_entry(tmp_path, write_spec):
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    out = tmp_path / "spec.html"
+    cached = ["generate", str(spec), "--fmt", "html", "--cache-dir", str(tmp_path / "renders")]
+
+    assert CliRunner().invoke(app, cached).exit_code == 0
+    assert "(cached)" in CliRunner().invoke(app, cached).output
+    original = out.read_bytes()
+
+    write_spec(spec, SECTION, risk_management="(a) edited")
+    assert CliRunner().invoke(app, ["generate", str(spec), "--fmt", "html", "--no-cache"]).exit_code == 0
+    assert out.read_bytes() != original
+
+    write_spec(spec, SECTION)
+    result = CliRunner().invoke(app, cached)
+    assert "(cached)" in result.output
+    assert out.read_bytes() == original
+
+
+def test_cached_output_is_the_users_own_copy(tmp_path, write_spec):
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    out = tmp_path / "spec.html"
+    args = ["generate", str(spec), "--fmt", "html", "--cache-dir", str(tmp_path / "renders")]
+
+    assert CliRunner().invoke(app, args).exit_code == 0
+    original = out.read_bytes()
+    assert "(cached)" in CliRunner().invoke(app, args).output
+    os.utime(out, (1_000_000, 1_000_000))
+
+    # another cache hit elsewhere must not touch this output's mtime
+    assert "(cached)" in CliRunner().invoke(app, args + ["--output", str(tmp_path / "other.html")]).output
+    assert out.stat().st_mtime == 1_000_000
+
+    # an in-place edit of the output must not leak into the cache entry
+    with open(out, "r+b") as fh:
+        fh.write(b"CORRUPT")
+    out.unlink()
+    assert "(cached)" in CliRunner().invoke(app, args).output
+    assert out.read_bytes() == original
+
+
+def test_hard_links_are_opt_in(monkeypatch, tmp_path, write_spec):
+    monkeypatch.setenv("ANNEX4AC_RENDER_CACHE_LINK", "1")
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    args = ["generate", str(spec), "--fmt", "html", "--cache-dir", str(tmp_path / "renders")]
+
+    assert CliRunner().invoke(app, args).exit_code == 0
+    assert "(cached)" in CliRunner().invoke(app, args).output
+    assert (tmp_path / "spec.html").stat().st_nlink == 2
+
+
+def test_bad_cache_size_warns_and_uses_default(monkeypatch, tmp_path, write_spec):
+    monkeypatch.setenv("ANNEX4AC_RENDER_CACHE_MB", "1G")
+    spec = write_spec(tmp_path / "spec.yaml", SECTION)
+    args = ["generate", str(spec), "--fmt", "html", "--cache-dir", str(tmp_path / "renders")]
+
+    result = CliRunner(mix_stderr=False).invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert "ANNEX4AC_RENDER_CACHE_MB='1G'" in result.stderr
+    assert "(cached)" in CliRunner().invoke(app, args).output
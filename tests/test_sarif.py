@@ -0,0 +1,120 @@
+import json
+
+from ruamel.yaml import YAML
+from typer.testing import CliRunner
+
+from annex4ac.annex4ac import app
+from annex4ac.sarif import key_positions, write_sarif
+
+
+def test_key_positions_indexes_nested_paths_in_one_pass():
+    doc = YAML(typ="rt").load("a: 1\nb:\n  c:\n    a: 2\n  d: [1, 2]\n")
+
+    pos = key_positions(doc)
+
+    assert pos["a"] == (1, 1)          # bare name: first occurrence
+    assert pos["b.c"] == (3, 3)
+    assert pos["b.c.a"] == (4, 5)
+    assert pos["b.d"] == (5, 3)
+
+
+def test_key_positions_bare_name_is_first_in_document_order():
+    # a nested key that appears before a shallower one of the same name wins
+    doc = YAML(typ="rt").load("a:\n  x: 1\nx: 2\n")
+
+    pos = key_positions(doc)
+
+    assert pos["x"] == (2, 3)
+    assert pos["a.x"] == (2, 3)
+
+
+def test_write_sarif_uses_given_document_and_key(tmp_path):
+    doc = YAML(typ="rt").load("outer:\n  inner: x\n")
+    out = tmp_path / "out.sarif"
+
+    write_sarif([{"rule": "r", "msg": "m", "key": "outer.inner"}], out, "missing.yaml", doc=doc)
+
+    region = json.loads(out.read_text())["runs"][0]["results"][0]["locations"][0]["physicalLocation"]
+    assert region["artifactLocation"]["uri"] == "missing.yaml"
+    assert region["region"] == {"startLine": 2, "startColumn": 3}
+
+
+def test_validate_sarif_does_not_reparse_input(monkeypatch, tmp_path):
+    def boom(path):
+        raise AssertionError("input parsed twice")
+
+    monkeypatch.setattr("annex4ac.sarif.load_positions", boom)
+    yml = tmp_path / "in.yaml"
+    yml.write_text("enterprise_size: sme\nrisk_level: ''\n")
+    sarif = tmp_path / "out.sarif"
+
+    result = CliRunner().invoke(app, ["validate", str(yml), "--no-cache", "--sarif", str(sarif)])
+
+    assert result.exit_code == 1
+    results = json.loads(sarif.read_text())["runs"][0]["results"]
+    assert {"ruleId": "risk_lvl_missing"}.items() <= results[0].items()
+
+
+def test_merge_streams_shards_into_one_run_per_tool(monkeypatch, tmp_path):
+    from annex4ac.sarif import SarifWriter, TOOL, _JsonStream, merge_sarif
+
+    monkeypatch.setattr(_JsonStream, "CHUNK", 7)  # force many partial reads
+    a = tmp_path / "a.sarif"
+    with SarifWriter(a) as w:
+        w.add_violations([{"rule": "r1", "msg": "m1"}, {"rule": "r2", "msg": "m2"}], "specs/a.yaml", [[3, 1]])
+    b = tmp_path / "b.sarif"
+    other = {"driver": {"name": "other"}}
+    b.write_text(json.dumps({"runs": [
+        # results before tool, with an artifact index that no longer applies after merging
+        {"results": [{"ruleId": "r3", "locations": [{"physicalLocation": {
+            "artifactLocation": {"uri": "specs/b.yaml", "index": 4}}}]}], "tool": TOOL},
+        {"tool": other, "results": [{"ruleId": "x", "message": {"text": "é 12345"}}]},
+    ], "version": "2.1.0"}, indent=2))
+    out = tmp_path / "merged.sarif"
+
+    assert merge_sarif([a, b], out) == (2, 4)
+
+    runs = json.loads(out.read_text())["runs"]
+    assert [r["tool"] for r in runs] == [TOOL, other]
+    assert [r["ruleId"] for r in runs[0]["results"]] == ["r1", "r2", "r3"]
+    assert runs[0]["results"][0]["locations"][0]["physicalLocation"]["region"]["startLine"] == 3
+    assert runs[0]["artifacts"] == [{"location": {"uri": "specs/a.yaml"}}, {"location": {"uri": "specs/b.yaml"}}]
+    assert "index" not in runs[0]["results"][2]["locations"][0]["physicalLocation"]["artifactLocation"]
+    assert runs[1]["results"][0]["message"]["text"] == "é 12345"
+
+
+def test_validate_batch_writes_one_sarif_log(tmp_path):
+    bad1 = tmp_path / "one.yaml"
+    bad1.write_text("enterprise_size: sme\nrisk_level: ''\n")
+    bad2 = tmp_path / "two.yaml"
+    bad2.write_text("risk_level: ''\nenterprise_size: sme\n")
+    sarif = tmp_path / "all.sarif"
+
+    result = CliRunner().invoke(
+        app, ["validate-batch", "--jobs", "1", "--offline", "--sarif", str(sarif), str(bad1), str(bad2)]
+    )
+
+    assert result.exit_code == 1
+    log = json.loads(sarif.read_text())
+    assert len(log["runs"]) == 1
+    by_uri = {}
+    for res in log["runs"][0]["results"]:
+        loc = res["locations"][0]["physicalLocation"]
+        by_uri.setdefault(loc["artifactLocation"]["uri"], []).append(loc["region"])
+    assert set(by_uri) == {bad1.as_posix(), bad2.as_posix()}
+    assert len(log["runs"][0]["artifacts"]) == 2
+
+
+def test_sarif_merge_command(tmp_path):
+    from annex4ac.sarif import SarifWriter
+
+    for i in range(3):
+        with SarifWriter(tmp_path / f"shard{i}.sarif") as w:
+            w.add_violations([{"rule": f"r{i}", "msg": "m"}], f"s{i}.yaml")
+    out = tmp_path / "merged.sarif"
+
+    result = CliRunner().invoke(app, ["sarif-merge", str(tmp_path / "shard*.sarif"), "-o", str(out)])
+
+    assert result.exit_code == 0, result.output
+    assert "Merged 3 result(s) from 3 file(s)" in result.output
+    assert len(json.loads(out.read_text())["runs"][0]["results"]) == 3
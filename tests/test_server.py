@@ -0,0 +1,167 @@
+import json
+import os
+import stat
+import threading
+
+import pytest
+from typer.testing import CliRunner
+from annex4ac import server
+from annex4ac.annex4ac import app
+from annex4ac.server import ServerState, make_server, request
+
+
+def _start(tmp_path, **state_kwargs):
+    state = ServerState(offline=True, **state_kwargs)
+    state.warm(log=lambda msg: None)
+    srv = make_server(state, port=0, quiet=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def test_server_validate_and_generate(tmp_path, spec_text):
+    srv = _start(tmp_path)
+    try:
+        status, _, body = request(srv.address, "GET", "/health")
+        assert status == 200 and json.loads(body)["status"] == "ok"
+
+        status, _, body = request(srv.address, "POST", "/validate",
+                                  {"yaml": spec_text(risk_level=""), "path": "bad.yaml"},
+                                  token=srv.token)
+        res = json.loads(body)
+        assert status == 200
+        assert res["path"] == "bad.yaml"
+        assert any(v["rule"] == "risk_lvl_missing" for v in res["violations"])
+
+        status, ctype, body = request(srv.address, "POST", "/generate",
+                                      {"yaml": spec_text(), "fmt": "html"}, token=srv.token)
+        assert status == 200 and ctype.startswith("text/html")
+        assert b"<html" in body.lower()
+
+        status, _, _ = request(srv.address, "POST", "/generate", {"yaml": spec_text(), "fmt": "pdf"},
+                               token=srv.token)
+        assert status == 403
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_cli_uses_running_server(tmp_path, monkeypatch, spec_text):
+    srv = _start(tmp_path)
+    seen = []
+    original = srv.state.validate
+    srv.state.validate = lambda body: seen.append(body["path"]) or original(body)
+    try:
+        monkeypatch.delenv("ANNEX4AC_NO_SERVER")
+        monkeypatch.setenv("ANNEX4AC_SERVER", srv.address)
+        monkeypatch.setenv("ANNEX4AC_SERVER_TOKEN", srv.token)
+        spec = tmp_path / "ok.yaml"
+        spec.write_text(spec_text())
+
+        result = CliRunner().invoke(app, ["validate", str(spec)])
+
+        assert result.exit_code == 0, result.output
+        assert "Validation OK!" in result.output
+        assert seen == [str(spec)]
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_cli_falls_back_when_server_is_gone(tmp_path, monkeypatch, spec_text):
+    monkeypatch.delenv("ANNEX4AC_NO_SERVER")
+    monkeypatch.setenv("ANNEX4AC_SERVER", "unix:" + str(tmp_path / "missing.sock"))
+    spec = tmp_path / "ok.yaml"
+    spec.write_text(spec_text())
+
+    result = CliRunner().invoke(app, ["validate", str(spec)])
+
+    assert result.exit_code == 0, result.output
+    assert "Validation OK!" in result.output
+
+
+def test_server_rejects_requests_without_token(tmp_path, spec_text):
+    srv = _start(tmp_path)
+    try:
+        for token in (None, "guess"):
+            status, _, body = request(srv.address, "POST", "/generate",
+                                      {"yaml": spec_text(), "fmt": "html"}, token=token)
+            assert status == 401
+            assert b"<html" not in body.lower()
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_discovery_file_is_private_and_carries_token(tmp_path, monkeypatch):
+    discovery = tmp_path / "cache" / "server.json"
+    monkeypatch.setattr(server, "_discovery_file", lambda: discovery)
+    monkeypatch.delenv("ANNEX4AC_NO_SERVER")
+    monkeypatch.delenv("ANNEX4AC_SERVER", raising=False)
+    srv = make_server(ServerState(offline=True), port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, args=(srv,), daemon=True).start()
+    try:
+        for _ in range(200):
+            if discovery.exists():
+                break
+            threading.Event().wait(0.01)
+        assert stat.S_IMODE(os.stat(discovery).st_mode) == 0o600
+        assert server.server_address() == (srv.address, srv.token)
+    finally:
+        srv.shutdown()
+
+
+def test_server_refuses_non_loopback_host_unless_allowed():
+    state = ServerState(offline=True)
+    with pytest.raises(ValueError):
+        make_server(state, host="0.0.0.0", port=0)
+    srv = make_server(state, host="0.0.0.0", port=0, allow_remote=True)
+    srv.server_close()
+    make_server(state, host="localhost", port=0).server_close()
+
+
+def test_validate_only_uses_configured_database(tmp_path, spec_text):
+    state = ServerState(db_url="sqlite:///configured.db", offline=True)
+    loaded = []
+    state.snapshot = lambda: loaded.append(1)
+    with pytest.raises(server._RequestError) as exc:
+        state.validate({"yaml": spec_text(), "use_db": True, "db_url": "postgresql://attacker/db"})
+    assert exc.value.status == 400
+    assert loaded == []
+
+
+def test_generate_renders_with_client_settings(monkeypatch, spec_text):
+    monkeypatch.setenv("ANNEX4AC_DOCX_BACKEND", "stream")  # the server's own environment
+    state = ServerState(offline=True)
+
+    def boom(*a, **kw):
+        raise AssertionError("server used its own DOCX backend")
+
+    monkeypatch.setattr("annex4ac.docx_stream.write_docx", boom)
+    data, _ = state.generate({"yaml": spec_text(), "fmt": "docx", "docx_backend": "python-docx"})
+    assert data.startswith(b"PK")
+
+    state.claims = {"sub": "test"}
+    with pytest.raises(server._RequestError) as exc:
+        state.generate({"yaml": spec_text(), "fmt": "pdf", "pdf_jobs": 4})
+    assert exc.value.status == 400
+
+
+def test_validate_with_cache_dir_stays_local(tmp_path, monkeypatch, spec_text):
+    srv = _start(tmp_path)
+    seen = []
+    srv.state.validate = lambda body: seen.append(body) or {}
+    try:
+        monkeypatch.delenv("ANNEX4AC_NO_SERVER")
+        monkeypatch.setenv("ANNEX4AC_SERVER", srv.address)
+        monkeypatch.setenv("ANNEX4AC_SERVER_TOKEN", srv.token)
+        spec = tmp_path / "ok.yaml"
+        spec.write_text(spec_text())
+
+        result = CliRunner().invoke(app, ["validate", str(spec), "--cache-dir", str(tmp_path / "vcache")])
+
+        assert result.exit_code == 0, result.output
+        assert seen == []
+        assert any((tmp_path / "vcache").rglob("*"))
+    finally:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,30 @@
+from annex4ac import structure
+from annex4ac.structure import AnnexIndex, get_index, parse_section
+
+
+def test_parse_section_builds_tree():
+    sec = parse_section("Intro\n(a) purpose\n  (i) one\n  (ii) two\n(b) interaction\n  - x")
+    assert sec.letters == ("a", "b")
+    assert [it.label for it in sec.items] == ["a", "b"]
+    assert sec.items[0].text == "purpose"
+    assert sec.items[0].children == ("(i) one", "(ii) two")
+    assert (sec.n_top, sec.n_sub_first) == (2, 2)
+
+
+def test_parse_section_bullets_without_letters():
+    sec = parse_section("- foo\n  - x\n  - y\n- bar\n1. baz")
+    assert sec.letters == ()
+    assert (sec.n_top, sec.n_sub_first) == (3, 2)
+
+
+def test_index_is_cached_on_disk_by_schema_version(monkeypatch):
+    sections = {"system_overview": "(a) foo\n(b) bar", "risk_management": ""}
+    index = get_index(sections, "20240712")
+    assert index.get("system_overview").letters == ("a", "b")
+    assert not index.get("risk_management").present
+
+    structure._MEMO.clear()
+    monkeypatch.setattr(structure, "parse_section", lambda text: (_ for _ in ()).throw(AssertionError))
+    cached = get_index(sections, "20240712")
+    assert cached == index
+    assert AnnexIndex.from_dict(cached.to_dict()) == index
@@ -0,0 +1,56 @@
+from typer.testing import CliRunner
+from annex4ac.annex4ac import app
+from annex4ac.db import AnnexSnapshot
+
+
+def test_validate_batch_reports_each_file(tmp_path, write_spec):
+    ok = write_spec(tmp_path / "ok.yaml")
+    bad = write_spec(tmp_path / "bad.yaml", risk_level="")
+
+    result = CliRunner().invoke(app, ["validate-batch", "--jobs", "1", str(ok), str(bad)])
+
+    assert result.exit_code == 1
+    assert f"[OK] {ok}" in result.output
+    assert f"[FAIL] {bad}" in result.output
+    assert "risk_lvl_missing" in result.output
+    assert "1 passed, 1 failed" in result.output
+
+
+def test_validate_batch_glob_and_shared_snapshot(monkeypatch, tmp_path, write_spec):
+    calls = []
+
+    class DummySession:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+    def fake_load(ses, regulation_id=None, celex_id=None):
+        calls.append("load")
+        return AnnexSnapshot(
+            regulation_id="reg",
+            sections={"system_overview": "(a) foo\n(b) bar"},
+            top_counts={"system_overview": 2},
+        )
+
+    monkeypatch.setattr("annex4ac.annex4ac.get_session", lambda url: DummySession())
+    monkeypatch.setattr("annex4ac.annex4ac.load_annex_snapshot", fake_load)
+    for i in range(3):
+        write_spec(tmp_path / f"spec{i}.yaml", system_overview="(a) foo")
+
+    result = CliRunner().invoke(
+        app,
+        [
+            "validate-batch",
+            "--jobs", "2",
+            "--use-db",
+            "--db-url", "postgresql+psycopg://u:p@h/db",
+            str(tmp_path / "*.yaml"),
+        ],
+    )
+
+    assert result.exit_code == 1
+    assert calls == ["load"]
+    assert result.output.count("system_overview_subpoints_insufficient") == 3
+    assert "0 passed, 3 failed" in result.output
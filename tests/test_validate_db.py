@@ -1,6 +1,15 @@
 import json
 from typer.testing import CliRunner
 from annex4ac.annex4ac import app
+from annex4ac.db import AnnexSnapshot
+
+
+def _use_snapshot(monkeypatch, sections, top_counts):
+    snap = AnnexSnapshot(regulation_id="reg", sections=sections, top_counts=top_counts)
+    monkeypatch.setattr(
+        "annex4ac.annex4ac.load_annex_snapshot",
+        lambda s, regulation_id=None, celex_id=None: snap,
+    )
 
 
 def test_validate_db_sarif(monkeypatch, tmp_path):
@@ -15,16 +24,11 @@ def test_validate_db_sarif(monkeypatch, tmp_path):
     def fake_get_session(url):
         return DummySession()
 
-    def fake_load_annex_iv_from_db(ses, regulation_id=None, celex_id=None):
-        return {"system_overview": "stub"}
+    sections = {"system_overview": "stub"}
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", fake_get_session)
-    monkeypatch.setattr("annex4ac.annex4ac.load_annex_iv_from_db", fake_load_annex_iv_from_db)
     monkeypatch.setattr("annex4ac.annex4ac._validate_payload", lambda payload: ([], []))
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.get_expected_top_counts",
-        lambda s, regulation_id=None, celex_id=None: {},
-    )
+    _use_snapshot(monkeypatch, sections, {})
 
     yml = tmp_path / "in.yaml"
     yml.write_text("system_overview: ''\n")
@@ -61,17 +65,12 @@ def test_validate_db_subpoints(monkeypatch, tmp_path):
     def fake_get_session(url):
         return DummySession()
 
-    def fake_load_annex_iv_from_db(ses, regulation_id=None, celex_id=None):
-        # DB expects two top-level subpoints and three nested items in first
-        return {"system_overview": "(a) foo\n  - x\n  - y\n  - z\n(b) bar"}
+    # DB expects two top-level subpoints and three nested items in first
+    sections = {"system_overview": "(a) foo\n  - x\n  - y\n  - z\n(b) bar"}
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", fake_get_session)
-    monkeypatch.setattr("annex4ac.annex4ac.load_annex_iv_from_db", fake_load_annex_iv_from_db)
     monkeypatch.setattr("annex4ac.annex4ac._validate_payload", lambda payload: ([], []))
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.get_expected_top_counts",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": 2},
-    )
+    _use_snapshot(monkeypatch, sections, {"system_overview": 2})
 
     yml = tmp_path / "in.yaml"
     # User supplies only one bullet -> insufficient
@@ -103,15 +102,9 @@ def test_validate_db_counts_ok(monkeypatch, tmp_path):
             return False
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", lambda url: DummySession())
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.load_annex_iv_from_db",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": "(a) foo\n  - x\n  - y\n(b) bar"},
-    )
+    sections = {"system_overview": "(a) foo\n  - x\n  - y\n(b) bar"}
     monkeypatch.setattr("annex4ac.annex4ac._validate_payload", lambda p: ([], []))
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.get_expected_top_counts",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": 2},
-    )
+    _use_snapshot(monkeypatch, sections, {"system_overview": 2})
     class DummyModel:
         last_updated = "2024-01-01"
     monkeypatch.setattr("annex4ac.annex4ac.AnnexIVSchema", lambda **p: DummyModel())
@@ -145,15 +138,9 @@ def test_validate_db_numbered_ok(monkeypatch, tmp_path):
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", lambda url: DummySession())
     # DB expects two subpoints with letters
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.load_annex_iv_from_db",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": "(a) foo\n(b) bar"},
-    )
+    sections = {"system_overview": "(a) foo\n(b) bar"}
     monkeypatch.setattr("annex4ac.annex4ac._validate_payload", lambda p: ([], []))
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.get_expected_top_counts",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": 2},
-    )
+    _use_snapshot(monkeypatch, sections, {"system_overview": 2})
     class DummyModel:
         last_updated = "2024-01-01"
 
@@ -188,15 +175,9 @@ def test_validate_db_roman_subsub(monkeypatch, tmp_path):
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", lambda url: DummySession())
     # DB: two subpoints, first has two roman nested items
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.load_annex_iv_from_db",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": "(a) foo\n  (i) x\n  (ii) y\n(b) bar"},
-    )
+    sections = {"system_overview": "(a) foo\n  (i) x\n  (ii) y\n(b) bar"}
     monkeypatch.setattr("annex4ac.annex4ac._validate_payload", lambda p: ([], []))
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.get_expected_top_counts",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": 2},
-    )
+    _use_snapshot(monkeypatch, sections, {"system_overview": 2})
 
     yml = tmp_path / "in.yaml"
     # User provides only one roman nested item
@@ -228,15 +209,9 @@ def test_validate_db_explain_missing_letters(monkeypatch, tmp_path):
             return False
 
     monkeypatch.setattr("annex4ac.annex4ac.get_session", lambda url: DummySession())
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.load_annex_iv_from_db",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": "(a) foo\n(b) bar"},
-    )
+    sections = {"system_overview": "(a) foo\n(b) bar"}
     monkeypatch.setattr("annex4ac.annex4ac._validate_payload", lambda p: ([], []))
-    monkeypatch.setattr(
-        "annex4ac.annex4ac.get_expected_top_counts",
-        lambda s, regulation_id=None, celex_id=None: {"system_overview": 2},
-    )
+    _use_snapshot(monkeypatch, sections, {"system_overview": 2})
 
     yml = tmp_path / "in.yaml"
     yml.write_text("system_overview: '(a) foo'\n")
@@ -0,0 +1,84 @@
+import os
+from typer.testing import CliRunner
+from annex4ac.annex4ac import app
+from annex4ac.cache import ContentStore
+from annex4ac.constants import SECTION_KEYS
+from annex4ac.db import AnnexSnapshot
+
+
+def test_unchanged_file_is_answered_from_cache(monkeypatch, tmp_path, write_spec):
+    spec = write_spec(tmp_path / "in.yaml", risk_level="")
+    args = ["validate", str(spec), "--cache-dir", str(tmp_path / "shared")]
+
+    first = CliRunner().invoke(app, args)
+    assert first.exit_code == 1
+    assert "risk_lvl_missing" in first.output
+
+    def boom(text):
+        raise AssertionError("cached file was parsed again")
+
+    monkeypatch.setattr("annex4ac.annex4ac._parse_yaml_rt", boom)
+    second = CliRunner().invoke(app, args)
+    assert second.exit_code == 1
+    assert "risk_lvl_missing" in second.output
+
+    # --no-cache always re-checks
+    third = CliRunner().invoke(app, args + ["--no-cache"])
+    assert "cached file was parsed again" in third.output
+
+
+def test_only_changed_sections_are_rechecked(monkeypatch, tmp_path, write_spec):
+    class DummySession:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+    sections = {key: f"{key} canonical" for key in SECTION_KEYS}
+    snap = AnnexSnapshot(regulation_id="reg", sections=sections, top_counts={},
+                         version="v1", token="t1")
+    monkeypatch.setattr("annex4ac.annex4ac.get_session", lambda url: DummySession())
+    monkeypatch.setattr("annex4ac.annex4ac.load_annex_snapshot", lambda ses, **kw: snap)
+
+    spec = write_spec(tmp_path / "in.yaml")
+    args = ["validate", str(spec), "--use-db", "--db-url", "sqlite://"]
+    assert CliRunner().invoke(app, args).exit_code == 0
+
+    checked = []
+    import annex4ac.annex4ac as cli
+    real = cli._section_violations
+
+    def spy(key, *a, **kw):
+        checked.append(key)
+        return real(key, *a, **kw)
+
+    monkeypatch.setattr(cli, "_section_violations", spy)
+    write_spec(tmp_path / "in.yaml", risk_management="changed text")
+    assert CliRunner().invoke(app, args).exit_code == 0
+    assert checked == ["risk_management"]
+
+
+def test_content_store_evicts_least_recently_used(tmp_path):
+    store = ContentStore(tmp_path / "store", max_bytes=250)
+    store.PRUNE_EVERY = 10**9
+    for age, key in enumerate(("aa01", "bb02", "cc03")):
+        store.put(key, b"x" * 100)
+        os.utime(store.path(key), (age, age))
+    assert store.get("aa01") is not None  # used again: bb02 is now the oldest
+
+    store.prune()
+
+    assert store.get("bb02") is None
+    assert store.get("aa01") == b"x" * 100
+    assert store.get("cc03") == b"x" * 100
+
+
+def test_bad_cache_size_warns_and_uses_default(monkeypatch, tmp_path, write_spec):
+    monkeypatch.setenv("ANNEX4AC_VALIDATE_CACHE_MB", "1.5")
+    spec = write_spec(tmp_path / "in.yaml")
+
+    result = CliRunner(mix_stderr=False).invoke(app, ["validate", str(spec), "--cache-dir", str(tmp_path / "c")])
+
+    assert result.exit_code == 0, result.output
+    assert "ANNEX4AC_VALIDATE_CACHE_MB='1.5'" in result.stderr
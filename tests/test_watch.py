@@ -0,0 +1,48 @@
+import threading
+import time
+
+from annex4ac.constants import DOC_CTRL_FIELDS, SECTION_KEYS
+from annex4ac.watch import changed_keys, watch
+
+
+def _wait_for(pred, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_watch_reports_content_changes_only(tmp_path):
+    spec = tmp_path / "in.yaml"
+    spec.write_text("a: 1\n")
+    seen, stop = [], threading.Event()
+    t = threading.Thread(target=watch, args=(spec, seen.append), kwargs={"interval": 0.01, "stop": stop})
+    t.start()
+    try:
+        assert _wait_for(lambda: seen == [b"a: 1\n"])
+        spec.write_text("a: 1\n")  # same bytes: touched, not changed
+        time.sleep(0.1)
+        spec.write_text("a: 22\n")
+        assert _wait_for(lambda: len(seen) == 2)
+    finally:
+        stop.set()
+        t.join()
+    assert seen == [b"a: 1\n", b"a: 22\n"]
+
+
+def test_html_rerender_rebuilds_only_changed_section():
+    from annex4ac.html_generator import _blocks_html, _render_html
+
+    meta = {key: "x" for _, key in DOC_CTRL_FIELDS}
+    payload = {key: f"{key}\n- one\n- two" for key in SECTION_KEYS}
+    _render_html(payload, meta)
+    before = _blocks_html.cache_info().misses
+
+    edited = dict(payload, risk_management="risk_management\n- changed")
+    assert changed_keys(payload, edited, SECTION_KEYS) == {"risk_management"}
+    _render_html(edited, meta)
+
+    assert _blocks_html.cache_info().misses == before + 1
+